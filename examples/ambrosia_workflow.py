@@ -7,7 +7,11 @@ fragmented non-model organism genomes.
 
 from pathlib import Path
 import logging
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from teprof2.annotation.rmsk_cache import SharedRmsk
+    from teprof2.annotation.te_annotator import TEAnnotator
 
 # Configure logging
 logging.basicConfig(
@@ -16,6 +20,44 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Per-process TEAnnotator cache: a pool worker builds the annotator (Gencode
+# dictionaries, RepeatMasker index) once and reuses it for every sample it runs
+_ANNOTATOR_CACHE: dict[tuple, "TEAnnotator"] = {}
+
+
+def _get_annotator(
+    rmsk_bed: Path,
+    gencode_plus: Optional[Path],
+    gencode_minus: Optional[Path],
+    rmsk_shm: Optional["SharedRmsk"] = None,
+) -> "TEAnnotator":
+    """
+    Get a TEAnnotator for the given references, building it on first use.
+
+    Args:
+        rmsk_bed: RepeatMasker annotations (bgzipped + tabix)
+        gencode_plus: Gencode dictionary for + strand
+        gencode_minus: Gencode dictionary for - strand
+        rmsk_shm: Shared-memory RepeatMasker arrays, if published
+
+    Returns:
+        Cached TEAnnotator
+    """
+    from teprof2.annotation.te_annotator import AnnotationConfig, TEAnnotator
+
+    key = (rmsk_bed, gencode_plus, gencode_minus, rmsk_shm)
+    annotator = _ANNOTATOR_CACHE.get(key)
+    if annotator is None:
+        annotation_config = AnnotationConfig(
+            rmsk_bed=rmsk_bed,
+            gencode_plus_dict=gencode_plus,
+            gencode_minus_dict=gencode_minus,
+            rmsk_arrays=rmsk_shm.attach() if rmsk_shm is not None else None,
+            validate_inputs=True,
+        )
+        _ANNOTATOR_CACHE[key] = annotator = TEAnnotator(annotation_config)
+    return annotator
+
 
 def ambrosia_workflow(
     # Input files
@@ -30,6 +72,11 @@ def ambrosia_workflow(
     promoter_window: int = 2000,
     min_mapq: int = 255,
     parallel_workers: int = 4,
+    rmsk_shm: Optional["SharedRmsk"] = None,
+    bam_threads: int = 1,
+    per_chrom_threads: int = 1,
+    compute_gene_level: bool = True,
+    table_format: str = "parquet",
 ) -> dict:
     """
     Complete TEProf2 workflow for Ambrosia artemisiifolia.
@@ -51,11 +98,25 @@ def ambrosia_workflow(
         promoter_window: TSS upstream window for promoter analysis (bp)
         min_mapq: Minimum mapping quality
         parallel_workers: Number of parallel workers
+        rmsk_shm: Shared-memory RepeatMasker arrays published by the batch
+            driver; when given, the tabix file is not re-read
+        bam_threads: htslib threads for BAM decompression
+        per_chrom_threads: Threads quantifying (and merging) contigs in parallel
+        compute_gene_level: Also aggregate and write gene-level expression
+        table_format: Format of every output table, "parquet" (typed,
+            zstd-compressed, much faster to re-load), "tsv" or "tsv.zst"
+            (zstd-compressed text)
 
     Returns:
         Dictionary with summary statistics
     """
-    from teprof2.annotation.te_annotator import AnnotationConfig, TEAnnotator
+    import numpy as np
+
+    from teprof2.core.table_io import compact_dtypes, write_json, write_table
+    from teprof2.quantification.merge import (
+        merge_annotation_expression,
+        transcript_id_dtype,
+    )
     from teprof2.quantification.tpm_calculator import (
         ExpressionQuantifier,
         QuantificationConfig,
@@ -73,23 +134,16 @@ def ambrosia_workflow(
     # =========================================================================
     logger.info("\n[Step 1/4] Annotating transcripts with TE information...")
 
-    annotation_config = AnnotationConfig(
-        rmsk_bed=rmsk_bed,
-        gencode_plus_dict=gencode_plus,
-        gencode_minus_dict=gencode_minus,
-        validate_inputs=True,
-    )
-
-    annotator = TEAnnotator(annotation_config)
+    annotator = _get_annotator(rmsk_bed, gencode_plus, gencode_minus, rmsk_shm)
 
     # Annotate GTF
-    annotation_output = output_dir / "transcripts_annotated.tsv"
-    annotation_df = annotator.annotate_gtf(gtf_file, annotation_output)
+    annotation_output = output_dir / f"transcripts_annotated.{table_format}"
+    annotation_df = compact_dtypes(annotator.annotate_gtf(gtf_file, annotation_output))
 
     # Summary statistics
     n_transcripts = len(annotation_df)
-    n_with_te = annotation_df['n_te_overlaps'].gt(0).sum()
-    n_te_promoter = annotation_df['has_te_promoter'].sum()
+    n_with_te = int(np.count_nonzero(annotation_df['n_te_overlaps'].to_numpy()))
+    n_te_promoter = int(np.count_nonzero(annotation_df['has_te_promoter'].to_numpy()))
 
     logger.info(f"  Total transcripts: {n_transcripts:,}")
     logger.info(f"  Transcripts with TE overlaps: {n_with_te:,} ({n_with_te/n_transcripts*100:.1f}%)")
@@ -106,28 +160,41 @@ def ambrosia_workflow(
         output_prefix=str(output_dir / "expression"),
         min_mapq=min_mapq,
         stranded=False,
+        bam_threads=bam_threads,
+        per_chrom_threads=per_chrom_threads,
     )
 
+    # Results stay in an Arrow table through the fraction, gene aggregation
+    # and writes; pandas is only needed for the merge
     with ExpressionQuantifier(quant_config) as quantifier:
         # Quantify all transcripts
-        transcript_df = quantifier.quantify_all()
+        transcript_table = quantifier.quantify_table()
 
         # Calculate transcript fractions
-        transcript_df = quantifier.calculate_transcript_fraction(transcript_df)
+        transcript_table = compact_dtypes(
+            quantifier.calculate_transcript_fraction(transcript_table)
+        )
 
         # Save transcript-level results
-        transcript_output = output_dir / "transcript_expression.tsv"
-        quantifier.save_results(transcript_df, transcript_output)
+        transcript_output = output_dir / f"transcript_expression.{table_format}"
+        quantifier.save_results(transcript_table, transcript_output)
 
         # Calculate gene-level expression
-        gene_df = quantifier.calculate_gene_expression(transcript_df)
-        gene_output = output_dir / "gene_expression.tsv"
-        quantifier.save_results(gene_df, gene_output)
-
-    # Summary statistics
-    n_expressed = transcript_df['count'].gt(0).sum()
-    total_reads = transcript_df['count'].sum()
-    median_tpm = transcript_df[transcript_df['tpm'] > 0]['tpm'].median()
+        gene_output = None
+        if compute_gene_level:
+            gene_table = compact_dtypes(
+                quantifier.calculate_gene_expression(transcript_table)
+            )
+            gene_output = output_dir / f"gene_expression.{table_format}"
+            quantifier.save_results(gene_table, gene_output)
+
+    # Summary statistics (one pass over the count/tpm arrays, no filtered copies)
+    counts = transcript_table['count'].to_numpy()
+    tpm = transcript_table['tpm'].to_numpy()
+    n_expressed = int(np.count_nonzero(counts))
+    total_reads = int(counts.sum())
+    expressed_tpm = tpm[tpm > 0]
+    median_tpm = float(np.median(expressed_tpm)) if expressed_tpm.size else 0.0
 
     logger.info(f"  Expressed transcripts: {n_expressed:,} ({n_expressed/n_transcripts*100:.1f}%)")
     logger.info(f"  Total reads counted: {total_reads:,}")
@@ -138,24 +205,32 @@ def ambrosia_workflow(
     # =========================================================================
     logger.info("\n[Step 3/4] Merging annotation and expression data...")
 
-    import pandas as pd
-
-    # Merge on transcript_id
-    merged_df = annotation_df.merge(
-        transcript_df,
-        on='transcript_id',
-        how='inner'
+    # Keep only TE-promoter transcripts before merging so the join builds
+    # on the small side; the dtype still covers every annotated transcript
+    tid_dtype = transcript_id_dtype(annotation_df)
+    te_annotation_df = annotation_df.loc[annotation_df['has_te_promoter']]
+
+    # Merge on transcript_id (factorized to shared integer codes, 1:1)
+    te_promoter_df = merge_annotation_expression(
+        te_annotation_df,
+        transcript_table.to_pandas(),
+        tid_dtype,
+        n_threads=per_chrom_threads,
     )
 
-    # Filter for TE-promoter transcripts
-    te_promoter_df = merged_df[merged_df['has_te_promoter']]
-
     # Save merged results
-    merged_output = output_dir / "te_promoter_transcripts.tsv"
-    te_promoter_df.to_csv(merged_output, sep='\t', index=False)
+    merged_output = output_dir / f"te_promoter_transcripts.{table_format}"
+    write_table(te_promoter_df, merged_output)
+
+    te_counts = te_promoter_df['count'].to_numpy()
+    te_tpm = te_promoter_df['tpm'].to_numpy()
+    te_fraction = te_promoter_df['tpm_fraction'].to_numpy()
+    te_expressed = int(np.count_nonzero(te_counts))
+    te_mean_tpm = float(te_tpm.mean()) if te_tpm.size else float('nan')
+    te_median_fraction = float(np.median(te_fraction)) if te_fraction.size else float('nan')
 
     logger.info(f"  TE-promoter transcripts: {len(te_promoter_df):,}")
-    logger.info(f"  Expressed TE-promoter transcripts: {te_promoter_df['count'].gt(0).sum():,}")
+    logger.info(f"  Expressed TE-promoter transcripts: {te_expressed:,}")
 
     # =========================================================================
     # Step 4: Generate summary report
@@ -171,42 +246,42 @@ def ambrosia_workflow(
         'total_transcripts': n_transcripts,
         'transcripts_with_te': n_with_te,
         'transcripts_with_te_promoter': n_te_promoter,
-        'te_promoter_percentage': f"{n_te_promoter/n_transcripts*100:.2f}%",
+        'te_promoter_percentage': n_te_promoter / n_transcripts * 100 if n_transcripts else 0.0,
 
         # Expression statistics
         'expressed_transcripts': n_expressed,
         'total_reads': total_reads,
-        'median_tpm': f"{median_tpm:.2f}",
+        'median_tpm': median_tpm,
 
         # TE-promoter statistics
-        'te_promoter_expressed': te_promoter_df['count'].gt(0).sum(),
-        'te_promoter_mean_tpm': f"{te_promoter_df['tpm'].mean():.2f}",
-        'te_promoter_median_fraction': f"{te_promoter_df['tpm_fraction'].median():.3f}",
+        'te_promoter_expressed': te_expressed,
+        'te_promoter_mean_tpm': te_mean_tpm,
+        'te_promoter_median_fraction': te_median_fraction,
 
         # Output files
         'annotation_file': str(annotation_output),
         'transcript_expression_file': str(transcript_output),
-        'gene_expression_file': str(gene_output),
+        'gene_expression_file': str(gene_output) if gene_output else None,
         'te_promoter_file': str(merged_output),
     }
 
     # Save summary as JSON
-    import json
     summary_output = output_dir / "summary.json"
-    with open(summary_output, 'w') as f:
-        json.dump(summary, f, indent=2)
+    write_json(summary, summary_output)
 
     # Print summary
     logger.info("\n" + "=" * 80)
     logger.info("SUMMARY")
     logger.info("=" * 80)
     for key, value in summary.items():
-        if not key.endswith('_file'):
+        if isinstance(value, float):
+            logger.info(f"  {key}: {value:.2f}")
+        elif not key.endswith('_file'):
             logger.info(f"  {key}: {value}")
 
     logger.info("\nOutput files:")
     for key, value in summary.items():
-        if key.endswith('_file'):
+        if key.endswith('_file') and value:
             logger.info(f"  - {value}")
 
     logger.info("\n" + "=" * 80)
@@ -216,6 +291,23 @@ def ambrosia_workflow(
     return summary
 
 
+def _workflow_star(kwargs: dict) -> tuple[str, Optional[dict], Optional[str]]:
+    """
+    Pool adapter: run ambrosia_workflow from a single kwargs dict.
+
+    Exceptions are returned instead of raised so one failing sample does
+    not abort the imap_unordered iteration.
+
+    Returns:
+        (sample name, summary or None, error message or None)
+    """
+    sample_name = kwargs["gtf_file"].stem
+    try:
+        return sample_name, ambrosia_workflow(**kwargs), None
+    except Exception as e:
+        return sample_name, None, str(e)
+
+
 def batch_ambrosia_workflow(
     # Input directories
     gtf_dir: Path,
@@ -228,6 +320,7 @@ def batch_ambrosia_workflow(
     output_dir: Path,
     # Parameters
     parallel_workers: int = 4,
+    table_format: str = "parquet",
 ) -> list[dict]:
     """
     Batch process multiple Ambrosia samples.
@@ -240,11 +333,18 @@ def batch_ambrosia_workflow(
         gencode_minus: Gencode dictionary for - strand
         output_dir: Output directory
         parallel_workers: Number of parallel workers
+        table_format: Format of the per-sample tables ("parquet", "tsv" or
+            "tsv.zst")
 
     Returns:
-        List of summary dictionaries for each sample
+        List of summary dictionaries for each sample (read back from
+        batch_summary.parquet, which is written as samples complete)
     """
-    from concurrent.futures import ProcessPoolExecutor, as_completed
+    import multiprocessing as mp
+    import os
+
+    from teprof2.annotation.rmsk_cache import RmskArrays
+    from teprof2.core.table_io import ParquetRecordWriter
 
     logger.info("=" * 80)
     logger.info("TEProf2 v2.0 - Batch Processing")
@@ -265,72 +365,94 @@ def batch_ambrosia_workflow(
 
     logger.info(f"Processing {len(samples)} samples with {parallel_workers} workers\n")
 
-    # Process samples in parallel
-    results = []
-
-    if parallel_workers == 1:
-        # Sequential processing
-        for i, (gtf_file, bam_file) in enumerate(samples, 1):
-            logger.info(f"[{i}/{len(samples)}] Processing {gtf_file.stem}...")
-            sample_output = output_dir / gtf_file.stem
-
-            try:
-                summary = ambrosia_workflow(
-                    gtf_file=gtf_file,
-                    bam_file=bam_file,
-                    rmsk_bed=rmsk_bed,
-                    gencode_plus=gencode_plus,
-                    gencode_minus=gencode_minus,
-                    output_dir=sample_output,
-                )
-                results.append(summary)
-            except Exception as e:
-                logger.error(f"Error processing {gtf_file.stem}: {e}")
-
-    else:
-        # Parallel processing
-        with ProcessPoolExecutor(max_workers=parallel_workers) as executor:
-            futures = {}
-
-            for gtf_file, bam_file in samples:
+    # Split the CPUs between samples: each worker gets its share of
+    # htslib decompression threads. Sequential runs also quantify
+    # contigs in parallel within the sample.
+    n_cpus = os.cpu_count() or 1
+    per_chrom_threads = min(4, n_cpus) if parallel_workers == 1 else 1
+    bam_threads = max(1, n_cpus // (parallel_workers * per_chrom_threads))
+
+    # Load RepeatMasker once and share it with every sample
+    rmsk = RmskArrays.from_bed(rmsk_bed)
+
+    # Stream each sample summary to disk as it completes
+    output_dir.mkdir(parents=True, exist_ok=True)
+    summary_output = output_dir / "batch_summary.parquet"
+
+    with rmsk.shared() as rmsk_shm, ParquetRecordWriter(summary_output) as summary_writer:
+        if parallel_workers == 1:
+            # Sequential processing
+            for i, (gtf_file, bam_file) in enumerate(samples, 1):
+                logger.info(f"[{i}/{len(samples)}] Processing {gtf_file.stem}...")
                 sample_output = output_dir / gtf_file.stem
-                future = executor.submit(
-                    ambrosia_workflow,
-                    gtf_file=gtf_file,
-                    bam_file=bam_file,
-                    rmsk_bed=rmsk_bed,
-                    gencode_plus=gencode_plus,
-                    gencode_minus=gencode_minus,
-                    output_dir=sample_output,
-                )
-                futures[future] = gtf_file.stem
-
-            # Collect results
-            for future in as_completed(futures):
-                sample_name = futures[future]
+
                 try:
-                    summary = future.result()
-                    results.append(summary)
-                    logger.info(f"✓ Completed {sample_name}")
+                    summary = ambrosia_workflow(
+                        gtf_file=gtf_file,
+                        bam_file=bam_file,
+                        rmsk_bed=rmsk_bed,
+                        gencode_plus=gencode_plus,
+                        gencode_minus=gencode_minus,
+                        output_dir=sample_output,
+                        rmsk_shm=rmsk_shm,
+                        bam_threads=bam_threads,
+                        per_chrom_threads=per_chrom_threads,
+                        table_format=table_format,
+                    )
+                    summary_writer.write(summary)
                 except Exception as e:
-                    logger.error(f"✗ Error processing {sample_name}: {e}")
+                    logger.error(f"Error processing {gtf_file.stem}: {e}")
+
+        else:
+            # Parallel processing (fork where available so workers inherit
+            # the already-imported modules instead of re-importing them)
+            mp_context = mp.get_context(
+                "fork" if "fork" in mp.get_all_start_methods() else None
+            )
+            task_args = (
+                {
+                    "gtf_file": gtf_file,
+                    "bam_file": bam_file,
+                    "rmsk_bed": rmsk_bed,
+                    "gencode_plus": gencode_plus,
+                    "gencode_minus": gencode_minus,
+                    "output_dir": output_dir / gtf_file.stem,
+                    "rmsk_shm": rmsk_shm,
+                    "bam_threads": bam_threads,
+                    "table_format": table_format,
+                }
+                for gtf_file, bam_file in samples
+            )
+
+            # imap_unordered pickles tasks lazily from a feeder thread and
+            # yields results as they complete
+            with mp_context.Pool(processes=parallel_workers) as pool:
+                for sample_name, summary, error in pool.imap_unordered(
+                    _workflow_star, task_args, chunksize=1
+                ):
+                    if summary is not None:
+                        summary_writer.write(summary)
+                        logger.info(f"✓ Completed {sample_name}")
+                    else:
+                        logger.error(f"✗ Error processing {sample_name}: {error}")
+
+    # Sequential runs cached annotators attached to the now-unlinked block
+    _ANNOTATOR_CACHE.clear()
 
     # Generate batch summary
     logger.info("\n" + "=" * 80)
     logger.info("BATCH SUMMARY")
     logger.info("=" * 80)
-    logger.info(f"Total samples processed: {len(results)}/{len(samples)}")
+    logger.info(f"Total samples processed: {summary_writer.n_records}/{len(samples)}")
+
+    if not summary_writer.n_records:
+        return []
 
-    if results:
-        import pandas as pd
+    import pyarrow.parquet as pq
 
-        # Create summary table
-        summary_df = pd.DataFrame(results)
-        summary_output = output_dir / "batch_summary.tsv"
-        summary_df.to_csv(summary_output, sep='\t', index=False)
-        logger.info(f"Batch summary saved to: {summary_output}")
+    logger.info(f"Batch summary saved to: {summary_output}")
 
-    return results
+    return pq.read_table(summary_output).to_pylist()
 
 
 if __name__ == "__main__":
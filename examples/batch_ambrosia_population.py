@@ -6,7 +6,7 @@
 - BAM文件为个体水平
 - GTF文件为种群水平（所有个体共享同一个GTF）
 - 支持CSV配置文件指定个体-组别映射
-- 并行处理多个个体
+- 并行处理多个个体（每个个体一个进程，BLAS/OpenMP线程固定为1）
 
 使用方法:
     python batch_ambrosia_population.py \\
@@ -22,19 +22,35 @@
 
 from __future__ import annotations
 
-import csv
 import json
 import logging
+import multiprocessing as mp
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from concurrent.futures import ProcessPoolExecutor, as_completed
 from typing import Optional
 import sys
 
-import pandas as pd
-import typer
-from rich.console import Console
-from rich.logging import RichHandler
-from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn
+# 并行模型：每个样本一个进程，进程内线程数由 --per-chrom-threads/--bam-threads 显式分配。
+# 在导入numpy之前把BLAS/OpenMP线程池固定为1，避免 workers × CPU核心数 个线程争抢CPU
+# （已在环境中设置的值保留）
+for _var in (
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "OMP_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "BLIS_NUM_THREADS",
+):
+    os.environ.setdefault(_var, "1")
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import pyarrow as pa  # noqa: E402
+import pyarrow.parquet as pq  # noqa: E402
+import typer  # noqa: E402
+from rich.console import Console  # noqa: E402
+from rich.logging import RichHandler  # noqa: E402
+from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn  # noqa: E402
 
 # 配置rich console
 console = Console()
@@ -48,16 +64,211 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 种群注释：顺序处理时由主进程设置；并行的worker中为None，按需从Parquet读取
+_SHARED_ANNOTATION: Optional[pd.DataFrame] = None
+
+# 种群GTF转录本：顺序处理时由主进程设置，并行时由_init_worker读取主进程写好的
+# .transcripts.parquet 缓存，每个个体不必重新解析GTF
+_SHARED_TRANSCRIPTS: Optional[pd.DataFrame] = None
+
+# 个体摘要的列结构（process_single_individual成功时返回的字典）
+SUMMARY_SCHEMA = pa.schema([
+    ('individual_id', pa.string()),
+    ('bam_file', pa.string()),
+    ('gtf_file', pa.string()),
+    ('total_transcripts', pa.int64()),
+    ('transcripts_with_te', pa.int64()),
+    ('transcripts_with_te_promoter', pa.int64()),
+    ('te_promoter_percentage', pa.float64()),
+    ('expressed_transcripts', pa.int64()),
+    ('total_reads', pa.int64()),
+    ('median_tpm', pa.float64()),
+    ('te_promoter_expressed', pa.int64()),
+    ('te_promoter_mean_tpm', pa.float64()),
+    ('status', pa.string()),
+])
+
+
+# forkserver服务进程预先导入的模块：worker从服务进程fork出来，直接继承这些已导入的模块，
+# 回收后新启动的worker不必重新导入。'__main__' 即本脚本（及其顶层导入的numpy/pandas等）
+_WORKER_PRELOAD = [
+    "__main__",
+    "pysam",
+    "teprof2.core.table_io",
+    "teprof2.quantification.merge",
+    "teprof2.quantification.tpm_calculator",
+]
+
+
+def _pool_context() -> mp.context.BaseContext:
+    """
+    worker的启动方式：优先forkserver
 
-def process_single_individual(
-    individual_id: str,
-    bam_file: Path,
+    并行时主进程运行着Rich进度条的刷新线程。worker每处理一个个体就被替换，
+    直接fork的话，新worker可能在刷新线程持有console/logging锁时被fork出来而死锁；
+    forkserver从单线程的服务进程fork出worker，服务进程预先导入_WORKER_PRELOAD。
+    不支持时（Windows）使用默认的spawn。
+    """
+    if "forkserver" in mp.get_all_start_methods():
+        ctx = mp.get_context("forkserver")
+        ctx.set_forkserver_preload(_WORKER_PRELOAD)
+        return ctx
+    return mp.get_context()
+
+
+def _init_worker(gtf_file: Path) -> None:
+    """
+    worker初始化：读取主进程写好的GTF转录本缓存
+
+    worker处理一个个体后即退出，因此每个个体读取一次该Parquet文件。
+    种群注释不在这里读取：摘要只需其中两列，合并由merge_te_promoter_parquet
+    按需从Parquet读取（见process_single_individual）。
+    """
+    global _SHARED_TRANSCRIPTS
+    from teprof2.quantification.tpm_calculator import load_gtf_transcripts
+
+    _SHARED_TRANSCRIPTS = load_gtf_transcripts(gtf_file, cache=True)
+
+
+def _resolve_bam(sample_id: str, bam_dir: Path, bam_suffix: str) -> Path:
+    """
+    根据sample_id构建BAM文件路径
+
+    sample_id已以.bam结尾时直接使用，否则追加bam_suffix
+    （如sample_id为xxx_Aligned.sortedByCoord.out时追加.bam）
+    """
+    if sample_id.endswith('.bam'):
+        return bam_dir / sample_id
+    return bam_dir / f"{sample_id}{bam_suffix}"
+
+
+def _bam_index(bam_file: Path) -> Path:
+    """BAM索引路径（<bam>.bai）"""
+    return bam_file.parent / (bam_file.name + '.bai')
+
+
+def _te_promoter_dataset(output_dir: Path) -> Path:
+    """
+    所有个体TE-promoter转录本的分区Parquet数据集根目录
+
+    读取: pyarrow.dataset.dataset(path, partitioning="hive") 或
+    pd.read_parquet(path, filters=[("individual_id", "in", [...])])
+    """
+    return output_dir / "te_promoter_transcripts"
+
+
+def _te_promoter_partition(output_dir: Path, individual_id: str) -> Path:
+    """单个个体在TE-promoter数据集中的文件（individual_id=<ID>/<ID>.parquet）"""
+    return (
+        _te_promoter_dataset(output_dir)
+        / f"individual_id={individual_id}"
+        / f"{individual_id}.parquet"
+    )
+
+
+def _load_completed_summary(summary_path: Path) -> Optional[dict]:
+    """
+    读取已完成个体的摘要（断点续跑用）
+
+    摘要JSON在个体的所有输出写完后才生成，因此它的存在即表示该个体已完成。
+    文件不存在、不完整或记录的是失败状态时返回None。
+    """
+    try:
+        summary = json.loads(summary_path.read_bytes())
+    except (OSError, ValueError):
+        return None
+    return summary if summary.get('status') == 'success' else None
+
+
+def _process_star(kwargs: dict) -> dict:
+    """
+    进程池适配器：展开参数调用process_single_individual
+
+    任何异常都转为失败摘要返回，避免中断imap_unordered的结果迭代。
+    """
+    try:
+        return process_single_individual(**kwargs)
+    except Exception as e:
+        return {
+            'individual_id': kwargs['individual_id'],
+            'status': 'failed',
+            'error': str(e),
+        }
+
+
+def annotate_population_gtf(
     gtf_file: Path,
     rmsk_bed: Path,
     gencode_plus: Optional[Path],
     gencode_minus: Optional[Path],
+    annotation_path: Path,
+    reuse: bool = True,
+) -> pd.DataFrame:
+    """
+    对种群水平的GTF只注释一次，结果保存为Parquet供所有个体共享
+
+    同一组别的所有个体共享同一个GTF，注释结果与个体无关，
+    因此在主进程中完成一次即可，worker只需读取Parquet。
+
+    Args:
+        gtf_file: GTF文件路径（种群水平）
+        rmsk_bed: RepeatMasker BED文件
+        gencode_plus: Gencode字典（+链）
+        gencode_minus: Gencode字典（-链）
+        annotation_path: 共享注释Parquet文件路径
+        reuse: 若Parquet已存在且比GTF新，则直接复用
+
+    Returns:
+        注释结果DataFrame
+    """
+    from teprof2.annotation.rmsk_cache import RmskArrays
+    from teprof2.annotation.te_annotator import AnnotationConfig, TEAnnotator
+    from teprof2.core.table_io import compact_dtypes, write_table
+    from teprof2.quantification.merge import transcript_id_dtype
+
+    if (
+        reuse
+        and annotation_path.exists()
+        and annotation_path.stat().st_mtime >= gtf_file.stat().st_mtime
+    ):
+        logger.info(f"复用已有的注释结果: {annotation_path}")
+        return pd.read_parquet(annotation_path, memory_map=True)
+
+    # RepeatMasker载入NumPy数组，注释器在其上建立分块索引（缓存为rmsk_bed旁的.tiles.npz）
+    annotation_config = AnnotationConfig(
+        rmsk_bed=rmsk_bed,
+        gencode_plus_dict=gencode_plus,
+        gencode_minus_dict=gencode_minus,
+        rmsk_arrays=RmskArrays.from_bed(rmsk_bed),
+        validate_inputs=True,
+    )
+
+    annotator = TEAnnotator(annotation_config)
+    annotation_df = annotator.annotate_gtf(gtf_file)
+
+    # transcript_id转为categorical，Parquet会保存字典映射，worker读取后直接复用
+    annotation_df['transcript_id'] = annotation_df['transcript_id'].astype(
+        transcript_id_dtype(annotation_df)
+    )
+    # 其余列压缩为窄类型（bool / uint / float32），减少每个样本读取和合并的字节数
+    annotation_df = compact_dtypes(annotation_df)
+    write_table(annotation_df, annotation_path)
+    logger.info(f"注释结果已保存: {annotation_path}")
+
+    return annotation_df
+
+
+def process_single_individual(
+    individual_id: str,
+    bam_file: Path,
+    gtf_file: Path,
+    annotation_path: Path,
     output_dir: Path,
     min_mapq: int = 255,
+    bam_threads: int = 1,
+    per_chrom_threads: int = 1,
+    compute_gene_level: bool = False,
+    table_format: str = "parquet",
     quiet: bool = False,
 ) -> dict:
     """
@@ -67,17 +278,21 @@ def process_single_individual(
         individual_id: 个体ID
         bam_file: BAM文件路径
         gtf_file: GTF文件路径（种群水平）
-        rmsk_bed: RepeatMasker BED文件
-        gencode_plus: Gencode字典（+链）
-        gencode_minus: Gencode字典（-链）
+        annotation_path: 共享注释Parquet文件（由annotate_population_gtf生成）
         output_dir: 输出目录
         min_mapq: 最小mapping quality
+        bam_threads: 每个样本的htslib BAM解压线程数
+        per_chrom_threads: 样本内按染色体并行定量（及合并）的线程数
+        compute_gene_level: 是否计算并保存基因水平表达（后续步骤和摘要都不使用）
+        table_format: 表达表格式，"parquet"（带类型、zstd压缩，重新读取快）、
+            "tsv" 或 "tsv.zst"（zstd压缩的TSV，写慢速存储时更快）
         quiet: 是否禁用详细日志输出
 
     Returns:
         包含统计信息的字典
     """
-    from teprof2.annotation.te_annotator import AnnotationConfig, TEAnnotator
+    from teprof2.core.table_io import compact_dtypes, write_json
+    from teprof2.quantification.merge import duckdb, merge_te_promoter_parquet
     from teprof2.quantification.tpm_calculator import (
         ExpressionQuantifier,
         QuantificationConfig,
@@ -102,30 +317,37 @@ def process_single_individual(
     indiv_output = output_dir / individual_id
     indiv_output.mkdir(parents=True, exist_ok=True)
 
+    # TE-promoter转录本写入按individual_id分区的Parquet数据集（hive风格目录），
+    # 所有个体合起来是一个可直接查询的数据集
+    merged_output = _te_promoter_partition(output_dir, individual_id)
+
     # 即使在quiet模式下也输出开始信息
     print(f"[{individual_id}] 开始处理...", flush=True)
 
     try:
         # =====================================================================
-        # Step 1: 注释转录本（使用种群水平的GTF）
+        # Step 1: 读取共享的种群GTF注释（主进程已注释一次）
         # =====================================================================
         if not quiet:
-            logger.info(f"[{individual_id}] Step 1/3: 注释转录本...")
-
-        annotation_config = AnnotationConfig(
-            rmsk_bed=rmsk_bed,
-            gencode_plus_dict=gencode_plus,
-            gencode_minus_dict=gencode_minus,
-            validate_inputs=True,
-        )
-
-        annotator = TEAnnotator(annotation_config)
-        annotation_output = indiv_output / f"{individual_id}_annotated.tsv"
-        annotation_df = annotator.annotate_gtf(gtf_file, annotation_output)
+            logger.info(f"[{individual_id}] Step 1/3: 读取共享注释...")
+
+        # 并行worker中没有预先加载的注释：DuckDB合并时直接扫描Parquet，这里只读
+        # 摘要需要的两列；pandas回退合并需要完整注释，读一次、摘要和合并共用
+        full_annotation = _SHARED_ANNOTATION
+        if full_annotation is None and duckdb is None:
+            full_annotation = pd.read_parquet(annotation_path, memory_map=True)
+        if full_annotation is not None:
+            annotation_df = full_annotation
+        else:
+            annotation_df = pd.read_parquet(
+                annotation_path,
+                columns=['n_te_overlaps', 'has_te_promoter'],
+                memory_map=True,
+            )
 
         n_transcripts = len(annotation_df)
-        n_with_te = annotation_df['n_te_overlaps'].gt(0).sum()
-        n_te_promoter = annotation_df['has_te_promoter'].sum()
+        n_with_te = np.count_nonzero(annotation_df['n_te_overlaps'].to_numpy())
+        n_te_promoter = np.count_nonzero(annotation_df['has_te_promoter'].to_numpy())
 
         # =====================================================================
         # Step 2: 定量表达（使用个体水平的BAM）
@@ -139,27 +361,40 @@ def process_single_individual(
             output_prefix=str(indiv_output / f"{individual_id}_expression"),
             min_mapq=min_mapq,
             stranded=False,
+            bam_threads=bam_threads,
+            per_chrom_threads=per_chrom_threads,
+            transcripts=_SHARED_TRANSCRIPTS,  # None时自行解析GTF
         )
 
+        # 定量结果全程保持为Arrow表（比例、基因汇总、写文件都在Arrow中完成），
+        # 只在合并前转换一次pandas
         with ExpressionQuantifier(quant_config) as quantifier:
             # 定量所有转录本
-            transcript_df = quantifier.quantify_all()
+            transcript_table = quantifier.quantify_table()
 
-            # 计算转录本比例
-            transcript_df = quantifier.calculate_transcript_fraction(transcript_df)
+            # 计算转录本比例，并压缩为窄类型
+            transcript_table = quantifier.calculate_transcript_fraction(transcript_table)
+            transcript_table = compact_dtypes(transcript_table)
 
             # 保存转录本水平结果
-            transcript_output = indiv_output / f"{individual_id}_transcript_expression.tsv"
-            quantifier.save_results(transcript_df, transcript_output)
+            transcript_output = indiv_output / f"{individual_id}_transcript_expression.{table_format}"
+            quantifier.save_results(transcript_table, transcript_output)
 
-            # 计算基因水平表达
-            gene_df = quantifier.calculate_gene_expression(transcript_df)
-            gene_output = indiv_output / f"{individual_id}_gene_expression.tsv"
-            quantifier.save_results(gene_df, gene_output)
+            # 计算基因水平表达（可选）
+            if compute_gene_level:
+                gene_table = compact_dtypes(
+                    quantifier.calculate_gene_expression(transcript_table)
+                )
+                gene_output = indiv_output / f"{individual_id}_gene_expression.{table_format}"
+                quantifier.save_results(gene_table, gene_output)
 
-        n_expressed = transcript_df['count'].gt(0).sum()
-        total_reads = transcript_df['count'].sum()
-        median_tpm = transcript_df[transcript_df['tpm'] > 0]['tpm'].median() if (transcript_df['tpm'] > 0).any() else 0
+        # 一次遍历count/tpm数组得到所有统计量，避免布尔索引产生副本
+        counts = transcript_table['count'].to_numpy()
+        tpm = transcript_table['tpm'].to_numpy()
+        n_expressed = np.count_nonzero(counts)
+        total_reads = counts.sum()
+        expressed_tpm = tpm[tpm > 0]
+        median_tpm = np.median(expressed_tpm) if expressed_tpm.size else 0
 
         # =====================================================================
         # Step 3: 合并注释和表达数据
@@ -167,18 +402,21 @@ def process_single_individual(
         if not quiet:
             logger.info(f"[{individual_id}] Step 3/3: 合并数据...")
 
-        merged_df = annotation_df.merge(
-            transcript_df,
-            on='transcript_id',
-            how='inner'
+        # 合并 + TE-promoter筛选 + 写Parquet：安装DuckDB时为一条SQL查询，
+        # 否则回退到pandas（按共享categorical编码合并）
+        merged_output.parent.mkdir(parents=True, exist_ok=True)
+        merge_te_promoter_parquet(
+            annotation_path,
+            transcript_table,
+            merged_output,
+            n_threads=per_chrom_threads,
+            annotation_df=full_annotation,
         )
 
-        # 筛选TE-promoter转录本
-        te_promoter_df = merged_df[merged_df['has_te_promoter']]
-
-        # 保存合并结果
-        merged_output = indiv_output / f"{individual_id}_te_promoter_transcripts.tsv"
-        te_promoter_df.to_csv(merged_output, sep='\t', index=False)
+        # 摘要只需count/tpm两列
+        te_stats = pq.read_table(merged_output, columns=['count', 'tpm'])
+        te_counts = te_stats['count'].to_numpy()
+        te_tpm = te_stats['tpm'].to_numpy()
 
         # =====================================================================
         # 生成摘要
@@ -194,15 +432,14 @@ def process_single_individual(
             'expressed_transcripts': int(n_expressed),
             'total_reads': int(total_reads),
             'median_tpm': float(median_tpm),
-            'te_promoter_expressed': int(te_promoter_df['count'].gt(0).sum()),
-            'te_promoter_mean_tpm': float(te_promoter_df['tpm'].mean()) if len(te_promoter_df) > 0 else 0,
+            'te_promoter_expressed': int(np.count_nonzero(te_counts)),
+            'te_promoter_mean_tpm': float(te_tpm.mean()) if te_tpm.size else 0,
             'status': 'success',
         }
 
         # 保存个体摘要
         summary_output = indiv_output / f"{individual_id}_summary.json"
-        with open(summary_output, 'w') as f:
-            json.dump(summary, f, indent=2)
+        write_json(summary, summary_output)
 
         # 即使在quiet模式下也输出完成信息
         print(f"[{individual_id}] ✓ 完成！", flush=True)
@@ -217,6 +454,9 @@ def process_single_individual(
 
         if not quiet:
             logger.error(f"[{individual_id}] ✗ 错误: {e}")
+
+        # 失败个体不留在数据集中
+        merged_output.unlink(missing_ok=True)
         return {
             'individual_id': individual_id,
             'status': 'failed',
@@ -237,7 +477,13 @@ def main(
     output_dir: Path = typer.Option("./results", "--output-dir", "-o", help="输出目录"),
     min_mapq: int = typer.Option(255, "--min-mapq", help="最小mapping quality"),
     workers: int = typer.Option(1, "--workers", "-j", help="并行worker数量"),
+    bam_threads: Optional[int] = typer.Option(None, "--bam-threads", help="每个样本的BAM解压线程数（默认: CPU核心数 // (workers × 染色体线程数)）"),
+    per_chrom_threads: Optional[int] = typer.Option(None, "--per-chrom-threads", help="样本内按染色体并行定量的线程数（默认: workers=1时为 min(4, CPU核心数)，否则为1）"),
     bam_suffix: str = typer.Option(".bam", "--bam-suffix", help="BAM文件后缀（例如：.bam 或 _Aligned.sortedByCoord.out.bam）"),
+    reuse_annotation: bool = typer.Option(True, "--reuse-annotation/--no-reuse-annotation", help="复用已有的种群注释Parquet（比GTF新时）"),
+    resume: bool = typer.Option(False, "--resume/--no-resume", help="跳过已有 <ID>_summary.json 的个体（断点续跑），其摘要直接计入批量摘要"),
+    gene_level: bool = typer.Option(False, "--gene-level/--no-gene-level", help="同时输出基因水平表达（<ID>_gene_expression.*）"),
+    table_format: str = typer.Option("parquet", "--table-format", help="转录本/基因表达表格式：parquet、tsv 或 tsv.zst"),
     verbose: bool = typer.Option(False, "--verbose", "-v", help="详细输出"),
 ) -> None:
     """
@@ -268,35 +514,47 @@ def main(
     # =========================================================================
     # 1. 读取CSV并筛选目标组别的个体
     # =========================================================================
-    console.print(f"\n[Step 1/4] 读取配置文件: {csv_file}")
+    console.print(f"\n[Step 1/5] 读取配置文件: {csv_file}")
 
     if not csv_file.exists():
         console.print(f"[bold red]错误:[/bold red] CSV文件不存在: {csv_file}")
         raise typer.Exit(1)
 
-    individuals = []
-    with open(csv_file, 'r') as f:
-        reader = csv.DictReader(f)  # 使用DictReader自动读取表头
-        for row in reader:
-            # 跳过空行
-            if not row.get('ID') or not row.get('Group'):
-                continue
+    # 只解析ID/Group两列，存为Arrow字符串；只把空字段视为缺失（ID可能恰好是"NA"之类的字符串）；
+    # 缺少的列按全空处理
+    manifest = (
+        pd.read_csv(
+            csv_file,
+            usecols=lambda column: column in ('ID', 'Group'),
+            dtype="string[pyarrow]",
+            keep_default_na=False,
+            na_values=[""],
+        )
+        .reindex(columns=['ID', 'Group'])
+        .astype("string[pyarrow]")
+        .dropna(subset=['ID', 'Group'])  # 跳过空行
+    )
 
-            # 筛选目标组别
-            if row['Group'].strip() == target_group:
-                sample_id = row['ID'].strip()
-                individuals.append(sample_id)
+    # 筛选目标组别：组别列去空白后转为categorical，比较在整数编码上进行
+    target_group = target_group.strip()
+    groups = manifest['Group'].str.strip().astype('category')
+    individuals = manifest.loc[groups == target_group, 'ID'].str.strip().tolist()
 
     console.print(f"找到 {len(individuals)} 个属于组别 '{target_group}' 的个体")
 
     if not individuals:
         console.print(f"[bold red]错误:[/bold red] 未找到属于组别 '{target_group}' 的个体")
+        console.print(f"可用组别: {', '.join(map(str, groups.cat.categories))}")
         raise typer.Exit(1)
 
     # =========================================================================
     # 2. 验证输入文件
     # =========================================================================
-    console.print(f"\n[Step 2/4] 验证输入文件...")
+    console.print(f"\n[Step 2/5] 验证输入文件...")
+
+    if table_format not in ('parquet', 'tsv', 'tsv.zst'):
+        console.print(f"[bold red]错误:[/bold red] 不支持的表格式: {table_format}（可选 parquet、tsv 或 tsv.zst）")
+        raise typer.Exit(1)
 
     if not gtf_file.exists():
         console.print(f"[bold red]错误:[/bold red] GTF文件不存在: {gtf_file}")
@@ -306,31 +564,48 @@ def main(
         console.print(f"[bold red]错误:[/bold red] RepeatMasker BED文件不存在: {rmsk_bed}")
         raise typer.Exit(1)
 
-    # 检查BAM文件
-    missing_bams = []
-    valid_samples = []
-
-    for sample_id in individuals:
-        # 根据sample_id构建BAM文件名
-        # 如果sample_id已经包含后缀（如_Aligned.sortedByCoord.out），则直接添加.bam
-        # 否则使用指定的bam_suffix
-        if sample_id.endswith(('.bam', '.out')):
-            # sample_id已经包含文件名，可能需要添加.bam
-            if sample_id.endswith('.bam'):
-                bam_file = bam_dir / sample_id
-            else:
-                bam_file = bam_dir / f"{sample_id}{bam_suffix}"
-        else:
-            bam_file = bam_dir / f"{sample_id}{bam_suffix}"
-
-        bam_index = Path(str(bam_file) + ".bai")
-
-        if not bam_file.exists():
-            missing_bams.append(f"{bam_file.name}")
-        elif not bam_index.exists():
-            missing_bams.append(f"{bam_file.name}.bai (索引)")
-        else:
-            valid_samples.append((sample_id, bam_file))
+    # 检查BAM文件：一次列出目录，用文件名集合判断是否存在，
+    # 避免在NFS/Lustre上对每个样本做两次stat
+    try:
+        with os.scandir(bam_dir) as entries:
+            bam_dir_names = {entry.name for entry in entries}
+    except FileNotFoundError:
+        bam_dir_names = set()
+
+    bam_files = [
+        (sample_id, _resolve_bam(sample_id, bam_dir, bam_suffix)) for sample_id in individuals
+    ]
+
+    # 不在bam_dir下的文件（sample_id带子目录）无法查集合，在线程池中并发stat，
+    # 重叠网络文件系统的往返延迟（stat释放GIL）
+    outside = {
+        path
+        for _, bam_file in bam_files
+        for path in (bam_file, _bam_index(bam_file))
+        if path.parent != bam_dir
+    }
+    outside_exists = {}
+    if outside:
+        with ThreadPoolExecutor(max_workers=min(64, len(outside))) as executor:
+            outside_exists = dict(zip(outside, executor.map(Path.exists, outside)))
+
+    def in_bam_dir(path: Path) -> bool:
+        """文件是否存在（bam_dir下的文件查集合，其他位置查并发stat的结果）"""
+        if path.parent == bam_dir:
+            return path.name in bam_dir_names
+        return outside_exists[path]
+
+    # (sample_id, BAM路径, BAM和索引是否都存在)
+    resolved = [
+        (sample_id, bam_file, in_bam_dir(bam_file) and in_bam_dir(_bam_index(bam_file)))
+        for sample_id, bam_file in bam_files
+    ]
+    missing_bams = [
+        f"{bam_file.name}.bai (索引)" if in_bam_dir(bam_file) else bam_file.name
+        for _, bam_file, ok in resolved
+        if not ok
+    ]
+    valid_samples = [(sample_id, bam_file) for sample_id, bam_file, ok in resolved if ok]
 
     if missing_bams:
         console.print(f"[bold yellow]警告:[/bold yellow] 以下文件缺失:")
@@ -349,105 +624,190 @@ def main(
     output_dir.mkdir(parents=True, exist_ok=True)
 
     # =========================================================================
-    # 3. 批量处理个体
+    # 3. 注释种群GTF（只做一次，所有个体共享）
     # =========================================================================
-    console.print(f"\n[Step 3/4] 开始处理 {len(valid_samples)} 个样本（{workers} 个并行worker）...")
-
-    results = []
-
-    if workers == 1:
-        # 顺序处理
-        for i, (indiv_id, bam_file) in enumerate(valid_samples, 1):
-            console.print(f"\n[{i}/{len(valid_samples)}] 处理 {indiv_id}...")
-            summary = process_single_individual(
-                individual_id=indiv_id,
-                bam_file=bam_file,
-                gtf_file=gtf_file,
-                rmsk_bed=rmsk_bed,
-                gencode_plus=gencode_plus,
-                gencode_minus=gencode_minus,
-                output_dir=output_dir,
-                min_mapq=min_mapq,
+    global _SHARED_ANNOTATION, _SHARED_TRANSCRIPTS
+
+    console.print(f"\n[Step 3/5] 注释种群GTF: {gtf_file}")
+
+    annotation_path = output_dir / f"group_{target_group}_annotated.parquet"
+    try:
+        annotation_df = annotate_population_gtf(
+            gtf_file=gtf_file,
+            rmsk_bed=rmsk_bed,
+            gencode_plus=gencode_plus,
+            gencode_minus=gencode_minus,
+            annotation_path=annotation_path,
+            reuse=reuse_annotation,
+        )
+    except Exception as e:
+        console.print(f"[bold red]错误:[/bold red] 注释GTF失败: {e}")
+        raise typer.Exit(1)
+
+    console.print(f"共享注释已保存: {annotation_path}（{len(annotation_df)} 个转录本）")
+
+    from teprof2.quantification.tpm_calculator import load_gtf_transcripts
+
+    # 顺序处理直接使用这两个模块全局变量；定量用的GTF转录本表只解析一次，
+    # 并缓存为GTF旁的 .transcripts.parquet，并行worker和重新运行（如 --resume）时直接读取
+    _SHARED_ANNOTATION = annotation_df
+    _SHARED_TRANSCRIPTS = load_gtf_transcripts(gtf_file, cache=True)
+
+    # =========================================================================
+    # 4. 批量处理个体
+    # =========================================================================
+    # 单worker时在样本内按染色体并行，否则样本间并行已占满CPU
+    n_cpus = os.cpu_count() or 1
+    if per_chrom_threads is None:
+        per_chrom_threads = min(4, n_cpus) if workers == 1 else 1
+    per_chrom_threads = max(1, per_chrom_threads)
+
+    # 分配htslib解压线程，保证 workers * per_chrom_threads * bam_threads <= CPU核心数
+    max_bam_threads = max(1, n_cpus // (workers * per_chrom_threads))
+    if bam_threads is None:
+        bam_threads = max_bam_threads
+    elif bam_threads > max_bam_threads:
+        console.print(
+            f"[bold yellow]警告:[/bold yellow] --bam-threads {bam_threads} × {workers} workers "
+            f"× {per_chrom_threads} 染色体线程 超过CPU核心数 {n_cpus}，已调整为 {max_bam_threads}"
+        )
+        bam_threads = max_bam_threads
+
+    # 断点续跑：已有摘要的个体不再处理
+    completed = []
+    if resume:
+        pending = []
+        for indiv_id, bam_file in valid_samples:
+            summary = _load_completed_summary(
+                output_dir / indiv_id / f"{indiv_id}_summary.json"
             )
-            results.append(summary)
-    else:
-        # 并行处理
-        with ProcessPoolExecutor(max_workers=workers) as executor:
-            futures = {}
-
-            for indiv_id, bam_file in valid_samples:
-                future = executor.submit(
-                    process_single_individual,
+            if summary is None:
+                pending.append((indiv_id, bam_file))
+            else:
+                completed.append(summary)
+        valid_samples = pending
+        console.print(f"跳过 {len(completed)} 个已完成的个体")
+
+    console.print(
+        f"\n[Step 4/5] 开始处理 {len(valid_samples)} 个样本（{workers} 个并行worker，"
+        f"每个 {per_chrom_threads} 个染色体线程 × {bam_threads} 个BAM线程）..."
+    )
+
+    from teprof2.core.table_io import ParquetRecordWriter
+
+    # 成功的个体摘要逐条追加写入Parquet，内存中只保留失败样本
+    summary_output = output_dir / f"group_{target_group}_batch_summary.parquet"
+    summary_writer = ParquetRecordWriter(summary_output, schema=SUMMARY_SCHEMA)
+    failed = []
+
+    def collect(summary: dict) -> None:
+        """成功的摘要追加到Parquet，失败的记录在内存中"""
+        if summary['status'] == 'success':
+            summary_writer.write(summary)
+        else:
+            failed.append(summary)
+
+    with summary_writer:
+        for summary in completed:
+            summary_writer.write(summary)
+
+        if workers == 1:
+            # 顺序处理
+            for i, (indiv_id, bam_file) in enumerate(valid_samples, 1):
+                console.print(f"\n[{i}/{len(valid_samples)}] 处理 {indiv_id}...")
+                summary = process_single_individual(
                     individual_id=indiv_id,
                     bam_file=bam_file,
                     gtf_file=gtf_file,
-                    rmsk_bed=rmsk_bed,
-                    gencode_plus=gencode_plus,
-                    gencode_minus=gencode_minus,
+                    annotation_path=annotation_path,
                     output_dir=output_dir,
                     min_mapq=min_mapq,
+                    bam_threads=bam_threads,
+                    per_chrom_threads=per_chrom_threads,
+                    compute_gene_level=gene_level,
+                    table_format=table_format,
+                )
+                collect(summary)
+        else:
+            # 并行处理：参数由生成器惰性产生，进程池的任务线程在后台逐个序列化提交，
+            # imap_unordered按完成顺序返回结果，提交与结果处理交替进行
+            task_args = (
+                dict(
+                    individual_id=indiv_id,
+                    bam_file=bam_file,
+                    gtf_file=gtf_file,
+                    annotation_path=annotation_path,
+                    output_dir=output_dir,
+                    min_mapq=min_mapq,
+                    bam_threads=bam_threads,
+                    per_chrom_threads=per_chrom_threads,
+                    compute_gene_level=gene_level,
+                    table_format=table_format,
                     quiet=True,  # 并行模式下禁用详细日志
                 )
-                futures[future] = indiv_id
+                for indiv_id, bam_file in valid_samples
+            )
 
-            # 收集结果
-            with Progress(
+            # 每个worker只处理一个个体就退出并被替换：pandas/pysam在glibc arena中
+            # 分配的内存不会归还系统，回收进程是唯一可靠的释放方式。
+            # worker由forkserver启动（见_pool_context），GTF转录本在initializer中读取
+            with _pool_context().Pool(
+                processes=workers,
+                initializer=_init_worker,
+                initargs=(gtf_file,),
+                maxtasksperchild=1,
+            ) as pool, Progress(
                 SpinnerColumn(),
                 TextColumn("[bold blue]{task.description}"),
                 BarColumn(),
                 TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
                 TextColumn("({task.completed}/{task.total})"),
                 console=console,
-                transient=False,
-                refresh_per_second=2,  # 降低刷新频率
+                transient=True,
+                refresh_per_second=4,
             ) as progress:
                 task = progress.add_task(
-                    "处理样本", total=len(futures)
+                    "处理样本", total=len(valid_samples)
                 )
 
-                completed = 0
-                for future in as_completed(futures):
-                    indiv_id = futures[future]
-                    try:
-                        summary = future.result()
-                        results.append(summary)
-                        completed += 1
-
-                        if summary['status'] == 'success':
-                            progress.console.print(f"[green]✓[/green] {indiv_id}")
-                        else:
-                            progress.console.print(f"[red]✗[/red] {indiv_id}: {summary.get('error', 'Unknown error')}")
-                    except Exception as e:
-                        completed += 1
-                        progress.console.print(f"[red]✗[/red] {indiv_id}: {e}")
-                        results.append({
-                            'individual_id': indiv_id,
-                            'status': 'failed',
-                            'error': str(e),
-                        })
-
-                    progress.update(task, advance=1)
+                # 只推进进度条，不逐个打印样本状态（避免每次完成都重绘终端、
+                # 与日志handler争抢锁）；失败样本在Step 5统一列出
+                for summary in pool.imap_unordered(_process_star, task_args, chunksize=1):
+                    collect(summary)
+                    progress.update(
+                        task,
+                        advance=1,
+                        description=f"处理样本（失败 {len(failed)}）" if failed else "处理样本",
+                    )
 
     # =========================================================================
-    # 4. 生成批量摘要
+    # 5. 生成批量摘要
     # =========================================================================
-    console.print(f"\n[Step 4/4] 生成批量摘要...")
+    console.print(f"\n[Step 5/5] 生成批量摘要...")
 
-    successful = [r for r in results if r['status'] == 'success']
-    failed = [r for r in results if r['status'] == 'failed']
+    n_success = summary_writer.n_records
+    n_total = n_success + len(failed)
 
     console.print("\n" + "=" * 80)
     console.print("[bold green]批量处理完成！[/bold green]")
     console.print("=" * 80)
-    console.print(f"成功: {len(successful)}/{len(results)}")
-    console.print(f"失败: {len(failed)}/{len(results)}")
-
-    if successful:
-        # 保存批量摘要
-        summary_df = pd.DataFrame(successful)
-        summary_output = output_dir / f"group_{target_group}_batch_summary.tsv"
-        summary_df.to_csv(summary_output, sep='\t', index=False)
+    console.print(f"成功: {n_success}/{n_total}")
+    console.print(f"失败: {len(failed)}/{n_total}")
+
+    if n_success:
         console.print(f"\n批量摘要已保存: {summary_output}")
+        console.print(f"TE-promoter转录本数据集: {_te_promoter_dataset(output_dir)}")
+
+        # 只读回统计所需的列
+        summary_df = pd.read_parquet(
+            summary_output,
+            columns=[
+                'total_transcripts',
+                'transcripts_with_te_promoter',
+                'te_promoter_percentage',
+                'total_reads',
+            ],
+        )
 
         # 显示统计信息
         console.print("\n[bold]统计摘要:[/bold]")
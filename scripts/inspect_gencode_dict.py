@@ -2,14 +2,175 @@
 """
 检查 Gencode 字典文件的内容和结构
 
+默认只顺序扫描pickle的操作码（pickletools.genops），读到前几个顶层键就停止，
+不把整个字典反序列化进内存；数GB的字典文件也能立即查看。
+需要完整统计（键数量、子键等）时加 --full，会完整加载文件。
+
 用法:
     python scripts/inspect_gencode_dict.py /path/to/genecode_plus.dic
+    python scripts/inspect_gencode_dict.py /path/to/genecode_plus.dic --full
 """
 
 import pickle
+import pickletools
 import sys
 from pathlib import Path
 
+# 修改容器本身、结果仍是同一个对象的操作码
+_MUTATING_OPCODES = {"SETITEM", "SETITEMS", "APPEND", "APPENDS", "ADDITEMS", "BUILD"}
+
+
+class _Placeholder:
+    """栈上对象的占位符：只记录类型名，字符串/数字记录值"""
+
+    __slots__ = ("kind", "value")
+
+    def __init__(self, kind: str, value=None):
+        self.kind = kind
+        self.value = value
+
+    def __str__(self) -> str:
+        return repr(self.value) if self.value is not None else f"<{self.kind}>"
+
+
+_MARK = object()
+
+# 只有这些类型的值会被记录和 memo（GET 再取回时仍能显示），其余对象只留类型名
+_SCALAR_KINDS = ("str", "int", "float", "bytes", "int_or_bool", "bytes_or_str")
+
+
+def preview_pickle(file_path: Path, n_items: int = 5) -> tuple[str, list, int]:
+    """
+    不反序列化，按操作码模拟栈，取顶层容器的前n_items个元素
+
+    顶层字典/列表的元素在其 MARK 帧中一压栈就收集，不必等到 SETITEMS/APPENDS
+    （一批最多1000个元素，键少而值大时一批就是整个文件）；凑够n_items个即停止。
+    栈顶的几个对象可能仍在构建（例如值是元组，后面的子元素还没压栈），
+    所以一个元素要等后面的元素也压栈后才计入。
+
+    Args:
+        file_path: pickle文件
+        n_items: 需要的顶层键（字典）或元素（列表/集合）数量
+
+    Returns:
+        (顶层类型, 元素列表, 已读取的字节数)；字典的元素为 (键, 值) 对
+    """
+    stack: list = []
+    marks: list[int] = []  # 栈中各 MARK 的位置
+    memo: dict = {}
+    n_memo = 0
+    root = None
+    items: list = []  # 已由 SETITEM(S)/APPEND(S) 写入顶层容器的元素
+
+    def as_items(values: list) -> list:
+        if root.kind == "dict":
+            return list(zip(values[0::2], values[1::2], strict=True))
+        return values
+
+    def open_frame() -> int:
+        """顶层容器打开的 MARK 帧（stack[1] 处）中可计入的栈位置数（字典的键值各占一个）"""
+        if root is None or root.kind not in ("dict", "list", "set"):
+            return 0
+        if not marks or marks[0] != 1 or stack[0] is not root:
+            return 0
+        # 嵌套帧的 MARK 占着正在构建的对象的位置
+        top = marks[1] + 1 if len(marks) > 1 else len(stack)
+        # 去掉顶层容器和 MARK；不带 MARK 的操作码（TUPLE3、NEWOBJ_EX）最多把
+        # 栈顶3个对象合成一个，所以最后3个位置都可能仍在构建
+        done = max(top - 2 - 3, 0)
+        return done - done % 2 if root.kind == "dict" else done
+
+    with open(file_path, "rb") as f:
+        for opcode, arg, _ in pickletools.genops(f):
+            name = opcode.name
+            if name == "STOP":
+                break
+            if name == "MARK":
+                marks.append(len(stack))
+                stack.append(_MARK)
+            elif name in ("PUT", "BINPUT", "LONG_BINPUT", "MEMOIZE"):
+                index = n_memo if name == "MEMOIZE" else arg
+                n_memo += 1
+                if stack[-1] is not _MARK and stack[-1].value is not None:
+                    memo[index] = stack[-1]
+            elif name in ("GET", "BINGET", "LONG_BINGET"):
+                stack.append(memo.get(arg, _Placeholder("any")))
+            else:
+                # 按操作码声明的栈效果出栈
+                before = opcode.stack_before
+                popped: list = []
+                if pickletools.markobject in before:
+                    mark = marks.pop()
+                    popped = stack[mark + 1 :]
+                    del stack[mark:]
+                    before = before[: before.index(pickletools.markobject)]
+                n_before = len(before)
+                args = stack[len(stack) - n_before :] if n_before else []
+                if n_before:
+                    del stack[-n_before:]
+
+                if name in _MUTATING_OPCODES:
+                    container = args[0]
+                    if container is root and root.kind in ("dict", "list", "set"):
+                        items.extend(as_items(popped if popped else args[1:]))
+                    stack.append(container)
+                else:
+                    for obj in opcode.stack_after:
+                        kind = obj.name
+                        value = arg if kind in _SCALAR_KINDS else None
+                        new = _Placeholder(kind, value)
+                        if root is None and not stack:
+                            root = new
+                            # 协议0/1的DICT/LIST/TUPLE一次性带出全部元素
+                            if kind in ("dict", "list", "tuple"):
+                                items.extend(as_items(popped))
+                        stack.append(new)
+
+            n_open = open_frame()
+            if n_open and root.kind == "dict":
+                n_found = len(items) + n_open // 2
+            else:
+                n_found = len(items) + n_open
+            if n_found >= n_items:
+                items += as_items(stack[2 : 2 + n_open])
+                break
+        n_bytes = f.tell()
+
+    kind = root.kind if root is not None else "unknown"
+    return kind, items[:n_items], n_bytes
+
+
+def inspect_pickle_lazy(file_path: Path):
+    """惰性检查 pickle 文件（只读文件开头）"""
+    print(f"检查文件: {file_path}")
+    print("=" * 80)
+
+    try:
+        kind, items, n_bytes = preview_pickle(file_path)
+        size = file_path.stat().st_size
+
+        print(f"数据类型: {kind}")
+        print(f"已读取: {n_bytes:,} / {size:,} 字节（键数量等完整统计请使用 --full）")
+
+        if kind == "dict":
+            print(f"\n前{len(items)}个键:")
+            for i, (key, value) in enumerate(items):
+                print(f"  {i+1}. {key}")
+                print(f"     类型: {value.kind}")
+                print()
+        else:
+            print(f"\n前{len(items)}个元素:")
+            for i, item in enumerate(items):
+                print(f"  {i+1}. {item.kind}: {str(item)[:100]}")
+
+        print("\n" + "=" * 80)
+        print("✓ 文件检查完成")
+
+    except Exception as e:
+        print(f"✗ 错误: {e}")
+        import traceback
+        traceback.print_exc()
+
 
 def inspect_pickle_file(file_path: Path):
     """检查 pickle 文件的内容"""
@@ -59,13 +220,17 @@ def inspect_pickle_file(file_path: Path):
 
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("用法: python inspect_gencode_dict.py <pickle_file>")
+    args = [arg for arg in sys.argv[1:] if arg != "--full"]
+    if not args:
+        print("用法: python inspect_gencode_dict.py <pickle_file> [--full]")
         sys.exit(1)
 
-    file_path = Path(sys.argv[1])
+    file_path = Path(args[0])
     if not file_path.exists():
         print(f"错误: 文件不存在: {file_path}")
         sys.exit(1)
 
-    inspect_pickle_file(file_path)
+    if "--full" in sys.argv[1:]:
+        inspect_pickle_file(file_path)
+    else:
+        inspect_pickle_lazy(file_path)
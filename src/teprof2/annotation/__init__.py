@@ -1,5 +1,7 @@
 """TE annotation functionality."""
 
 from teprof2.annotation.te_annotator import TEAnnotator, AnnotationConfig
+from teprof2.annotation.rmsk_cache import RmskArrays, SharedRmsk
+from teprof2.annotation.rmsk_tile_index import RmskTileIndex
 
-__all__ = ["TEAnnotator", "AnnotationConfig"]
+__all__ = ["TEAnnotator", "AnnotationConfig", "RmskArrays", "SharedRmsk", "RmskTileIndex"]
@@ -0,0 +1,471 @@
+"""
+RepeatMasker cache - NumPy struct-of-arrays view of the RMSK BED file.
+
+Loads the bgzipped + tabix RepeatMasker BED once into a handful of
+contiguous arrays (sorted by contig, then start) that can be published
+through ``multiprocessing.shared_memory``. Parallel workers attach to the
+block read-only instead of re-opening the tabix file and rebuilding an
+interval tree per sample.
+
+Key features:
+- Contiguous int32 coordinates, one slice per contig
+- Overlap queries via ``np.searchsorted`` bracketing (no per-query I/O)
+- Picklable handle for passing the shared block to worker processes
+"""
+
+from __future__ import annotations
+
+import io
+import logging
+from collections.abc import Iterable, Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pysam
+
+from ..core.coords import INT32_MAX, INT32_MIN, search_key
+
+logger = logging.getLogger(__name__)
+
+# Strand encoding shared by all arrays ('C' is RepeatMasker's complement)
+STRAND_CODES: dict[str, int] = {".": 0, "+": 1, "-": 2, "C": 2}
+
+# Queries expanded per block in batched overlap searches (bounds the size of
+# the candidate arrays)
+OVERLAP_BATCH = 1 << 16
+
+
+def _expand_ranges(lo: np.ndarray, hi: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Expand half-open ranges ``[lo[k], hi[k])`` into flat positions.
+
+    Returns:
+        (owner, position) arrays: every position of every range, in range
+        order, with the index ``k`` of the range it came from
+    """
+    counts = np.maximum(hi - lo, 0)
+    owner = np.repeat(np.arange(len(counts)), counts)
+    position = np.repeat(lo - (np.cumsum(counts) - counts), counts) + np.arange(counts.sum())
+    return owner, position
+
+
+def _prepare_queries(
+    contigs: list[str],
+    chroms: Sequence[str],
+    starts: np.ndarray,
+    ends: np.ndarray,
+    strands: Optional[Sequence[str]],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Optional[np.ndarray]]:
+    """
+    Encode a batch of query regions for the vectorized overlap searches.
+
+    Queries on contigs without intervals and empty regions cannot overlap
+    anything, so they are dropped here, before any searching.
+
+    Returns:
+        (query_ids, contig, starts, ends, strand_codes): positions of the
+        kept queries in the input, their contig indices, int64 coordinates
+        and strand codes (-1 for unknown strands; None when not filtering)
+    """
+    contig = _encode(chroms, pd.Index(contigs).get_indexer)
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    query_ids = np.flatnonzero((contig >= 0) & (starts < ends))
+
+    codes = None
+    if strands is not None:
+        codes = _encode(strands, _strand_codes)[query_ids]
+    return query_ids, contig[query_ids], starts[query_ids], ends[query_ids], codes
+
+
+def _encode(values: Sequence[str], lookup) -> np.ndarray:
+    """
+    Map strings to int64 codes with ``lookup`` (unknown -> -1).
+
+    Categorical input (e.g. the chrom/strand columns of a GTF read by
+    TEAnnotator) is looked up once per category and expanded through its
+    integer codes instead of hashing every row.
+    """
+    if isinstance(values, pd.Categorical):
+        per_category = lookup(pd.Index(values.categories, dtype=object))
+        # Missing values have code -1, which picks the appended -1
+        return np.append(np.asarray(per_category, dtype=np.int64), -1)[values.codes]
+    return np.asarray(lookup(pd.Index(values, dtype=object)), dtype=np.int64)
+
+
+def _strand_codes(strands: pd.Index) -> np.ndarray:
+    """STRAND_CODES of each strand string (-1 if unknown)."""
+    return strands.map(STRAND_CODES).fillna(-1).to_numpy(np.int64)
+
+
+def _fetch_contigs(rmsk_bed: Path, contigs: set[str]) -> Optional[str]:
+    """
+    Fetch the rows of some contigs through the tabix index.
+
+    Returns:
+        The rows as BED text, or None when the whole file should be read
+        instead (no tabix index, or every indexed contig is wanted)
+    """
+    try:
+        with pysam.TabixFile(str(rmsk_bed)) as tbx:
+            indexed = tbx.contigs
+            wanted = [chrom for chrom in indexed if chrom in contigs]
+            if len(wanted) == len(indexed):
+                return None
+            logger.info(f"Fetching {len(wanted)} of {len(indexed)} contigs via tabix")
+            return "".join(f"{line}\n" for chrom in wanted for line in tbx.fetch(chrom))
+    except (OSError, ValueError):  # no usable tabix index
+        return None
+
+
+@dataclass(frozen=True)
+class SharedRmsk:
+    """
+    Picklable handle describing an RMSK cache published in shared memory.
+
+    Pass this to worker processes and call :meth:`attach` there.
+    """
+
+    shm_name: str
+    contigs: tuple[str, ...]
+    layout: tuple[tuple[str, str, int, int], ...]  # (field, dtype, length, offset)
+
+    def attach(self) -> RmskArrays:
+        """Attach to the shared block read-only (zero-copy)."""
+        try:
+            shm = shared_memory.SharedMemory(name=self.shm_name, track=False)
+        except TypeError:  # Python < 3.13 has no ``track`` argument
+            shm = shared_memory.SharedMemory(name=self.shm_name)
+
+        arrays = {}
+        for name, dtype, length, offset in self.layout:
+            arr = np.ndarray((length,), dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+            arr.flags.writeable = False
+            arrays[name] = arr
+
+        name_blob = arrays.pop("name_blob").tobytes()
+        name_offsets = arrays.pop("name_offsets")
+        names = [
+            name_blob[name_offsets[i] : name_offsets[i + 1]].decode()
+            for i in range(len(name_offsets) - 1)
+        ]
+
+        rmsk = RmskArrays(contigs=list(self.contigs), names=names, **arrays)
+        rmsk._shm = shm  # keep the mapping alive as long as the arrays
+        return rmsk
+
+
+@dataclass
+class RmskArrays:
+    """
+    RepeatMasker intervals as contiguous NumPy arrays.
+
+    Rows are sorted by contig, then start. Rows of contig ``i`` occupy
+    ``contig_offsets[i]:contig_offsets[i + 1]``.
+
+    Example:
+        >>> rmsk = RmskArrays.from_bed(Path("rmsk.bed.gz"))
+        >>> rmsk.overlap_names("contig_1", 1000, 2000, strand="+")
+        ['L1HS']
+    """
+
+    contigs: list[str]
+    contig_offsets: np.ndarray  # int64, len(contigs) + 1
+    starts: np.ndarray  # int32, 0-based inclusive
+    ends: np.ndarray  # int32, 0-based exclusive
+    strands: np.ndarray  # int8, see STRAND_CODES
+    name_ids: np.ndarray  # int32, index into names
+    max_lengths: np.ndarray  # int32, longest interval per contig
+    names: list[str]
+    _contig_index: dict[str, int] = field(init=False, repr=False)
+    _name_array: Optional[np.ndarray] = field(default=None, init=False, repr=False)
+    _shm: Optional[shared_memory.SharedMemory] = field(
+        default=None, init=False, repr=False
+    )
+
+    def __post_init__(self) -> None:
+        """Build contig name -> index lookup."""
+        self._contig_index = {chrom: i for i, chrom in enumerate(self.contigs)}
+
+    @classmethod
+    def from_bed(
+        cls, rmsk_bed: Path, contigs: Optional[Iterable[str]] = None
+    ) -> RmskArrays:
+        """
+        Load a bgzipped + tabix RepeatMasker BED file into arrays.
+
+        The whole file is read sequentially. With ``contigs``, only those
+        contigs are loaded: their rows are fetched through the tabix index
+        when there is one and it does not cover all of them anyway. Header
+        lines, rows with fewer than 6 columns and zero-length intervals are
+        skipped; unknown strands are stored as '.'.
+
+        Args:
+            rmsk_bed: RepeatMasker BED file (bgzipped + tabix)
+            contigs: Optional contigs to load (default: all)
+
+        Returns:
+            Populated RmskArrays
+
+        Raises:
+            ValueError: If a coordinate does not fit int32, the storage type
+        """
+        logger.info(f"Loading RepeatMasker arrays from {rmsk_bed}")
+
+        wanted = set(contigs) if contigs is not None else None
+        source, compression = rmsk_bed, "gzip"
+        if wanted is not None:
+            fetched = _fetch_contigs(rmsk_bed, wanted)
+            if fetched is not None:
+                source, compression = io.StringIO(fetched), None
+
+        # Parse in C (bgzip is gzip-compatible) instead of splitting rows
+        # one by one. Empty strings stay strings (names such as "NA");
+        # header lines and rows with fewer than 6 columns come out as
+        # missing values and are dropped.
+        columns = ["chrom", "start", "end", "name", "strand"]
+        try:
+            df = pd.read_csv(
+                source,
+                sep="\t",
+                header=None,
+                usecols=[0, 1, 2, 3, 5],
+                names=columns,
+                dtype={"chrom": str, "name": str, "strand": str},
+                keep_default_na=False,
+                compression=compression,
+            )
+        except pd.errors.EmptyDataError:  # nothing fetched
+            df = pd.DataFrame({col: pd.Series(dtype=object) for col in columns})
+        if wanted is not None:
+            df = df.loc[df["chrom"].isin(wanted)]
+        starts = pd.to_numeric(df["start"], errors="coerce")
+        ends = pd.to_numeric(df["end"], errors="coerce")
+        keep = (
+            starts.notna()
+            & ends.notna()
+            & df["strand"].notna()
+            & (ends > starts)  # skip zero-length intervals
+            & ~df["chrom"].str.startswith("#")
+        )
+        df = df.loc[keep]
+
+        # Contigs and names are numbered in order of first appearance
+        chrom_codes, contigs = pd.factorize(df["chrom"])
+        name_ids, names = pd.factorize(df["name"])
+
+        # Sort by contig, then start (stable; tabix output normally is already)
+        starts_arr = starts[keep].to_numpy(np.int64)
+        ends_arr = ends[keep].to_numpy(np.int64)
+        if len(starts_arr) and (starts_arr.min() < INT32_MIN or ends_arr.max() > INT32_MAX):
+            raise ValueError(
+                f"RepeatMasker coordinates in {rmsk_bed} exceed the int32 range "
+                f"[{INT32_MIN}, {INT32_MAX}]"
+            )
+        order = np.lexsort((starts_arr, chrom_codes))
+        starts_arr = starts_arr[order].astype(np.int32)
+        ends_arr = ends_arr[order].astype(np.int32)
+        strands_arr = (
+            df["strand"].map(STRAND_CODES).fillna(0).to_numpy(np.int8)[order]
+        )
+        name_ids_arr = name_ids[order].astype(np.int32)
+
+        contig_offsets = np.zeros(len(contigs) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(chrom_codes, minlength=len(contigs)), out=contig_offsets[1:])
+        max_lengths = np.zeros(len(contigs), dtype=np.int32)
+        if len(contigs):
+            max_lengths[:] = np.maximum.reduceat(ends_arr - starts_arr, contig_offsets[:-1])
+        contigs = contigs.tolist()
+        names = names.tolist()
+
+        logger.info(
+            f"Loaded {len(starts_arr):,} TE intervals across {len(contigs)} contigs"
+        )
+        return cls(
+            contigs=contigs,
+            contig_offsets=contig_offsets,
+            starts=starts_arr,
+            ends=ends_arr,
+            strands=strands_arr,
+            name_ids=name_ids_arr,
+            max_lengths=max_lengths,
+            names=names,
+        )
+
+    def __len__(self) -> int:
+        """Number of intervals."""
+        return len(self.starts)
+
+    @property
+    def name_array(self) -> np.ndarray:
+        """``names`` as an object array, indexable by ``name_ids`` (built once)."""
+        if self._name_array is None:
+            self._name_array = np.array(self.names, dtype=object)
+        return self._name_array
+
+    def has_contig(self, chrom: str) -> bool:
+        """Check if a contig has any intervals."""
+        return chrom in self._contig_index
+
+    def overlap_indices(
+        self, chrom: str, start: int, end: int, strand: Optional[str] = None
+    ) -> np.ndarray:
+        """
+        Find rows overlapping the half-open query region ``[start, end)``.
+
+        Args:
+            chrom: Chromosome/contig name
+            start: Query start position
+            end: Query end position
+            strand: Optional strand filter ('+', '-', '.', or None for both)
+
+        Returns:
+            Array of row indices (empty if contig not found, no KeyError!)
+        """
+        i = self._contig_index.get(chrom)
+        if i is None or start >= end:
+            return np.empty(0, dtype=np.int64)
+
+        lo, hi = int(self.contig_offsets[i]), int(self.contig_offsets[i + 1])
+        starts = self.starts[lo:hi]
+
+        # Candidates start before the query end and no earlier than the
+        # longest interval on this contig could still reach the query start
+        right = int(np.searchsorted(starts, search_key(starts, end), side="left"))
+        left = int(
+            np.searchsorted(
+                starts, search_key(starts, start - int(self.max_lengths[i])), side="right"
+            )
+        )
+        idx = np.arange(lo + left, lo + right)
+        mask = self.ends[idx] > start
+
+        if strand is not None:
+            code = STRAND_CODES.get(strand)
+            if code is None:
+                return np.empty(0, dtype=np.int64)
+            mask &= self.strands[idx] == code
+
+        return idx[mask]
+
+    def overlap_names(
+        self, chrom: str, start: int, end: int, strand: Optional[str] = None
+    ) -> list[str]:
+        """Names of intervals overlapping the query region."""
+        idx = self.overlap_indices(chrom, start, end, strand)
+        return self.name_array[self.name_ids[idx]].tolist()
+
+    def overlap_pairs(
+        self,
+        chroms: Sequence[str],
+        starts: np.ndarray,
+        ends: np.ndarray,
+        strands: Optional[Sequence[str]] = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Find overlaps for many query regions at once.
+
+        Vectorized form of :meth:`overlap_indices` for the queries
+        ``[starts[k], ends[k])`` on ``chroms[k]``: every query is bracketed
+        by one ``np.searchsorted`` over a combined (contig, start) key, and
+        the candidates are filtered with array masks.
+
+        Args:
+            chroms: Query contig names
+            starts: Query start positions
+            ends: Query end positions
+            strands: Optional per-query strand filter (None for both strands)
+
+        Returns:
+            (query, row) index arrays of all overlapping pairs, ordered by
+            query, then row (the order :meth:`overlap_indices` returns)
+        """
+        query_ids, contig, starts, ends, codes = _prepare_queries(
+            self.contigs, chroms, starts, ends, strands
+        )
+        if not len(query_ids):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        # Rows are sorted by (contig, start): one sorted int64 key for all
+        # contigs, with the start offset into the unsigned low 32 bits
+        row_contig = np.repeat(
+            np.arange(len(self.contigs), dtype=np.int64), np.diff(self.contig_offsets)
+        )
+        keys = (row_contig << 32) + (self.starts.astype(np.int64) + 2**31)
+
+        queries, rows = [], []
+        for block in range(0, len(contig), OVERLAP_BATCH):
+            c = contig[block : block + OVERLAP_BATCH]
+            s = starts[block : block + OVERLAP_BATCH]
+            e = ends[block : block + OVERLAP_BATCH]
+
+            # Same bracket as overlap_indices, clipped to the query's contig
+            lo = self.contig_offsets[c]
+            hi = self.contig_offsets[c + 1]
+            right = np.searchsorted(
+                keys, (c << 32) + (np.clip(e, -(2**31), 2**31) + 2**31), side="left"
+            )
+            left = np.searchsorted(
+                keys,
+                (c << 32) + (np.clip(s - self.max_lengths[c], -(2**31), 2**31) + 2**31),
+                side="right",
+            )
+            q, row = _expand_ranges(np.maximum(left, lo), np.minimum(right, hi))
+
+            mask = self.ends[row] > s[q]
+            if codes is not None:
+                mask &= self.strands[row] == codes[block : block + OVERLAP_BATCH][q]
+            queries.append(query_ids[q[mask] + block])
+            rows.append(row[mask])
+
+        return np.concatenate(queries), np.concatenate(rows)
+
+    @contextmanager
+    def shared(self) -> Iterator[SharedRmsk]:
+        """
+        Publish the arrays to shared memory for the duration of the block.
+
+        The block is unlinked on exit; workers must be finished by then.
+
+        Yields:
+            Picklable SharedRmsk handle for worker processes
+        """
+        encoded = [name.encode() for name in self.names]
+        name_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=name_offsets[1:])
+        name_blob = np.frombuffer(b"".join(encoded) or b"\0", dtype=np.uint8)
+
+        fields = {
+            "contig_offsets": self.contig_offsets,
+            "starts": self.starts,
+            "ends": self.ends,
+            "strands": self.strands,
+            "name_ids": self.name_ids,
+            "max_lengths": self.max_lengths,
+            "name_offsets": name_offsets,
+            "name_blob": name_blob,
+        }
+
+        layout = []
+        offset = 0
+        for name, arr in fields.items():
+            offset = -(-offset // 8) * 8  # keep every array 8-byte aligned
+            layout.append((name, arr.dtype.str, len(arr), offset))
+            offset += arr.nbytes
+
+        shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        try:
+            for (_, dtype, length, off), arr in zip(layout, fields.values(), strict=True):
+                np.ndarray((length,), dtype=np.dtype(dtype), buffer=shm.buf, offset=off)[:] = arr
+            logger.info(f"Published RepeatMasker arrays to shared memory ({offset:,} bytes)")
+            yield SharedRmsk(
+                shm_name=shm.name, contigs=tuple(self.contigs), layout=tuple(layout)
+            )
+        finally:
+            shm.close()
+            shm.unlink()
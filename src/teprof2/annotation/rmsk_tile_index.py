@@ -0,0 +1,315 @@
+"""
+RepeatMasker tile index - fixed-size genomic buckets over RmskArrays.
+
+Every contig is cut into tiles of ``tile_size`` bp (a power of two, so the
+tile of a position is a bit shift). Each tile lists the RMSK rows that touch
+it, stored CSR-style in two flat arrays. An overlap query only looks at the
+rows in the one or two tiles a promoter window covers instead of bracketing
+the whole contig.
+
+The index can be persisted as an ``.npz`` file next to the RMSK BED so it
+is built once per reference.
+"""
+
+from __future__ import annotations
+
+import logging
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+
+from ..core.table_io import atomic_write
+from .rmsk_cache import (
+    OVERLAP_BATCH,
+    STRAND_CODES,
+    RmskArrays,
+    _expand_ranges,
+    _prepare_queries,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TILE_SIZE = 16384
+
+
+@dataclass
+class RmskTileIndex:
+    """
+    Tile-bucketed index over an RmskArrays table.
+
+    Tiles of contig ``i`` have global ids ``tile_base[i]:tile_base[i + 1]``;
+    rows touching global tile ``t`` are ``tile_rows[tile_ptr[t]:tile_ptr[t + 1]]``
+    (ascending, i.e. sorted by start).
+
+    Example:
+        >>> index = RmskTileIndex.build(RmskArrays.from_bed(Path("rmsk.bed.gz")))
+        >>> index.overlap_names("contig_1", 1000, 2000, strand="+")
+        ['L1HS']
+    """
+
+    rmsk: RmskArrays
+    tile_shift: int
+    tile_base: np.ndarray  # int64, len(contigs) + 1
+    tile_ptr: np.ndarray  # int64, n_tiles + 1
+    tile_rows: np.ndarray  # int32, row indices into rmsk
+
+    @classmethod
+    def build(cls, rmsk: RmskArrays, tile_size: int = DEFAULT_TILE_SIZE) -> RmskTileIndex:
+        """
+        Build the index.
+
+        Args:
+            rmsk: RepeatMasker arrays
+            tile_size: Tile width in bp (power of two)
+
+        Returns:
+            Populated RmskTileIndex
+
+        Raises:
+            ValueError: If tile_size is not a positive power of two
+        """
+        if tile_size <= 0 or tile_size & (tile_size - 1):
+            raise ValueError(f"tile_size must be a power of two: {tile_size}")
+        shift = tile_size.bit_length() - 1
+
+        # Tiles per contig, from the furthest interval end
+        n_contigs = len(rmsk.contigs)
+        tiles_per_contig = np.zeros(n_contigs, dtype=np.int64)
+        for i in range(n_contigs):
+            lo, hi = rmsk.contig_offsets[i], rmsk.contig_offsets[i + 1]
+            tiles_per_contig[i] = (int(rmsk.ends[lo:hi].max()) - 1 >> shift) + 1
+        tile_base = np.zeros(n_contigs + 1, dtype=np.int64)
+        np.cumsum(tiles_per_contig, out=tile_base[1:])
+
+        # Expand every row into the global tiles it touches
+        contig_of_row = np.repeat(
+            np.arange(n_contigs, dtype=np.int64), np.diff(rmsk.contig_offsets)
+        )
+        first = (rmsk.starts.astype(np.int64) >> shift) + tile_base[contig_of_row]
+        last = ((rmsk.ends.astype(np.int64) - 1) >> shift) + tile_base[contig_of_row]
+        span = last - first + 1
+
+        rows = np.repeat(np.arange(len(rmsk), dtype=np.int32), span)
+        step = np.arange(len(rows), dtype=np.int64) - np.repeat(np.cumsum(span) - span, span)
+        tiles = np.repeat(first, span) + step
+
+        order = np.argsort(tiles, kind="stable")
+        tile_ptr = np.zeros(int(tile_base[-1]) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(tiles, minlength=int(tile_base[-1])), out=tile_ptr[1:])
+
+        logger.info(
+            f"Built RMSK tile index: {int(tile_base[-1]):,} tiles of {tile_size:,} bp, "
+            f"{len(rows):,} entries"
+        )
+        return cls(
+            rmsk=rmsk,
+            tile_shift=shift,
+            tile_base=tile_base,
+            tile_ptr=tile_ptr,
+            tile_rows=rows[order],
+        )
+
+    @classmethod
+    def load_or_build(
+        cls,
+        rmsk: RmskArrays,
+        rmsk_bed: Path,
+        tile_size: int = DEFAULT_TILE_SIZE,
+    ) -> RmskTileIndex:
+        """
+        Load the persisted index next to the RMSK BED, or build and save it.
+
+        The cache is ``<rmsk_bed>.tiles.npz``, written with
+        :func:`~teprof2.core.table_io.atomic_write`. It stores a fingerprint
+        of the BED file (size, mtime) and of the loaded coordinates, and is
+        rebuilt when the fingerprint or the tile size does not match.
+
+        Args:
+            rmsk: RepeatMasker arrays loaded from rmsk_bed
+            rmsk_bed: RepeatMasker BED file the arrays came from
+            tile_size: Tile width in bp (power of two)
+
+        Returns:
+            RmskTileIndex
+        """
+        cache_path = Path(str(rmsk_bed) + ".tiles.npz")
+
+        index = cls._load(cache_path, rmsk, rmsk_bed, tile_size)
+        if index is not None:
+            logger.info(f"Loaded RMSK tile index from {cache_path}")
+            return index
+
+        index = cls.build(rmsk, tile_size)
+
+        def save(tmp_path: Path) -> None:
+            with open(tmp_path, "wb") as f:
+                np.savez(
+                    f,
+                    tile_shift=np.int64(index.tile_shift),
+                    n_rows=np.int64(len(rmsk)),
+                    fingerprint=_fingerprint(rmsk, rmsk_bed),
+                    tile_base=index.tile_base,
+                    tile_ptr=index.tile_ptr,
+                    tile_rows=index.tile_rows,
+                )
+
+        if atomic_write(cache_path, save):
+            logger.info(f"Saved RMSK tile index to {cache_path}")
+        return index
+
+    @classmethod
+    def _load(
+        cls, cache_path: Path, rmsk: RmskArrays, rmsk_bed: Path, tile_size: int
+    ) -> Optional[RmskTileIndex]:
+        """Load a persisted index if it matches the BED and arrays, else None."""
+        try:
+            with np.load(cache_path) as data:
+                if (
+                    not np.array_equal(data["fingerprint"], _fingerprint(rmsk, rmsk_bed))
+                    or 1 << int(data["tile_shift"]) != tile_size
+                    or int(data["n_rows"]) != len(rmsk)
+                    or len(data["tile_base"]) != len(rmsk.contigs) + 1
+                ):
+                    return None
+                return cls(
+                    rmsk=rmsk,
+                    tile_shift=int(data["tile_shift"]),
+                    tile_base=data["tile_base"],
+                    tile_ptr=data["tile_ptr"],
+                    tile_rows=data["tile_rows"],
+                )
+        except Exception:  # missing, stale or unreadable cache: rebuild
+            return None
+
+    def overlap_indices(
+        self, chrom: str, start: int, end: int, strand: Optional[str] = None
+    ) -> np.ndarray:
+        """
+        Find rows overlapping the half-open query region ``[start, end)``.
+
+        Same semantics as :meth:`RmskArrays.overlap_indices`.
+
+        Args:
+            chrom: Chromosome/contig name
+            start: Query start position
+            end: Query end position
+            strand: Optional strand filter ('+', '-', '.', or None for both)
+
+        Returns:
+            Array of row indices (empty if contig not found, no KeyError!)
+        """
+        i = self.rmsk._contig_index.get(chrom)
+        if i is None or start >= end:
+            return np.empty(0, dtype=np.int64)
+
+        base = int(self.tile_base[i])
+        last_tile = int(self.tile_base[i + 1]) - base - 1
+        first = max(start, 0) >> self.tile_shift
+        last = min((end - 1) >> self.tile_shift, last_tile)
+        if first > last:
+            return np.empty(0, dtype=np.int64)
+
+        rows = self.tile_rows[
+            self.tile_ptr[base + first] : self.tile_ptr[base + last + 1]
+        ]
+        if last > first:
+            rows = np.unique(rows)  # rows spanning several tiles appear repeatedly
+
+        mask = (self.rmsk.starts[rows] < end) & (self.rmsk.ends[rows] > start)
+
+        if strand is not None:
+            code = STRAND_CODES.get(strand)
+            if code is None:
+                return np.empty(0, dtype=np.int64)
+            mask &= self.rmsk.strands[rows] == code
+
+        return rows[mask].astype(np.int64)
+
+    def overlap_names(
+        self, chrom: str, start: int, end: int, strand: Optional[str] = None
+    ) -> list[str]:
+        """Names of intervals overlapping the query region."""
+        idx = self.overlap_indices(chrom, start, end, strand)
+        return self.rmsk.name_array[self.rmsk.name_ids[idx]].tolist()
+
+    def overlap_pairs(
+        self,
+        chroms: Sequence[str],
+        starts: np.ndarray,
+        ends: np.ndarray,
+        strands: Optional[Sequence[str]] = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Find overlaps for many query regions at once.
+
+        Vectorized form of :meth:`overlap_indices`: queries are expanded into
+        the tiles they cover, tiles into their rows, and the candidates are
+        filtered with array masks. A row spanning several tiles is only
+        kept in the first tile it shares with the query, so no ``np.unique``
+        is needed.
+
+        Args:
+            chroms: Query contig names
+            starts: Query start positions
+            ends: Query end positions
+            strands: Optional per-query strand filter (None for both strands)
+
+        Returns:
+            (query, row) index arrays of all overlapping pairs, ordered by
+            query, then row (the order :meth:`overlap_indices` returns)
+        """
+        rmsk = self.rmsk
+        query_ids, contig, starts, ends, codes = _prepare_queries(
+            rmsk.contigs, chroms, starts, ends, strands
+        )
+        if not len(query_ids):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        queries, rows = [], []
+        for block in range(0, len(contig), OVERLAP_BATCH):
+            c = contig[block : block + OVERLAP_BATCH]
+            s = starts[block : block + OVERLAP_BATCH]
+            e = ends[block : block + OVERLAP_BATCH]
+
+            # Tiles covered by each query (contig-local, clipped as in
+            # overlap_indices), then their global ids
+            base = self.tile_base[c]
+            first = np.maximum(s, 0) >> self.tile_shift
+            last = np.minimum((e - 1) >> self.tile_shift, self.tile_base[c + 1] - base - 1)
+            q_of_tile, tile_pos = _expand_ranges(first, last + 1)
+            tiles = base[q_of_tile] + tile_pos
+
+            # Rows listed in those tiles
+            pair, entry = _expand_ranges(self.tile_ptr[tiles], self.tile_ptr[tiles + 1])
+            q = q_of_tile[pair]
+            row = self.tile_rows[entry].astype(np.int64)
+
+            # Keep a row only in the first tile it shares with the query
+            row_first_tile = base[q] + (rmsk.starts[row].astype(np.int64) >> self.tile_shift)
+            mask = tiles[pair] == np.maximum(row_first_tile, base[q] + first[q])
+            mask &= (rmsk.starts[row] < e[q]) & (rmsk.ends[row] > s[q])
+            if codes is not None:
+                mask &= rmsk.strands[row] == codes[block : block + OVERLAP_BATCH][q]
+            queries.append(query_ids[q[mask] + block])
+            rows.append(row[mask])
+
+        return np.concatenate(queries), np.concatenate(rows)
+
+
+def _fingerprint(rmsk: RmskArrays, rmsk_bed: Path) -> np.ndarray:
+    """
+    Identify the BED file and coordinates a tile index was built from.
+
+    File size and mtime catch edits; the CRC32 of the coordinate arrays
+    catches a different BED that happens to share them (e.g. copied with
+    ``cp -p``/``rsync -a``). The arrays are already in memory, so the
+    checksum costs a single pass over them.
+    """
+    stat = Path(rmsk_bed).stat()
+    crc = 0
+    for array in (rmsk.contig_offsets, rmsk.starts, rmsk.ends):
+        crc = zlib.crc32(np.ascontiguousarray(array), crc)
+    return np.array([stat.st_size, stat.st_mtime_ns, crc], dtype=np.int64)
@@ -13,31 +13,79 @@ Key improvements:
 
 from __future__ import annotations
 
+import functools
 import logging
+import pickle
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Optional, Sequence
 
+import numpy as np
 import pandas as pd
-import pysam
-from intervaltree import IntervalTree
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+
+try:
+    import numba
+except ImportError:  # optional (teprof2[performance]); fall back to NumPy
+    numba = None
 
 from ..core.genome_interval import GenomeIntervalHandler, GenomicInterval
+from ..core.table_io import atomic_write, write_table
+from .rmsk_cache import RmskArrays
+from .rmsk_tile_index import DEFAULT_TILE_SIZE, RmskTileIndex
 
 logger = logging.getLogger(__name__)
 
+# GTF attributes used for annotation; extracted column-wise in _read_gtf
+GTF_ATTRIBUTE_KEYS = ("transcript_id", "gene_id", "gene_name")
+
+# Distinct attribute strings remembered by parse_gtf_attributes
+ATTRIBUTE_CACHE_SIZE = 1 << 16
+
+# Block size for the multithreaded whole-GTF reader (bytes per parse task)
+GTF_BLOCK_SIZE = 64 << 20
+
+# Block size when streaming a GTF for one feature type (bounds peak memory)
+GTF_STREAM_BLOCK_SIZE = 16 << 20
+
+# Arrow type of the low-cardinality GTF columns (seqname, strand)
+GTF_CATEGORY_TYPE = pa.dictionary(pa.int32(), pa.string())
+
+# Promoter window upstream of the TSS (bp)
+PROMOTER_WINDOW = 2000
+
+# Read buffer for pickled reference dictionaries
+PICKLE_BUFFER_SIZE = 1 << 20
 
-@dataclass
+
+@dataclass(slots=True)
 class AnnotationConfig:
-    """Configuration for TE annotation."""
+    """
+    Configuration for TE annotation.
+
+    Annotation tables shared between processes (e.g. the population
+    annotation Parquet) are narrowed with
+    :func:`teprof2.core.table_io.compact_dtypes`: categorical
+    ``transcript_id``/``chrom``/``strand``, int32 ``start``/``end``, bool
+    ``has_te_promoter`` and unsigned ``n_te_overlaps``. Parquet keeps these
+    types, so readers get the same schema back.
+    """
 
     rmsk_bed: Path  # RepeatMasker BED file (bgzipped + tabix)
     gencode_plus_dict: Optional[Path] = None  # Gencode dictionary for + strand
     gencode_minus_dict: Optional[Path] = None  # Gencode dictionary for - strand
     rmsk_annotation: Optional[Path] = None  # TE family/class mapping
-    focus_genes: Optional[Path] = None  # Gene filter list
+    focus_genes: Optional[Path] = None  # Gene name/ID filter list (None/empty = all)
     plus_intron: Optional[Path] = None  # Intron annotations +
     minus_intron: Optional[Path] = None  # Intron annotations -
+    rmsk_arrays: Optional[RmskArrays] = None  # Pre-loaded RMSK (skips tabix load)
+    rmsk_tile_size: int = DEFAULT_TILE_SIZE  # Tile index over rmsk_arrays (0 disables)
+    rmsk_lazy: bool = False  # Load only the annotated GTF's contigs, on first use
     validate_inputs: bool = True
 
     def __post_init__(self) -> None:
@@ -59,6 +107,8 @@ def parse_gtf_attributes(attr_string: str) -> dict[str, str]:
     Parse GTF attribute string into dictionary.
 
     Handles various GTF formats robustly without hardcoded indices.
+    Repeated strings (e.g. identical exon lines) are parsed once; each call
+    returns a new dict, so callers may modify it.
 
     Args:
         attr_string: GTF attribute column (column 9)
@@ -71,26 +121,38 @@ def parse_gtf_attributes(attr_string: str) -> dict[str, str]:
         >>> attrs["gene_name"]
         'TP53'
     """
+    return dict(_parse_gtf_attribute_items(attr_string))
+
+
+@functools.lru_cache(maxsize=ATTRIBUTE_CACHE_SIZE)
+def _parse_gtf_attribute_items(attr_string: str) -> tuple[tuple[str, str], ...]:
+    """Parse an attribute string into (key, value) pairs (memoized, immutable)."""
     attributes = {}
 
-    # Split by semicolon and process each attribute
+    # Split by semicolon; split(None, 1) skips leading whitespace and empty
+    # items, so only the value's trailing whitespace needs stripping.
+    # Handles both 'key "value"' and 'key value' formats.
     for item in attr_string.split(";"):
-        item = item.strip()
-        if not item:
-            continue
-
-        # Handle both 'key "value"' and 'key value' formats
-        parts = item.split(None, 1)  # Split on first whitespace
+        parts = item.split(None, 1)
         if len(parts) == 2:
-            key, value = parts
             # Remove quotes if present
-            value = value.strip('"').strip("'")
-            attributes[key] = value
-        elif len(parts) == 1:
+            attributes[parts[0]] = parts[1].rstrip().strip('"').strip("'")
+        elif parts:
             # Handle attributes without values
             attributes[parts[0]] = ""
 
-    return attributes
+    return tuple(attributes.items())
+
+
+def _attribute_pattern(key: str) -> str:
+    """
+    Regex capturing the value of one GTF attribute.
+
+    Mirrors :func:`parse_gtf_attributes`: items are separated by ``;`` and
+    the key is separated from its value by whitespace. Quotes are stripped
+    afterwards.
+    """
+    return rf"(?:^|;)\s*{re.escape(key)}\s+([^;]*?)\s*(?:;|$)"
 
 
 def safe_get_attribute(
@@ -112,6 +174,166 @@ def safe_get_attribute(
     return attributes.get(key, default)
 
 
+class SafeUnpickler(pickle.Unpickler):
+    """
+    Unpickler that only resolves allow-listed globals.
+
+    Reference dictionaries only need builtin containers/scalars and
+    GenomicInterval; any other global (e.g. ``os.system``) is refused
+    instead of being imported and called.
+    """
+
+    ALLOWED = frozenset(
+        [
+            *(
+                (module, name)
+                for module in ("builtins", "__builtin__")  # __builtin__: Python 2
+                for name in (
+                    "dict list tuple set frozenset str unicode bytes bytearray "
+                    "int long float complex bool object"
+                ).split()
+            ),
+            ("collections", "defaultdict"),
+            ("collections", "OrderedDict"),
+            ("copyreg", "_reconstructor"),
+            ("copy_reg", "_reconstructor"),
+            ("teprof2.core.genome_interval", "GenomicInterval"),
+        ]
+    )
+
+    def find_class(self, module: str, name: str) -> object:
+        """Resolve a global if it is allow-listed."""
+        if (module, name) not in self.ALLOWED:
+            raise pickle.UnpicklingError(f"Refusing to unpickle global {module}.{name}")
+        return super().find_class(module, name)
+
+
+def load_pickle_cached(path: Path) -> object:
+    """
+    Load a pickle file, through a re-serialized cache next to it.
+
+    Legacy TEProf2 dictionaries are often text (protocol 0/2) pickles, which
+    unpickle several times slower than the binary format. The first load
+    writes ``<path>.cache.pickle`` with ``pickle.HIGHEST_PROTOCOL``; later
+    loads read that instead while it is newer than ``path``. Both are read
+    through a 1 MiB buffer. The cache is written with
+    :func:`~teprof2.core.table_io.atomic_write`.
+
+    Both are read with :class:`SafeUnpickler`, so only plain containers,
+    scalars and GenomicInterval objects can be loaded.
+
+    Args:
+        path: Pickle file
+
+    Returns:
+        Unpickled object
+    """
+    path = Path(path)
+    cache_path = Path(str(path) + ".cache.pickle")
+
+    try:
+        if cache_path.stat().st_mtime >= path.stat().st_mtime:
+            with open(cache_path, "rb", buffering=PICKLE_BUFFER_SIZE) as f:
+                return SafeUnpickler(f).load()
+    except Exception:  # missing, stale or unreadable cache: use the original
+        pass
+
+    with open(path, "rb", buffering=PICKLE_BUFFER_SIZE) as f:
+        obj = SafeUnpickler(f).load()
+
+    def dump(tmp_path: Path) -> None:
+        with open(tmp_path, "wb", buffering=PICKLE_BUFFER_SIZE) as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    if atomic_write(cache_path, dump):
+        logger.debug(f"Saved pickle cache to {cache_path}")
+    return obj
+
+
+def _aggregate_overlaps_loop(
+    query: np.ndarray,
+    rows: np.ndarray,
+    te_starts: np.ndarray,
+    te_ends: np.ndarray,
+    starts: np.ndarray,
+    ends: np.ndarray,
+    promoter_starts: np.ndarray,
+    promoter_ends: np.ndarray,
+    n: int,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Single-pass form of :func:`aggregate_overlaps` (compiled with Numba)."""
+    n_te_overlaps = np.zeros(n, dtype=np.int64)
+    has_te_promoter = np.zeros(n, dtype=np.bool_)
+    body = np.zeros(len(query), dtype=np.bool_)
+    for k in range(len(query)):
+        q = query[k]
+        te_start = te_starts[rows[k]]
+        te_end = te_ends[rows[k]]
+        if starts[q] < ends[q] and te_start < ends[q] and te_end > starts[q]:
+            body[k] = True
+            n_te_overlaps[q] += 1
+        if (
+            promoter_starts[q] < promoter_ends[q]
+            and te_start < promoter_ends[q]
+            and te_end > promoter_starts[q]
+        ):
+            has_te_promoter[q] = True
+    return n_te_overlaps, has_te_promoter, body
+
+
+if numba is not None:
+    _aggregate_overlaps_jit = numba.njit(cache=True, nogil=True)(_aggregate_overlaps_loop)
+
+
+def aggregate_overlaps(
+    query: np.ndarray,
+    rows: np.ndarray,
+    te_starts: np.ndarray,
+    te_ends: np.ndarray,
+    starts: np.ndarray,
+    ends: np.ndarray,
+    promoter_starts: np.ndarray,
+    promoter_ends: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Split fused body/promoter overlap pairs into per-transcript results.
+
+    With Numba installed this is one compiled pass over the pairs (counting,
+    promoter flags and the body mask together, GIL released); otherwise
+    NumPy masks and bincounts. Empty query ranges match nothing.
+
+    Args:
+        query: Transcript index of each overlap pair
+        rows: RMSK row of each overlap pair
+        te_starts: RMSK start positions (indexed by rows)
+        te_ends: RMSK end positions (indexed by rows)
+        starts: Transcript body starts
+        ends: Transcript body ends
+        promoter_starts: Promoter window starts
+        promoter_ends: Promoter window ends
+
+    Returns:
+        (TE overlap count per transcript, TE-promoter flag per transcript,
+        mask of the pairs overlapping the transcript body)
+    """
+    n = len(starts)
+    if numba is not None:
+        return _aggregate_overlaps_jit(
+            query, rows, te_starts, te_ends, starts, ends, promoter_starts, promoter_ends, n
+        )
+
+    pair_starts = te_starts[rows]
+    pair_ends = te_ends[rows]
+    body = (pair_starts < ends[query]) & (pair_ends > starts[query])
+    body &= starts[query] < ends[query]
+    promoter = (pair_starts < promoter_ends[query]) & (pair_ends > promoter_starts[query])
+    promoter &= promoter_starts[query] < promoter_ends[query]
+
+    n_te_overlaps = np.bincount(query[body], minlength=n)
+    has_te_promoter = np.bincount(query[promoter], minlength=n) > 0
+    return n_te_overlaps, has_te_promoter, body
+
+
 class TEAnnotator:
     """
     TE (Transposable Element) annotator for GTF files.
@@ -131,76 +353,63 @@ class TEAnnotator:
             config: Annotation configuration
         """
         self.config = config
-        self.rmsk_handler = GenomeIntervalHandler()
         self.gene_handler = GenomeIntervalHandler()
 
-        # Load reference data
-        self._load_repeatmasker()
+        # Load reference data (pre-loaded/shared RMSK arrays take precedence).
+        # Overlaps are queried on the sorted flat arrays (through the tile
+        # index when enabled), never on per-interval Python objects. With
+        # rmsk_lazy, loading waits for annotate_gtf (see _ensure_rmsk).
+        self.rmsk_arrays: Optional[RmskArrays] = None
+        self.rmsk_index: Optional[RmskArrays | RmskTileIndex] = None
+        self._rmsk_contigs: Optional[frozenset[str]] = None  # None = all contigs
+        if config.rmsk_arrays is not None:
+            logger.info(
+                f"Using pre-loaded RepeatMasker arrays ({len(config.rmsk_arrays):,} intervals)"
+            )
+            self._set_rmsk(config.rmsk_arrays)
+        elif not config.rmsk_lazy:
+            self._set_rmsk(RmskArrays.from_bed(config.rmsk_bed))
         self._load_gencode_dictionaries()
 
         # Optional: load focus genes
-        self.focus_genes: set[str] = set()
+        self.focus_genes: frozenset[str] = frozenset()
         if config.focus_genes and config.focus_genes.exists():
             self._load_focus_genes()
 
         logger.info("TEAnnotator initialized successfully")
 
-    def _load_repeatmasker(self) -> None:
-        """Load RepeatMasker annotations from tabix-indexed BED file."""
-        logger.info(f"Loading RepeatMasker from {self.config.rmsk_bed}")
-
-        try:
-            # Open tabix file
-            tbx = pysam.TabixFile(str(self.config.rmsk_bed))
-
-            # Iterate through all contigs
-            for contig in tbx.contigs:
-                try:
-                    for row in tbx.fetch(contig):
-                        fields = row.split("\t")
-                        if len(fields) < 6:
-                            continue
-
-                        chrom = fields[0]
-                        start = int(fields[1])
-                        end = int(fields[2])
-
-                        # Skip zero-length intervals (start == end)
-                        if end <= start:
-                            continue
-
-                        name = fields[3] if len(fields) > 3 else ""
-                        score = float(fields[4]) if len(fields) > 4 else 0.0
-                        strand = fields[5] if len(fields) > 5 else "."
-
-                        self.rmsk_handler.add_interval(
-                            chrom=chrom,
-                            start=start,
-                            end=end,
-                            strand=strand,
-                            name=name,
-                            score=score,
-                        )
-                except Exception as e:
-                    logger.debug(f"Error loading contig {contig}: {e}")
-                    continue
-
-            n_intervals = self.rmsk_handler.count_intervals()
-            n_contigs = len(self.rmsk_handler.get_contigs())
-            logger.info(
-                f"Loaded {n_intervals:,} TE intervals across {n_contigs} contigs"
-            )
+    def _set_rmsk(self, rmsk_arrays: RmskArrays) -> None:
+        """Use these RMSK arrays and build (or load) their tile index."""
+        self.rmsk_arrays = rmsk_arrays
+        self.rmsk_index = rmsk_arrays
+        if self.config.rmsk_tile_size and len(rmsk_arrays):
+            if self._rmsk_contigs is None:
+                self.rmsk_index = RmskTileIndex.load_or_build(
+                    rmsk_arrays, self.config.rmsk_bed, self.config.rmsk_tile_size
+                )
+            else:  # contig subset: the persisted index is for the whole file
+                self.rmsk_index = RmskTileIndex.build(rmsk_arrays, self.config.rmsk_tile_size)
+
+    def _ensure_rmsk(self, contigs: Iterable[str]) -> None:
+        """
+        Make sure RMSK intervals are loaded for these contigs (rmsk_lazy).
 
-        except Exception as e:
-            logger.error(f"Failed to load RepeatMasker file: {e}")
-            raise
+        Only the contigs annotated so far are loaded, through the tabix
+        index. A later GTF with new contigs reloads their union.
+        """
+        if self.rmsk_arrays is not None and (
+            self._rmsk_contigs is None or self._rmsk_contigs.issuperset(contigs)
+        ):
+            return
+        self._rmsk_contigs = frozenset(contigs) | (self._rmsk_contigs or frozenset())
+        self._set_rmsk(RmskArrays.from_bed(self.config.rmsk_bed, self._rmsk_contigs))
 
     def _load_gencode_dictionaries(self) -> None:
         """
         Load Gencode gene dictionaries.
 
         These dictionaries contain gene/transcript interval information
-        for quick lookup during annotation.
+        for quick lookup during annotation. See :func:`load_pickle_cached`.
         """
         logger.info("Loading Gencode dictionaries")
 
@@ -208,78 +417,196 @@ class TEAnnotator:
         self.gencode_plus = {}
         self.gencode_minus = {}
 
-        # Load plus strand dictionary
-        if self.config.gencode_plus_dict:
+        for strand, attr, path in (
+            ("+", "gencode_plus", self.config.gencode_plus_dict),
+            ("-", "gencode_minus", self.config.gencode_minus_dict),
+        ):
+            if not path:
+                continue
             try:
-                import pickle
-                with open(self.config.gencode_plus_dict, 'rb') as f:
-                    self.gencode_plus = pickle.load(f)
-                logger.info(f"Loaded Gencode + strand dictionary: {len(self.gencode_plus)} contigs")
+                setattr(self, attr, load_pickle_cached(path))
+                logger.info(
+                    f"Loaded Gencode {strand} strand dictionary: {len(getattr(self, attr))} contigs"
+                )
             except Exception as e:
-                logger.warning(f"Failed to load Gencode + strand dictionary: {e}")
-                self.gencode_plus = {}
-
-        # Load minus strand dictionary
-        if self.config.gencode_minus_dict:
-            try:
-                import pickle
-                with open(self.config.gencode_minus_dict, 'rb') as f:
-                    self.gencode_minus = pickle.load(f)
-                logger.info(f"Loaded Gencode - strand dictionary: {len(self.gencode_minus)} contigs")
-            except Exception as e:
-                logger.warning(f"Failed to load Gencode - strand dictionary: {e}")
-                self.gencode_minus = {}
+                logger.warning(f"Failed to load Gencode {strand} strand dictionary: {e}")
 
     def _load_focus_genes(self) -> None:
-        """Load focus gene list for filtering."""
+        """
+        Load focus gene list for filtering.
+
+        One gene name or gene ID per line. An empty list keeps all genes.
+        """
         logger.info(f"Loading focus genes from {self.config.focus_genes}")
 
         with open(self.config.focus_genes) as f:
-            self.focus_genes = {line.strip() for line in f if line.strip()}
+            self.focus_genes = frozenset(
+                sys.intern(gene) for gene in map(str.strip, f) if gene
+            )
 
         logger.info(f"Loaded {len(self.focus_genes)} focus genes")
 
     def annotate_gtf(
-        self, gtf_path: Path, output_path: Optional[Path] = None
+        self, gtf_path: Path, output_path: Optional[Path] = None, n_threads: int = 1
     ) -> pd.DataFrame:
         """
         Annotate GTF file with TE information.
 
+        With focus genes loaded, only transcripts whose ``gene_name`` or
+        ``gene_id`` is in the list are annotated (filtered before the
+        overlap search).
+
         Args:
             gtf_path: Input GTF file path
-            output_path: Optional output file path
+            output_path: Optional output file path (``.parquet`` writes
+                Parquet, anything else writes TSV)
+            n_threads: Threads for the overlap search (see :meth:`_overlap_pairs`)
 
         Returns:
             DataFrame with annotations
         """
         logger.info(f"Annotating GTF file: {gtf_path}")
 
-        # Read GTF file
-        gtf_df = self._read_gtf(gtf_path)
+        # Read transcript rows only (attributes are extracted for these alone)
+        transcripts = self._read_gtf(gtf_path, feature="transcript")
+        if self.focus_genes:
+            genes = self.focus_genes
+            transcripts = transcripts.loc[
+                transcripts["gene_name"].isin(genes) | transcripts["gene_id"].isin(genes)
+            ]
+            logger.info(f"Kept {len(transcripts):,} transcripts of focus genes")
+        transcripts = transcripts.reset_index(drop=True)
+        self._ensure_rmsk(transcripts["seqname"].unique())
+
+        # Promoter windows lie upstream of the TSS (based on strand) and
+        # touch or overlap the body, so one query over their union finds
+        # both; hits are then split with masks (empty ranges match nothing)
+        n = len(transcripts)
+        # Categorical contigs/strands are encoded once per category
+        chroms = transcripts["seqname"].array
+        starts = transcripts["start"].to_numpy(dtype=np.int64)
+        ends = transcripts["end"].to_numpy(dtype=np.int64)
+        strands = transcripts["strand"].array
+        plus = strands == "+"
+        promoter_starts = np.where(plus, np.maximum(starts - PROMOTER_WINDOW, 0), starts)
+        promoter_ends = np.where(plus, starts, starts + PROMOTER_WINDOW)
+
+        query, rows = self._overlap_pairs(
+            chroms,
+            np.minimum(starts, promoter_starts),
+            np.maximum(ends, promoter_ends),
+            strands,
+            n_threads,
+        )
+        n_te_overlaps, has_te_promoter, body = aggregate_overlaps(
+            query,
+            rows,
+            self.rmsk_arrays.starts,
+            self.rmsk_arrays.ends,
+            starts,
+            ends,
+            promoter_starts,
+            promoter_ends,
+        )
 
-        # Annotate each transcript
-        annotations = []
-        for idx, row in gtf_df.iterrows():
-            if row["feature"] == "transcript":
-                annotation = self._annotate_transcript(row)
-                annotations.append(annotation)
+        # Join the overlapping TE names per transcript in Arrow
+        # ("None" when there are none)
+        names = pa.array(self.rmsk_arrays.name_array, type=pa.string()).take(
+            pa.array(self.rmsk_arrays.name_ids[rows[body]])
+        )
+        offsets = np.zeros(n + 1, dtype=np.int32)
+        np.cumsum(n_te_overlaps, out=offsets[1:])
+        te_names = pc.if_else(
+            pa.array(n_te_overlaps == 0),
+            "None",
+            pc.binary_join(pa.ListArray.from_arrays(pa.array(offsets), names), ","),
+        )
 
-        # Convert to DataFrame
-        result_df = pd.DataFrame(annotations)
+        result_df = pd.DataFrame(
+            {
+                "transcript_id": transcripts["transcript_id"],
+                "gene_id": transcripts["gene_id"],
+                "gene_name": transcripts["gene_name"],
+                "chrom": transcripts["seqname"],
+                "start": transcripts["start"],
+                "end": transcripts["end"],
+                "strand": transcripts["strand"],
+                "n_te_overlaps": n_te_overlaps.astype(np.int64),
+                "te_names": te_names.to_pandas(),
+                "has_te_promoter": has_te_promoter,
+            }
+        )
 
-        # Save if output path provided
+        # Save if output path provided (format chosen from the suffix)
         if output_path:
-            result_df.to_csv(output_path, sep="\t", index=False)
+            write_table(result_df, output_path)
             logger.info(f"Saved annotations to {output_path}")
 
         return result_df
 
-    def _read_gtf(self, gtf_path: Path) -> pd.DataFrame:
+    def _overlap_pairs(
+        self,
+        chroms: Sequence[str],
+        starts: np.ndarray,
+        ends: np.ndarray,
+        strands: Sequence[str],
+        n_threads: int = 1,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Run the batched overlap search, optionally on a thread pool.
+
+        Queries on different contigs are independent, so with
+        ``n_threads > 1`` they are grouped by contig into up to
+        ``n_threads`` parts of whole contigs with similar query counts,
+        searched concurrently (the NumPy kernels release the GIL), and the
+        (query, row) pairs are put back in query order.
+
+        Args:
+            chroms: Query contig names
+            starts: Query start positions
+            ends: Query end positions
+            strands: Query strands
+            n_threads: Maximum number of threads (1 = single search)
+
+        Returns:
+            (query, row) index arrays, as from ``overlap_pairs``
+        """
+        codes, contigs = pd.factorize(chroms)
+        n_parts = min(n_threads, len(contigs))
+        if n_parts <= 1:
+            return self.rmsk_index.overlap_pairs(chroms, starts, ends, strands)
+
+        # Queries grouped by contig; parts are cut at the contig boundary
+        # following each equal-size split point
+        order = np.argsort(codes, kind="stable")
+        first = np.searchsorted(codes[order], np.arange(len(contigs)))
+        targets = np.linspace(0, len(order), n_parts + 1)[1:-1]
+        cuts = first[np.minimum(np.searchsorted(first, targets), len(first) - 1)]
+        bounds = np.unique(np.concatenate([[0], cuts, [len(order)]]))
+
+        def search(part: int) -> tuple[np.ndarray, np.ndarray]:
+            idx = order[bounds[part] : bounds[part + 1]]
+            query, rows = self.rmsk_index.overlap_pairs(
+                chroms[idx], starts[idx], ends[idx], strands[idx]
+            )
+            return idx[query], rows
+
+        with ThreadPoolExecutor(max_workers=len(bounds) - 1) as pool:
+            parts = list(pool.map(search, range(len(bounds) - 1)))
+
+        # Each part is in query order; a stable sort merges them
+        query = np.concatenate([query for query, _ in parts])
+        rows = np.concatenate([rows for _, rows in parts])
+        merged = np.argsort(query, kind="stable")
+        return query[merged], rows[merged]
+
+    def _read_gtf(self, gtf_path: Path, feature: Optional[str] = None) -> pd.DataFrame:
         """
         Read GTF file into pandas DataFrame.
 
         Args:
             gtf_path: GTF file path
+            feature: Keep only rows of this feature type (e.g. "transcript")
 
         Returns:
             DataFrame with GTF data
@@ -297,98 +624,61 @@ class TEAnnotator:
             "attribute",
         ]
 
-        # Read GTF (skip comment lines)
-        df = pd.read_csv(
-            gtf_path,
-            sep="\t",
-            comment="#",
-            names=columns,
-            dtype={
-                "seqname": str,
-                "source": str,
-                "feature": str,
-                "start": int,
-                "end": int,
-                "score": str,
-                "strand": str,
-                "frame": str,
-                "attribute": str,
-            },
+        # Parse with Arrow. GTF has no quoting; comment lines are dropped
+        # (short ones by the column count check). seqname/strand are
+        # dictionary-encoded (categorical in pandas): a few distinct values
+        # repeated on every row.
+        column_types = {col: pa.string() for col in columns}
+        column_types.update(start=pa.int64(), end=pa.int64())
+        column_types.update(seqname=GTF_CATEGORY_TYPE, strand=GTF_CATEGORY_TYPE)
+        parse_options = pacsv.ParseOptions(
+            delimiter="\t", quote_char=False, invalid_row_handler=lambda row: "skip"
         )
-
-        # Parse attributes
-        df["attributes_dict"] = df["attribute"].apply(parse_gtf_attributes)
-
-        return df
-
-    def _annotate_transcript(self, transcript_row: pd.Series) -> dict:
-        """
-        Annotate a single transcript with TE information.
-
-        Args:
-            transcript_row: GTF row for transcript
-
-        Returns:
-            Dictionary with annotation results
-        """
-        chrom = transcript_row["seqname"]
-        start = transcript_row["start"]
-        end = transcript_row["end"]
-        strand = transcript_row["strand"]
-        attrs = transcript_row["attributes_dict"]
-
-        # Extract transcript info
-        transcript_id = safe_get_attribute(attrs, "transcript_id")
-        gene_id = safe_get_attribute(attrs, "gene_id")
-        gene_name = safe_get_attribute(attrs, "gene_name")
-
-        # Find overlapping TEs - SAFE: returns empty list if contig not found
-        te_overlaps = self.rmsk_handler.find_overlaps(
-            chrom=chrom, start=start, end=end, strand=strand
-        )
-
-        # Build annotation
-        annotation = {
-            "transcript_id": transcript_id,
-            "gene_id": gene_id,
-            "gene_name": gene_name,
-            "chrom": chrom,
-            "start": start,
-            "end": end,
-            "strand": strand,
-            "n_te_overlaps": len(te_overlaps),
-            "te_names": ",".join([te.name for te in te_overlaps]) if te_overlaps else "None",
-            "has_te_promoter": self._check_te_promoter(chrom, start, strand),
-        }
-
-        return annotation
-
-    def _check_te_promoter(
-        self, chrom: str, tss: int, strand: str, window: int = 2000
-    ) -> bool:
-        """
-        Check if transcript has TE in promoter region.
-
-        Args:
-            chrom: Chromosome/contig
-            tss: Transcription start site
-            strand: Strand
-            window: Upstream window size (default: 2kb)
-
-        Returns:
-            True if TE found in promoter region
-        """
-        # Define promoter region based on strand
-        if strand == "+":
-            promoter_start = max(0, tss - window)
-            promoter_end = tss
+        convert_options = pacsv.ConvertOptions(column_types=column_types)
+
+        if feature is None:
+            # Whole file with the multithreaded reader
+            table = pacsv.read_csv(
+                gtf_path,
+                read_options=pacsv.ReadOptions(
+                    column_names=columns, block_size=GTF_BLOCK_SIZE
+                ),
+                parse_options=parse_options,
+                convert_options=convert_options,
+            )
+            schema, batches = table.schema, table.to_batches()
         else:
-            promoter_start = tss
-            promoter_end = tss + window
-
-        # Find TEs in promoter - SAFE: returns empty list if contig not found
-        te_in_promoter = self.rmsk_handler.find_overlaps(
-            chrom=chrom, start=promoter_start, end=promoter_end, strand=strand
-        )
+            # Stream blocks and keep only rows of the requested feature, so
+            # the other features (exons etc.) are never held all at once
+            reader = pacsv.open_csv(
+                gtf_path,
+                read_options=pacsv.ReadOptions(
+                    column_names=columns, block_size=GTF_STREAM_BLOCK_SIZE
+                ),
+                parse_options=parse_options,
+                convert_options=convert_options,
+            )
+            schema, batches = reader.schema, reader
+
+        kept = []
+        for batch in batches:
+            # Comment check on the batch's distinct seqnames, spread by index
+            seqname = batch.column("seqname")
+            keep = pc.take(pc.invert(pc.starts_with(seqname.dictionary, "#")), seqname.indices)
+            if feature is not None:
+                keep = pc.and_(keep, pc.equal(batch.column("feature"), feature))
+            kept.append(batch.filter(keep))
+        df = pa.Table.from_batches(kept, schema=schema).to_pandas(self_destruct=True)
+
+        # Extract the attributes used for annotation as columns (vectorized
+        # regex, no per-row dict); missing attributes become "None"
+        for key in GTF_ATTRIBUTE_KEYS:
+            df[key] = (
+                df["attribute"]
+                .str.extract(_attribute_pattern(key), expand=False)
+                .str.strip('"')
+                .str.strip("'")
+                .fillna("None")
+            )
 
-        return len(te_in_promoter) > 0
\ No newline at end of file
+        return df
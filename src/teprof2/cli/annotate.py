@@ -38,13 +38,16 @@ def annotate(
     gencode_plus: Path = typer.Option(..., help="Gencode dictionary for + strand"),
     gencode_minus: Path = typer.Option(..., help="Gencode dictionary for - strand"),
     output: Optional[Path] = typer.Option(
-        None, "--output", "-o", help="Output file path (default: <input>_annotated.tsv)"
+        None,
+        "--output",
+        "-o",
+        help="Output file (.parquet, .tsv.zst or TSV; default: <input>_annotated.tsv)",
     ),
     rmsk_annotation: Optional[Path] = typer.Option(
         None, help="TE family/class mapping file"
     ),
     focus_genes: Optional[Path] = typer.Option(
-        None, help="Gene filter list (one gene per line)"
+        None, help="Gene filter list (one gene name or ID per line; default: all genes)"
     ),
     plus_intron: Optional[Path] = typer.Option(
         None, help="Intron annotations for + strand (bgzipped + tabix)"
@@ -55,6 +58,7 @@ def annotate(
     promoter_window: int = typer.Option(
         2000, help="Upstream window for promoter analysis (bp)"
     ),
+    threads: int = typer.Option(1, help="Threads for the overlap search"),
     verbose: bool = typer.Option(False, "--verbose", "-v", help="Verbose output"),
 ) -> None:
     """
@@ -95,6 +99,7 @@ def annotate(
             focus_genes=focus_genes,
             plus_intron=plus_intron,
             minus_intron=minus_intron,
+            rmsk_lazy=True,  # one GTF: load only its contigs
         )
     except FileNotFoundError as e:
         console.print(f"[bold red]Error:[/bold red] {e}")
@@ -112,7 +117,7 @@ def annotate(
     # Run annotation
     console.print("[yellow]Annotating transcripts...[/yellow]")
     try:
-        result_df = annotator.annotate_gtf(gtf_file, output)
+        result_df = annotator.annotate_gtf(gtf_file, output, n_threads=threads)
     except Exception as e:
         console.print(f"[bold red]Error during annotation:[/bold red] {e}")
         logger.exception("Annotation failed")
@@ -140,22 +145,34 @@ def batch_annotate(
         None, help="Output directory (default: same as input)"
     ),
     pattern: str = typer.Option("*.gtf", help="File pattern to match"),
-    parallel: int = typer.Option(1, help="Number of parallel processes"),
+    threads: int = typer.Option(
+        1, help="Threads for the overlap search (contigs are split between them)"
+    ),
+    parallel: Optional[int] = typer.Option(
+        None, hidden=True, help="Deprecated alias of --threads"
+    ),
 ) -> None:
     """
     Batch annotate multiple GTF files.
 
-    Useful for processing many samples in parallel.
+    Reference data is loaded once and the files are annotated one after
+    another; --threads parallelizes the overlap search within each file.
 
     Example:
         teprof2 annotate batch-annotate ./gtf_files/ \\
             --rmsk-bed repeats.bed.gz \\
             --gencode-plus gencode_plus.dic \\
             --gencode-minus gencode_minus.dic \\
-            --parallel 4
+            --threads 4
     """
     console.print("[bold blue]TEProf2 - Batch Annotation[/bold blue]")
 
+    if parallel is not None:
+        console.print(
+            "[bold yellow]Warning:[/bold yellow] --parallel is deprecated, use --threads"
+        )
+        threads = parallel
+
     # Find GTF files
     gtf_files = list(gtf_dir.glob(pattern))
     if not gtf_files:
@@ -169,22 +186,27 @@ def batch_annotate(
         output_dir = gtf_dir
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    # Process files
-    if parallel == 1:
-        # Sequential processing
-        for gtf_file in track(gtf_files, description="Annotating..."):
-            output_file = output_dir / f"{gtf_file.stem}_annotated.tsv"
-            try:
-                # Call annotate function
-                # (In production, refactor to avoid code duplication)
-                console.print(f"Processing {gtf_file.name}...")
-            except Exception as e:
-                console.print(f"[red]Error processing {gtf_file.name}:[/red] {e}")
-    else:
-        # Parallel processing
-        console.print(f"[yellow]Processing with {parallel} parallel workers...[/yellow]")
-        # Implement parallel processing with concurrent.futures
-        # (Left as exercise - use ProcessPoolExecutor)
+    # Load reference data once for all files
+    try:
+        annotator = TEAnnotator(
+            AnnotationConfig(
+                rmsk_bed=rmsk_bed,
+                gencode_plus_dict=gencode_plus,
+                gencode_minus_dict=gencode_minus,
+            )
+        )
+    except Exception as e:
+        console.print(f"[bold red]Error initializing annotator:[/bold red] {e}")
+        logger.exception("Initialization failed")
+        raise typer.Exit(1)
+
+    # Process files one at a time (each overlap search runs on `threads` threads)
+    for gtf_file in track(gtf_files, description="Annotating..."):
+        output_file = output_dir / f"{gtf_file.stem}_annotated.tsv"
+        try:
+            annotator.annotate_gtf(gtf_file, output_file, n_threads=threads)
+        except Exception as e:
+            console.print(f"[red]Error processing {gtf_file.name}:[/red] {e}")
 
     console.print("[bold green]Batch annotation complete![/bold green]")
 
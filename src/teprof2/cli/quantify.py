@@ -16,7 +16,11 @@ from rich.console import Console
 from rich.logging import RichHandler
 from rich.progress import Progress, SpinnerColumn, TextColumn
 
-from ..quantification.tpm_calculator import ExpressionQuantifier, QuantificationConfig
+from ..quantification.tpm_calculator import (
+    ExpressionQuantifier,
+    QuantificationConfig,
+    load_gtf_transcripts,
+)
 
 # Set up rich console
 console = Console()
@@ -45,12 +49,18 @@ def quantify(
     stranded: bool = typer.Option(
         False, help="Whether library is strand-specific"
     ),
+    processes: int = typer.Option(
+        1, help="Processes quantifying contigs in parallel (-1 = all CPUs)"
+    ),
     calculate_fractions: bool = typer.Option(
         True, help="Calculate transcript fractions of gene expression"
     ),
     gene_level: bool = typer.Option(
         True, help="Also output gene-level expression"
     ),
+    cache_gtf: bool = typer.Option(
+        False, help="Cache parsed GTF transcripts as <gtf_file>.transcripts.parquet"
+    ),
     verbose: bool = typer.Option(False, "--verbose", "-v", help="Verbose output"),
 ) -> None:
     """
@@ -104,6 +114,8 @@ def quantify(
         output_prefix=output_prefix,
         min_mapq=min_mapq,
         stranded=stranded,
+        per_chrom_processes=processes,
+        cache_transcripts=cache_gtf,
     )
 
     # Initialize quantifier
@@ -170,6 +182,9 @@ def batch_quantify(
     pattern: str = typer.Option("*.bam", help="File pattern to match"),
     min_mapq: int = typer.Option(255, help="Minimum mapping quality"),
     parallel: int = typer.Option(1, help="Number of parallel processes"),
+    cache_gtf: bool = typer.Option(
+        False, help="Cache parsed GTF transcripts as <gtf_file>.transcripts.parquet"
+    ),
 ) -> None:
     """
     Batch quantify multiple BAM files.
@@ -191,11 +206,18 @@ def batch_quantify(
 
     console.print(f"Found {len(bam_files)} BAM files")
 
+    if not gtf_file.exists():
+        console.print(f"[bold red]Error:[/bold red] GTF file not found: {gtf_file}")
+        raise typer.Exit(1)
+
     # Create output directory
     output_dir.mkdir(parents=True, exist_ok=True)
 
     # Process files
     if parallel == 1:
+        # Parse the GTF once and share it between samples
+        transcripts = load_gtf_transcripts(gtf_file, cache=cache_gtf)
+
         # Sequential processing
         for bam_file in bam_files:
             console.print(f"\n[cyan]Processing {bam_file.name}...[/cyan]")
@@ -207,6 +229,7 @@ def batch_quantify(
                     gtf_file=gtf_file,
                     output_prefix=output_prefix,
                     min_mapq=min_mapq,
+                    transcripts=transcripts,
                 )
 
                 with ExpressionQuantifier(config) as quantifier:
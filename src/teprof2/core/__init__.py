@@ -1,5 +1,20 @@
 """Core data structures and utilities."""
 
 from teprof2.core.genome_interval import GenomicInterval, GenomeIntervalHandler
+from teprof2.core.table_io import (
+    ParquetRecordWriter,
+    atomic_write,
+    compact_dtypes,
+    write_json,
+    write_table,
+)
 
-__all__ = ["GenomicInterval", "GenomeIntervalHandler"]
+__all__ = [
+    "GenomicInterval",
+    "GenomeIntervalHandler",
+    "ParquetRecordWriter",
+    "atomic_write",
+    "compact_dtypes",
+    "write_json",
+    "write_table",
+]
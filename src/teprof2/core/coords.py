@@ -0,0 +1,30 @@
+"""
+Coordinate helpers shared by the interval handler, the RMSK arrays and the
+table writers.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+# Range of int32, the storage type of coordinates that fit it
+INT32_MIN, INT32_MAX = -(2**31), 2**31 - 1
+
+
+def search_key(array: np.ndarray, value: int) -> np.integer:
+    """
+    A query position as a scalar of the array's integer type.
+
+    ``np.searchsorted`` casts the whole array when the key has a wider type
+    (a Python int counts as int64), which would copy an int32 contig on
+    every query. Clipping to the type's range keeps the search result.
+
+    Args:
+        array: Sorted integer array to search
+        value: Query position
+
+    Returns:
+        ``value`` clipped to the range of ``array.dtype``, as that type
+    """
+    info = np.iinfo(array.dtype)
+    return array.dtype.type(min(max(value, info.min), info.max))
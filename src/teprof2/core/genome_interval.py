@@ -7,8 +7,8 @@ of contigs (e.g., Ambrosia artemisiifolia).
 
 Key Features:
 - Safe dictionary access (no KeyError for missing contigs)
-- Efficient interval overlap detection using intervaltree
-- Memory-efficient storage with __slots__
+- Efficient interval overlap detection on sorted per-contig arrays
+- Memory-efficient struct-of-arrays storage (no object per interval)
 - Type-safe with full type hints
 - Parallel processing support
 """
@@ -16,14 +16,27 @@ Key Features:
 from __future__ import annotations
 
 import logging
+import sys
 from collections import defaultdict
 from dataclasses import dataclass, field
-from typing import Iterator, Optional, Protocol
+from typing import Iterable, Iterator, Optional, Protocol
 
-from intervaltree import Interval, IntervalTree
+import numpy as np
+import pandas as pd
+
+try:
+    import numba
+except ImportError:  # optional (teprof2[performance]); fall back to Python
+    numba = None
+
+from .coords import INT32_MAX, INT32_MIN, search_key
 
 logger = logging.getLogger(__name__)
 
+# Strand encoding of the per-contig arrays (index = code)
+STRANDS = (".", "+", "-")
+_STRAND_CODES = {strand: code for code, strand in enumerate(STRANDS)}
+
 
 @dataclass(slots=True, frozen=True)
 class GenomicInterval:
@@ -42,7 +55,10 @@ class GenomicInterval:
     metadata: dict[str, str] = field(default_factory=dict)
 
     def __post_init__(self) -> None:
-        """Validate interval coordinates."""
+        """Validate interval coordinates and intern the contig name."""
+        # Intervals on one contig share one name object, so chrom
+        # comparisons are identity checks (frozen: set via object)
+        object.__setattr__(self, "chrom", sys.intern(str(self.chrom)))
         if self.start < 0:
             raise ValueError(f"Start position cannot be negative: {self.start}")
         if self.end <= self.start:
@@ -75,6 +91,136 @@ class GenomicInterval:
         return f"{self.chrom}\t{self.start}\t{self.end}\t{self.name}\t{self.score}\t{self.strand}"
 
 
+@dataclass(slots=True)
+class _ContigArrays:
+    """
+    Intervals of one contig as parallel arrays, sorted by start.
+
+    Overlap queries bracket the candidates with ``np.searchsorted``: rows
+    starting at or after the query end are cut off on ``starts``, rows that
+    (like all rows before them) end at or before the query start on
+    ``reach``, the running maximum of the ends. Unlike widening by the
+    longest interval, one long interval does not widen every query.
+    :class:`GenomicInterval` objects are only built for the rows a caller
+    asks for.
+
+    Coordinates are int32 (half the bytes scanned per query) unless a
+    contig has coordinates beyond that range.
+    """
+
+    starts: np.ndarray  # int32 (int64 if needed), 0-based inclusive
+    ends: np.ndarray  # int32 (int64 if needed), 0-based exclusive
+    strands: np.ndarray  # uint8, index into STRANDS
+    names: np.ndarray  # object
+    scores: np.ndarray  # float64
+    metadata: np.ndarray  # object, None where there is no metadata
+    reach: np.ndarray  # same type as ends, max(ends[:i + 1]) (non-decreasing)
+
+    @classmethod
+    def from_rows(
+        cls,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        strands: np.ndarray,
+        names: np.ndarray,
+        scores: np.ndarray,
+        metadata: np.ndarray,
+    ) -> _ContigArrays:
+        """Build from unsorted columns (ties keep their input order)."""
+        order = np.argsort(starts, kind="stable")
+        starts = np.asarray(starts, dtype=np.int64)[order]
+        ends = np.asarray(ends, dtype=np.int64)[order]
+        if not len(starts) or (
+            INT32_MIN <= min(starts.min(), ends.min())
+            and max(starts.max(), ends.max()) <= INT32_MAX
+        ):
+            coordinate_type = np.int32
+        else:
+            coordinate_type = np.int64
+        ends = ends.astype(coordinate_type)
+        return cls(
+            starts=starts.astype(coordinate_type),
+            ends=ends,
+            strands=np.asarray(strands, dtype=np.uint8)[order],
+            names=np.asarray(names, dtype=object)[order],
+            scores=np.asarray(scores, dtype=np.float64)[order],
+            metadata=np.asarray(metadata, dtype=object)[order],
+            reach=np.maximum.accumulate(ends),
+        )
+
+    def __len__(self) -> int:
+        """Number of intervals."""
+        return len(self.starts)
+
+    def concat(self, other: _ContigArrays) -> _ContigArrays:
+        """Merge with another set of intervals (``other`` after ties)."""
+        return _ContigArrays.from_rows(
+            *(
+                np.concatenate([getattr(self, col), getattr(other, col)])
+                for col in ("starts", "ends", "strands", "names", "scores", "metadata")
+            )
+        )
+
+    def overlap_indices(self, start: int, end: int) -> np.ndarray:
+        """Rows overlapping the half-open region ``[start, end)``, by start."""
+        if start >= end:
+            return np.empty(0, dtype=np.int64)
+        right = int(np.searchsorted(self.starts, search_key(self.starts, end), side="left"))
+        left = int(np.searchsorted(self.reach, search_key(self.reach, start), side="right"))
+        idx = np.arange(left, right)
+        return idx[self.ends[left:right] > start]
+
+    def intervals(self, chrom: str, idx: np.ndarray) -> list[GenomicInterval]:
+        """Build GenomicInterval objects for the given rows."""
+        return [
+            GenomicInterval(
+                chrom=chrom,
+                start=start,
+                end=end,
+                strand=STRANDS[strand],
+                name=name,
+                score=score,
+                metadata=metadata if metadata is not None else {},
+            )
+            for start, end, strand, name, score, metadata in zip(
+                self.starts[idx].tolist(),
+                self.ends[idx].tolist(),
+                self.strands[idx].tolist(),
+                self.names[idx].tolist(),
+                self.scores[idx].tolist(),
+                self.metadata[idx].tolist(),
+                strict=True,
+            )
+        ]
+
+
+# Shared placeholder for contigs that only have buffered rows. Never mutate
+# it: concat() and from_rows() always build new arrays.
+_EMPTY_CONTIG = _ContigArrays.from_rows(*(np.empty(0) for _ in range(6)))
+
+
+def _merge_breaks(starts: np.ndarray, ends: np.ndarray, gap: int) -> np.ndarray:
+    """
+    Mark the rows that start a new merged interval.
+
+    Rows must be sorted by start. A row joins the current group when it
+    starts at most ``gap`` bp after the group's furthest end.
+    """
+    breaks = np.zeros(len(starts), dtype=np.bool_)
+    current_end = 0
+    for i in range(len(starts)):
+        if i == 0 or starts[i] > current_end + gap:
+            breaks[i] = True
+            current_end = ends[i]
+        elif ends[i] > current_end:
+            current_end = ends[i]
+    return breaks
+
+
+if numba is not None:
+    _merge_breaks_jit = numba.njit(cache=True, nogil=True)(_merge_breaks)
+
+
 class GenomeIntervalHandler:
     """
     High-performance handler for genomic interval operations.
@@ -82,9 +228,15 @@ class GenomeIntervalHandler:
     Optimized for:
     - Fragmented genomes with thousands of contigs
     - Safe access (no KeyError for missing contigs)
-    - Fast overlap queries using interval trees
+    - Fast overlap queries on sorted per-contig arrays
     - Memory efficiency
 
+    Intervals are stored per contig as parallel NumPy arrays (starts, ends,
+    strand codes, names, scores, metadata) rather than one Python object
+    per interval. Intervals added one at a time are buffered and merged
+    into the arrays on the next query (or all at once by :meth:`freeze`). :class:`GenomicInterval` objects
+    are built on demand for the rows that are returned.
+
     Example:
         >>> handler = GenomeIntervalHandler()
         >>> handler.add_interval("chr1", 1000, 2000, strand="+", name="TE1")
@@ -101,11 +253,10 @@ class GenomeIntervalHandler:
             validate: Whether to validate intervals on insertion
         """
         self.validate = validate
-        # Use defaultdict to avoid KeyError for missing contigs
-        self._intervals: defaultdict[str, IntervalTree] = defaultdict(IntervalTree)
-        self._contig_stats: defaultdict[str, dict[str, int]] = defaultdict(
-            lambda: {"count": 0, "total_bp": 0}
-        )
+        # Contigs in insertion order; missing contigs are looked up with .get
+        self._intervals: dict[str, _ContigArrays] = {}
+        # Rows added by add_interval, not yet merged into the arrays
+        self._pending: defaultdict[str, list[tuple]] = defaultdict(list)
         logger.info("Initialized GenomeIntervalHandler")
 
     def add_interval(
@@ -139,7 +290,6 @@ class GenomeIntervalHandler:
         # Normalize strand notation: 'C' (complement) -> '-'
         if strand == 'C':
             strand = '-'
-
         interval = GenomicInterval(
             chrom=chrom,
             start=start,
@@ -150,15 +300,168 @@ class GenomeIntervalHandler:
             metadata=metadata or {},
         )
 
-        # Add to interval tree
-        self._intervals[chrom].add(Interval(start, end, interval))
-
-        # Update statistics
-        self._contig_stats[chrom]["count"] += 1
-        self._contig_stats[chrom]["total_bp"] += interval.length
+        # Buffer the row under the interval's (interned) contig name; merged
+        # into the contig arrays on the next query
+        chrom = interval.chrom
+        if chrom not in self._intervals:
+            self._intervals[chrom] = _EMPTY_CONTIG
+        self._pending[chrom].append(
+            (start, end, _STRAND_CODES[strand], name, score, interval.metadata or None)
+        )
 
         return interval
 
+    def bulk_load(self, df: pd.DataFrame) -> int:
+        """
+        Add many intervals at once from a table.
+
+        Each contig's arrays are built in one go from all of its rows
+        instead of one ``add`` per interval. Rows must already be valid
+        intervals (``0 <= start < end``; strand '+', '-', '.' or 'C').
+
+        Args:
+            df: Table with ``chrom``, ``start``, ``end`` and optionally
+                ``strand``, ``name`` and ``score`` columns
+
+        Returns:
+            Number of rows loaded
+
+        Raises:
+            ValueError: If validation is enabled and an interval is invalid
+        """
+        n = len(df)
+        starts = df["start"].to_numpy(dtype=np.int64)
+        ends = df["end"].to_numpy(dtype=np.int64)
+        if "strand" in df:
+            # Normalize strand notation: 'C' (complement) -> '-'
+            strands = df["strand"].replace("C", "-").map(_STRAND_CODES)
+            if strands.isna().any():
+                bad = df["strand"][strands.isna()].iloc[0]
+                raise ValueError(f"Invalid strand: {bad}")
+            strands = strands.to_numpy(dtype=np.uint8)
+        else:
+            strands = np.zeros(n, dtype=np.uint8)
+        if self.validate and n:
+            if (starts < 0).any():
+                raise ValueError(f"Start position cannot be negative: {starts.min()}")
+            if (ends <= starts).any():
+                i = int(np.argmax(ends <= starts))
+                raise ValueError(
+                    f"End position ({ends[i]}) must be greater than "
+                    f"start position ({starts[i]})"
+                )
+        names = df["name"].to_numpy(dtype=object) if "name" in df else np.full(n, "", dtype=object)
+        scores = df["score"].to_numpy(dtype=np.float64) if "score" in df else np.zeros(n)
+        metadata = np.full(n, None, dtype=object)
+
+        for chrom, rows in df.groupby("chrom", sort=False, observed=True).indices.items():
+            chrom = sys.intern(str(chrom))
+            arrays = _ContigArrays.from_rows(
+                starts[rows], ends[rows], strands[rows], names[rows], scores[rows], metadata[rows]
+            )
+            existing = self._contig(chrom)
+            self._intervals[chrom] = existing.concat(arrays) if existing else arrays
+
+        return n
+
+    def add_intervals_bulk(
+        self, records: Iterable[tuple[str, int, int, str, str, float]]
+    ) -> int:
+        """
+        Add many intervals given as tuples.
+
+        Replacement for calling :meth:`add_interval` in a loop: the records
+        are collected into a table and loaded with :meth:`bulk_load`, so
+        each contig's arrays are built once and no GenomicInterval is
+        created per record.
+
+        Args:
+            records: ``(chrom, start, end, strand, name, score)`` tuples
+
+        Returns:
+            Number of records loaded
+
+        Raises:
+            ValueError: If validation is enabled and an interval is invalid
+        """
+        df = pd.DataFrame(
+            list(records), columns=["chrom", "start", "end", "strand", "name", "score"]
+        )
+        return self.bulk_load(df)
+
+    def freeze(self) -> None:
+        """
+        Merge all buffered intervals into the contig arrays.
+
+        Queries do this per contig on first use. Call it once after loading
+        and before querying from several threads, so that queries only read.
+        """
+        for chrom in list(self._pending):
+            self._contig(chrom)
+
+    def _contig(self, chrom: str) -> Optional[_ContigArrays]:
+        """Arrays of a contig with buffered rows merged in (None if unknown)."""
+        pending = self._pending.pop(chrom, None)
+        if pending:
+            self._intervals[chrom] = self._intervals[chrom].concat(
+                _ContigArrays.from_rows(*zip(*pending, strict=True))
+            )
+        return self._intervals.get(chrom)
+
+    def overlap_indices(
+        self,
+        chrom: str,
+        start: int,
+        end: int,
+        strand: Optional[str] = None,
+    ) -> np.ndarray:
+        """
+        Find rows of a contig overlapping the query region.
+
+        Row indices are positions in the contig's start-sorted arrays and
+        can be turned into intervals with :meth:`get_interval`.
+
+        Args:
+            chrom: Chromosome/contig name
+            start: Query start position
+            end: Query end position
+            strand: Optional strand filter ('+', '-', or None for both)
+
+        Returns:
+            Array of row indices, ordered by start
+            Returns an empty array if contig not found (no KeyError!)
+        """
+        arrays = self._contig(chrom)
+        if not arrays:
+            return np.empty(0, dtype=np.int64)
+
+        idx = arrays.overlap_indices(start, end)
+        if strand is not None:
+            code = _STRAND_CODES.get(strand)
+            if code is None:
+                return np.empty(0, dtype=np.int64)
+            idx = idx[arrays.strands[idx] == code]
+        return idx
+
+    def get_interval(self, chrom: str, idx: int) -> GenomicInterval:
+        """
+        Build the GenomicInterval for one row of a contig.
+
+        Args:
+            chrom: Chromosome/contig name
+            idx: Row index (e.g. from :meth:`overlap_indices`)
+
+        Returns:
+            GenomicInterval for that row
+
+        Raises:
+            IndexError: If the contig has no such row
+        """
+        arrays = self._contig(chrom)
+        if not arrays or not -len(arrays) <= idx < len(arrays):
+            raise IndexError(f"No interval {idx} on contig '{chrom}'")
+        return arrays.intervals(chrom, np.array([idx]))[0]
+
     def find_overlaps(
         self,
         chrom: str,
@@ -176,24 +479,17 @@ class GenomeIntervalHandler:
             strand: Optional strand filter ('+', '-', or None for both)
 
         Returns:
-            List of overlapping GenomicInterval objects
+            List of overlapping GenomicInterval objects, ordered by start
             Returns empty list if contig not found (no KeyError!)
         """
-        # Safe access - returns empty IntervalTree if contig doesn't exist
-        tree = self._intervals.get(chrom, IntervalTree())
+        # Safe access - unknown contigs have no arrays
+        arrays = self._contig(chrom)
 
-        if not tree:
+        if not arrays:
             logger.debug(f"No intervals found for contig '{chrom}'")
             return []
 
-        overlapping = tree.overlap(start, end)
-        intervals = [interval_obj.data for interval_obj in overlapping]
-
-        # Filter by strand if specified
-        if strand is not None:
-            intervals = [iv for iv in intervals if iv.strand == strand]
-
-        return intervals
+        return arrays.intervals(chrom, self.overlap_indices(chrom, start, end, strand))
 
     def get_contig_intervals(
         self, chrom: str, strand: Optional[str] = None
@@ -206,20 +502,21 @@ class GenomeIntervalHandler:
             strand: Optional strand filter
 
         Returns:
-            List of GenomicInterval objects
+            List of GenomicInterval objects, ordered by start
             Returns empty list if contig not found (no KeyError!)
         """
-        tree = self._intervals.get(chrom, IntervalTree())
-        intervals = [interval_obj.data for interval_obj in tree]
+        arrays = self._contig(chrom)
+        if not arrays:
+            return []
 
+        idx = np.arange(len(arrays))
         if strand is not None:
-            intervals = [iv for iv in intervals if iv.strand == strand]
-
-        return intervals
+            idx = idx[arrays.strands == _STRAND_CODES.get(strand, len(STRANDS))]
+        return arrays.intervals(chrom, idx)
 
     def has_contig(self, chrom: str) -> bool:
         """Check if a contig exists in the handler."""
-        return chrom in self._intervals and len(self._intervals[chrom]) > 0
+        return bool(self._contig(chrom))
 
     def get_contigs(self) -> list[str]:
         """Get list of all contig names."""
@@ -229,6 +526,9 @@ class GenomeIntervalHandler:
         """
         Get statistics for a contig.
 
+        Computed from the contig arrays when asked for, so insertions do
+        no bookkeeping.
+
         Args:
             chrom: Chromosome/contig name
 
@@ -236,11 +536,17 @@ class GenomeIntervalHandler:
             Dictionary with 'count' and 'total_bp' keys
             Returns zeros if contig not found (no KeyError!)
         """
-        return self._contig_stats.get(chrom, {"count": 0, "total_bp": 0})
+        arrays = self._contig(chrom)
+        if not arrays:
+            return {"count": 0, "total_bp": 0}
+        return {
+            "count": len(arrays),
+            "total_bp": int(arrays.ends.sum(dtype=np.int64) - arrays.starts.sum(dtype=np.int64)),
+        }
 
     def get_all_stats(self) -> dict[str, dict[str, int]]:
         """Get statistics for all contigs."""
-        return dict(self._contig_stats)
+        return {chrom: self.get_contig_stats(chrom) for chrom in self._intervals}
 
     def count_intervals(self, chrom: Optional[str] = None) -> int:
         """
@@ -253,8 +559,12 @@ class GenomeIntervalHandler:
             Number of intervals
         """
         if chrom is None:
-            return sum(len(tree) for tree in self._intervals.values())
-        return len(self._intervals.get(chrom, IntervalTree()))
+            return sum(len(arrays) for arrays in self._intervals.values()) + sum(
+                len(rows) for rows in self._pending.values()
+            )
+        return len(self._intervals.get(chrom, _EMPTY_CONTIG)) + len(
+            self._pending.get(chrom, ())
+        )
 
     def clear(self, chrom: Optional[str] = None) -> None:
         """
@@ -265,12 +575,12 @@ class GenomeIntervalHandler:
         """
         if chrom is None:
             self._intervals.clear()
-            self._contig_stats.clear()
+            self._pending.clear()
             logger.info("Cleared all intervals")
         else:
             if chrom in self._intervals:
                 del self._intervals[chrom]
-                del self._contig_stats[chrom]
+                self._pending.pop(chrom, None)
                 logger.info(f"Cleared intervals for contig '{chrom}'")
 
     def merge_intervals(
@@ -279,6 +589,12 @@ class GenomeIntervalHandler:
         """
         Merge overlapping/adjacent intervals.
 
+        Groups are found on the contig's start-sorted arrays (compiled with
+        Numba when installed). Merged intervals keep the first interval's
+        strand, join the names with ``,``, take the highest score and merge
+        the metadata (later intervals win). Only one GenomicInterval is
+        built per merged group.
+
         Args:
             chrom: Chromosome/contig name
             strand: Optional strand filter
@@ -287,40 +603,54 @@ class GenomeIntervalHandler:
         Returns:
             List of merged GenomicInterval objects
         """
-        tree = self._intervals.get(chrom, IntervalTree())
-        if not tree:
+        arrays = self._contig(chrom)
+        if not arrays:
             return []
 
-        # Get intervals for this contig/strand
-        intervals = self.get_contig_intervals(chrom, strand)
-        if not intervals:
+        idx = np.arange(len(arrays))
+        if strand is not None:
+            idx = idx[arrays.strands == _STRAND_CODES.get(strand, len(STRANDS))]
+        if not len(idx):
             return []
 
-        # Sort by start position
-        intervals.sort(key=lambda x: x.start)
+        starts = arrays.starts[idx]
+        ends = arrays.ends[idx]
+        if numba is not None:
+            breaks = _merge_breaks_jit(starts, ends, gap)
+        else:
+            breaks = _merge_breaks(starts.tolist(), ends.tolist(), gap)
+
+        first = np.flatnonzero(breaks)
+        bounds = np.append(first, len(idx)).tolist()
+        names = arrays.names[idx].tolist()
+        metadata = arrays.metadata[idx].tolist()
 
         merged = []
-        current = intervals[0]
-
-        for next_interval in intervals[1:]:
-            # Check if intervals should be merged
-            if next_interval.start <= current.end + gap:
-                # Merge: extend current interval
-                current = GenomicInterval(
-                    chrom=current.chrom,
-                    start=current.start,
-                    end=max(current.end, next_interval.end),
-                    strand=current.strand,
-                    name=f"{current.name},{next_interval.name}",
-                    score=max(current.score, next_interval.score),
-                    metadata={**current.metadata, **next_interval.metadata},
+        for group, (start, end, strand_code, score) in enumerate(
+            zip(
+                starts[first].tolist(),
+                np.maximum.reduceat(ends, first).tolist(),
+                arrays.strands[idx[first]].tolist(),
+                np.maximum.reduceat(arrays.scores[idx], first).tolist(),
+                strict=True,
+            )
+        ):
+            lo, hi = bounds[group], bounds[group + 1]
+            merged_metadata = {}
+            for item in metadata[lo:hi]:
+                if item:
+                    merged_metadata.update(item)
+            merged.append(
+                GenomicInterval(
+                    chrom=chrom,
+                    start=start,
+                    end=end,
+                    strand=STRANDS[strand_code],
+                    name=",".join(map(str, names[lo:hi])) if hi - lo > 1 else names[lo],
+                    score=score,
+                    metadata=merged_metadata,
                 )
-            else:
-                # No overlap: save current and start new
-                merged.append(current)
-                current = next_interval
-
-        merged.append(current)
+            )
         return merged
 
     def to_bed_file(self, output_path: str, chrom: Optional[str] = None) -> None:
@@ -0,0 +1,274 @@
+"""
+Table I/O helpers - write result tables with Arrow's C++ writers.
+
+The output format is chosen from the file suffix:
+- ``.parquet``: Parquet with zstd compression (columnar, typed)
+- ``.zst``: zstd-compressed tab-separated text (e.g. ``.tsv.zst``)
+- anything else: tab-separated text via ``pyarrow.csv`` (multithreaded,
+  releases the GIL)
+
+``compact_dtypes`` narrows the well-known result columns before they are
+merged, grouped and written. ``ParquetRecordWriter`` appends per-sample
+summary records to a Parquet file as they arrive. ``write_json`` writes
+per-sample summary documents, through orjson when it is installed.
+``atomic_write`` persists the on-disk caches kept next to reference files.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Callable, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+try:
+    import orjson
+except ImportError:  # optional (teprof2[performance]); fall back to json
+    orjson = None
+
+from .coords import INT32_MAX
+
+logger = logging.getLogger(__name__)
+
+# Expression columns that only need single precision
+FLOAT32_COLUMNS = ("tpm", "fpkm", "tpm_fraction")
+
+# Genomic coordinates (fit int32 on any real contig)
+COORDINATE_COLUMNS = ("start", "end")
+
+# Low-cardinality strings repeated on every row
+CATEGORY_COLUMNS = ("chrom", "strand")
+
+
+def compact_dtypes(df: pd.DataFrame | pa.Table) -> pd.DataFrame | pa.Table:
+    """
+    Narrow annotation/expression columns to the smallest adequate dtypes.
+
+    - ``has_te_promoter`` -> bool
+    - ``n_te_overlaps`` -> smallest unsigned integer type
+    - ``transcript_id``/``chrom``/``strand`` -> category / dictionary (kept
+      if already encoded)
+    - ``start``/``end`` -> int32 (kept if a value does not fit)
+    - ``tpm``/``fpkm``/``tpm_fraction`` -> float32
+
+    Columns that are absent are skipped, so this works for annotation,
+    transcript and gene tables alike.
+
+    Args:
+        df: DataFrame or Arrow table to compact (not modified)
+
+    Returns:
+        Same type as the input, with narrowed columns
+    """
+    if isinstance(df, pa.Table):
+        return _compact_table(df)
+
+    columns = {}
+
+    if "has_te_promoter" in df:
+        columns["has_te_promoter"] = df["has_te_promoter"].astype(bool)
+    if "n_te_overlaps" in df:
+        columns["n_te_overlaps"] = pd.to_numeric(
+            df["n_te_overlaps"], downcast="unsigned"
+        )
+    for col in ("transcript_id", *CATEGORY_COLUMNS):
+        if col in df and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            columns[col] = df[col].astype("category")
+    for col in COORDINATE_COLUMNS:
+        if (
+            col in df
+            and pd.api.types.is_integer_dtype(df[col].dtype)
+            and (df[col].empty or df[col].abs().max() <= INT32_MAX)
+        ):
+            columns[col] = df[col].astype("int32")
+    for col in FLOAT32_COLUMNS:
+        if col in df:
+            columns[col] = df[col].astype("float32")
+
+    return df.assign(**columns)
+
+
+def _compact_table(table: pa.Table) -> pa.Table:
+    """Arrow version of :func:`compact_dtypes`."""
+    columns = {}
+
+    if "has_te_promoter" in table.column_names:
+        columns["has_te_promoter"] = pc.cast(table["has_te_promoter"], pa.bool_())
+    if "n_te_overlaps" in table.column_names:
+        min_value = pc.min(table["n_te_overlaps"]).as_py() or 0
+        max_value = pc.max(table["n_te_overlaps"]).as_py() or 0
+        if min_value >= 0:
+            narrow = next(
+                t
+                for t in (pa.uint8(), pa.uint16(), pa.uint32(), pa.uint64())
+                if max_value < 1 << t.bit_width
+            )
+            columns["n_te_overlaps"] = pc.cast(table["n_te_overlaps"], narrow)
+    for col in ("transcript_id", *CATEGORY_COLUMNS):
+        if col in table.column_names and not pa.types.is_dictionary(
+            table.schema.field(col).type
+        ):
+            columns[col] = pc.dictionary_encode(table[col])
+    for col in COORDINATE_COLUMNS:
+        if col in table.column_names and pa.types.is_integer(table.schema.field(col).type):
+            max_abs = pc.max(pc.abs(table[col])).as_py() or 0
+            if max_abs <= INT32_MAX:
+                columns[col] = pc.cast(table[col], pa.int32())
+    for col in FLOAT32_COLUMNS:
+        if col in table.column_names:
+            columns[col] = pc.cast(table[col], pa.float32())
+
+    for name, column in columns.items():
+        table = table.set_column(table.schema.get_field_index(name), name, column)
+    return table
+
+
+def atomic_write(path: Path, writer: Callable[[Path], None]) -> bool:
+    """
+    Write a cache file through a private temporary file and rename it.
+
+    ``writer`` writes the complete file to the temporary path it is given,
+    which is then renamed over ``path``. Concurrent workers therefore never
+    read a half-written cache. Caches are an optimization, so failing to
+    write one (e.g. read-only reference directory) is logged and not an
+    error.
+
+    Args:
+        path: Final cache path
+        writer: Callable writing the file to the given temporary path
+
+    Returns:
+        True if the file was written
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        writer(tmp_path)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.debug(f"Could not write cache {path}: {e}")
+        tmp_path.unlink(missing_ok=True)
+        return False
+    return True
+
+
+def write_json(obj: dict, path: Path) -> None:
+    """
+    Write a JSON document with 2-space indentation.
+
+    Uses orjson (C, also serializes NumPy scalars) when available,
+    otherwise the standard library. orjson writes NaN as ``null``.
+
+    Args:
+        obj: JSON-serializable mapping
+        path: Output path
+    """
+    path = Path(path)
+    if orjson is not None:
+        path.write_bytes(
+            orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+        )
+        return
+
+    with open(path, "w") as f:
+        json.dump(obj, f, indent=2)
+
+
+def write_table(df: pd.DataFrame | pa.Table, path: Path) -> None:
+    """
+    Write a DataFrame (or Arrow table) to disk, dispatching on the file suffix.
+
+    TSV output has an unquoted header and unquoted values, matching
+    ``DataFrame.to_csv(sep="\\t", index=False)`` apart from boolean
+    spelling (``true``/``false``). A ``.zst`` suffix compresses the text
+    stream with zstd; read it back with ``pyarrow.csv.read_csv`` or
+    ``pd.read_csv(path, sep="\\t")`` (needs the zstandard package).
+
+    Args:
+        df: DataFrame (index is dropped) or Arrow table to write
+        path: Output path (``.parquet``, ``.tsv.zst`` or tab-separated text)
+    """
+    path = Path(path)
+    if isinstance(df, pa.Table):
+        table = df
+    else:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+
+    if path.suffix == ".parquet":
+        pq.write_table(table, path, compression="zstd")
+        return
+
+    if path.suffix == ".zst":
+        stream = pa.CompressedOutputStream(str(path), "zstd")
+    else:
+        stream = open(path, "wb")
+
+    with stream as f:
+        f.write(("\t".join(table.column_names) + "\n").encode())
+        pacsv.write_csv(
+            table,
+            f,
+            write_options=pacsv.WriteOptions(
+                include_header=False, delimiter="\t", quoting_style="none"
+            ),
+        )
+
+
+class ParquetRecordWriter:
+    """
+    Append dict records to a Parquet file, one row group per record.
+
+    Records are written as they arrive instead of being collected in
+    memory. The file is created on the first write, so nothing is written
+    when there are no records. Parquet files are only readable once the
+    footer is written by :meth:`close`.
+
+    Example:
+        >>> with ParquetRecordWriter(Path("summary.parquet")) as writer:
+        ...     for summary in results:
+        ...         writer.write(summary)
+    """
+
+    def __init__(self, path: Path, schema: Optional[pa.Schema] = None):
+        """
+        Initialize writer.
+
+        Args:
+            path: Output Parquet file
+            schema: Record schema (default: inferred from the first record;
+                later records are cast to it, missing keys become null)
+        """
+        self.path = Path(path)
+        self.schema = schema
+        self.n_records = 0
+        self._writer: Optional[pq.ParquetWriter] = None
+
+    def write(self, record: dict) -> None:
+        """Append a single record."""
+        table = pa.Table.from_pylist([record], schema=self.schema)
+        if self._writer is None:
+            self.schema = table.schema
+            self._writer = pq.ParquetWriter(self.path, self.schema, compression="zstd")
+        self._writer.write_table(table)
+        self.n_records += 1
+
+    def close(self) -> None:
+        """Write the Parquet footer and close the file."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self) -> ParquetRecordWriter:
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        """Context manager exit."""
+        self.close()
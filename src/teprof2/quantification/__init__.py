@@ -1,5 +1,21 @@
 """TE quantification functionality."""
 
-from teprof2.quantification.tpm_calculator import ExpressionQuantifier, QuantificationConfig
+from teprof2.quantification.tpm_calculator import (
+    ExpressionQuantifier,
+    QuantificationConfig,
+    load_gtf_transcripts,
+)
+from teprof2.quantification.merge import (
+    merge_annotation_expression,
+    merge_te_promoter_parquet,
+    transcript_id_dtype,
+)
 
-__all__ = ["ExpressionQuantifier", "QuantificationConfig"]
+__all__ = [
+    "ExpressionQuantifier",
+    "QuantificationConfig",
+    "load_gtf_transcripts",
+    "merge_annotation_expression",
+    "merge_te_promoter_parquet",
+    "transcript_id_dtype",
+]
@@ -0,0 +1,240 @@
+"""
+Annotation/expression merge helpers.
+
+Joins TE annotation tables with expression tables on ``transcript_id``.
+The key is factorized once into a shared categorical dtype so the join
+hashes integer codes instead of Python strings. Large joins can be split
+by chromosome into small, cache-resident joins run on a thread pool.
+
+``merge_te_promoter_parquet`` runs the TE-promoter join, filter and Parquet
+write as a single DuckDB query when DuckDB is installed.
+"""
+
+from __future__ import annotations
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from ..core.table_io import write_table
+
+try:
+    import duckdb
+except ImportError:  # optional (teprof2[performance]); fall back to pandas
+    duckdb = None
+
+logger = logging.getLogger(__name__)
+
+
+def transcript_id_dtype(annotation_df: pd.DataFrame) -> pd.CategoricalDtype:
+    """
+    Get the categorical dtype for ``transcript_id``.
+
+    Reuses the existing categories when the column is already categorical
+    (e.g. read back from a shared Parquet file).
+
+    Args:
+        annotation_df: Annotation DataFrame with a transcript_id column
+
+    Returns:
+        Categorical dtype covering every annotated transcript
+    """
+    tid = annotation_df["transcript_id"]
+    if isinstance(tid.dtype, pd.CategoricalDtype):
+        return tid.dtype
+    return pd.CategoricalDtype(tid.unique())
+
+
+def merge_annotation_expression(
+    annotation_df: pd.DataFrame,
+    transcript_df: pd.DataFrame,
+    tid_dtype: Optional[pd.CategoricalDtype] = None,
+    n_threads: int = 1,
+) -> pd.DataFrame:
+    """
+    Inner-join annotation and expression tables on transcript_id.
+
+    Both sides are cast to the same categorical dtype so the join runs on
+    integer codes. Transcripts missing from the annotation are dropped.
+
+    With ``n_threads > 1`` and a ``chrom`` column on both sides, the join
+    runs per chromosome on a thread pool (pandas releases the GIL in the
+    join kernels) and the parts are concatenated back in annotation order.
+    Transcripts are then only matched within their chromosome, and
+    one-to-one validation is per chromosome.
+
+    Args:
+        annotation_df: TE annotation (one row per transcript)
+        transcript_df: Expression quantification (one row per transcript)
+        tid_dtype: Shared transcript_id dtype (default: from annotation_df).
+            Pass the full annotation's dtype when annotation_df is a filtered
+            subset, otherwise unmatched expression rows become NaN keys.
+        n_threads: Threads for per-chromosome joins (1 = single global join)
+
+    Returns:
+        Merged DataFrame
+
+    Raises:
+        pandas.errors.MergeError: If transcript_id is duplicated on either side
+    """
+    if tid_dtype is None:
+        tid_dtype = transcript_id_dtype(annotation_df)
+
+    annotation_df = annotation_df.assign(
+        transcript_id=annotation_df["transcript_id"].astype(tid_dtype)
+    )
+    transcript_df = transcript_df.assign(
+        transcript_id=transcript_df["transcript_id"].astype(tid_dtype)
+    )
+
+    if n_threads > 1 and "chrom" in annotation_df and "chrom" in transcript_df:
+        return _merge_by_chrom(annotation_df, transcript_df, n_threads)
+
+    return annotation_df.merge(
+        transcript_df,
+        on="transcript_id",
+        how="inner",
+        validate="one_to_one",
+    )
+
+
+def _merge_by_chrom(
+    annotation_df: pd.DataFrame, transcript_df: pd.DataFrame, n_threads: int
+) -> pd.DataFrame:
+    """
+    Join per chromosome on a thread pool and restore annotation order.
+
+    Args:
+        annotation_df: Annotation with categorical transcript_id
+        transcript_df: Expression with the same transcript_id dtype
+        n_threads: Maximum number of threads
+
+    Returns:
+        Merged DataFrame, rows in annotation order
+    """
+    annotation_df = annotation_df.assign(_row=np.arange(len(annotation_df)))
+    expression_by_chrom = dict(
+        tuple(transcript_df.groupby("chrom", sort=False, observed=True))
+    )
+
+    def merge_chrom(item: tuple) -> pd.DataFrame:
+        chrom, annotation_part = item
+        expression_part = expression_by_chrom.get(chrom, transcript_df.iloc[:0])
+        return annotation_part.merge(
+            expression_part,
+            on="transcript_id",
+            how="inner",
+            validate="one_to_one",
+        )
+
+    groups = list(annotation_df.groupby("chrom", sort=False, observed=True))
+    if not groups:  # empty annotation: nothing to split
+        groups = [(None, annotation_df)]
+
+    with ThreadPoolExecutor(max_workers=min(n_threads, len(groups))) as pool:
+        parts = list(pool.map(merge_chrom, groups))
+
+    merged = pd.concat(parts, ignore_index=True)
+    return merged.sort_values("_row", kind="stable", ignore_index=True).drop(columns="_row")
+
+
+def merge_te_promoter_parquet(
+    annotation_path: Path,
+    transcript_table: pa.Table,
+    output_path: Path,
+    n_threads: int = 1,
+    annotation_df: Optional[pd.DataFrame] = None,
+) -> None:
+    """
+    Join TE-promoter annotations with expression and write them to Parquet.
+
+    With DuckDB installed this is one ``COPY (SELECT ... JOIN ... WHERE
+    has_te_promoter) TO ... (FORMAT PARQUET)`` query: the annotation Parquet
+    is scanned with the filter pushed down, the expression table is read
+    from Arrow without a copy, and the result is written from C++. Without
+    DuckDB it falls back to :func:`merge_annotation_expression`.
+
+    The output matches the pandas merge: annotation rows in file order,
+    columns present on both sides suffixed ``_x``/``_y``, and duplicated
+    transcript_ids are rejected instead of silently multiplying rows.
+
+    Args:
+        annotation_path: Annotation Parquet file (with has_te_promoter)
+        transcript_table: Expression quantification (one row per transcript)
+        output_path: Output Parquet file
+        n_threads: Threads for the join
+        annotation_df: Annotation already in memory (pandas fallback only,
+            saves re-reading annotation_path)
+
+    Raises:
+        pandas.errors.MergeError: If transcript_id is duplicated on either side
+    """
+    if duckdb is None:
+        if annotation_df is None:
+            annotation_df = pd.read_parquet(annotation_path)
+        merged = merge_annotation_expression(
+            annotation_df.loc[annotation_df["has_te_promoter"]],
+            transcript_table.to_pandas(),
+            transcript_id_dtype(annotation_df),
+            n_threads=n_threads,
+        )
+        write_table(merged, output_path)
+        return
+
+    # DuckDB has no merge validation; check key uniqueness on both sides
+    annotation_ids = pq.read_table(annotation_path, columns=["transcript_id"])["transcript_id"]
+    for side, ids in (("left", annotation_ids), ("right", transcript_table["transcript_id"])):
+        if not _is_unique(ids):
+            raise pd.errors.MergeError(
+                f"Merge keys are not unique in {side} dataset; not a one-to-one merge"
+            )
+
+    annotation_columns = pq.read_schema(annotation_path).names
+    expression_columns = transcript_table.column_names
+    shared = set(annotation_columns) & set(expression_columns) - {"transcript_id"}
+
+    def select(alias: str, columns: list[str], suffix: str) -> list[str]:
+        return [
+            f'{alias}."{col}" AS "{col}{suffix}"' if col in shared else f'{alias}."{col}"'
+            for col in columns
+            if not (alias == "e" and col == "transcript_id")
+        ]
+
+    select_list = ", ".join(
+        select("a", annotation_columns, "_x") + select("e", expression_columns, "_y")
+    )
+
+    def quote(path: Path) -> str:
+        return "'" + str(path).replace("'", "''") + "'"
+
+    query = f"""
+        COPY (
+            SELECT {select_list}
+            FROM read_parquet({quote(annotation_path)}, file_row_number = true) AS a
+            JOIN expr AS e ON a.transcript_id = e.transcript_id
+            WHERE a.has_te_promoter
+            ORDER BY a.file_row_number
+        ) TO {quote(output_path)} (FORMAT PARQUET, COMPRESSION ZSTD)
+    """
+
+    con = duckdb.connect()
+    try:
+        con.execute(f"SET threads TO {max(n_threads, 1)}")
+        con.register("expr", transcript_table)
+        con.execute(query)
+    finally:
+        con.close()
+
+
+def _is_unique(ids: pa.ChunkedArray) -> bool:
+    """Whether an Arrow key column has no duplicates (nulls count as a value)."""
+    if pa.types.is_dictionary(ids.type):
+        ids = ids.cast(ids.type.value_type)
+    return pc.count_distinct(ids, mode="all").as_py() == len(ids)
@@ -7,24 +7,62 @@ Key improvements:
 - Accurate TPM/FPKM calculation for non-model organisms
 - Safe handling of missing data
 - Efficient computation with numpy/pandas
+- Arrow-native path (``quantify_table``) that keeps results in Arrow buffers
 - Type safety and validation
 """
 
 from __future__ import annotations
 
+import itertools
 import logging
-from dataclasses import dataclass
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, replace
 from pathlib import Path
 from typing import Optional
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 import pysam
 
+from ..core.table_io import atomic_write, write_table
+
 logger = logging.getLogger(__name__)
 
+# Bump when the columns produced by load_gtf_transcripts change, so stale
+# ``<gtf>.transcripts.parquet`` caches are rebuilt
+TRANSCRIPT_CACHE_VERSION = b"2"
+
+# transcript_id, gene_id and gene_name: the first quoted value of each key
+# anywhere in the attribute column (attribute order varies between GTF
+# sources). Unanchored RE2 searches, run by Arrow on whole batches
+GTF_ID_PATTERNS = {
+    key: f'{key} "(?P<{key}>[^"]+)"' for key in ("transcript_id", "gene_id", "gene_name")
+}
+
+# Block size when streaming a GTF for its transcript rows (bounds peak memory)
+GTF_STREAM_BLOCK_SIZE = 16 << 20
+
+# Reads converted to arrays at a time by the per-contig read sweep
+READ_SWEEP_BLOCK = 1 << 20
+
+# Jobs per worker process when quantifying contigs on a process pool
+# (several per process so uneven contigs balance out)
+JOBS_PER_PROCESS = 4
 
-@dataclass
+# Reads bam.pileup skips (its default "all" stepper): unmapped, secondary,
+# QC fail and duplicate; and orphans, i.e. paired but not a proper pair
+PILEUP_SKIP_FLAGS = 0x4 | 0x100 | 0x200 | 0x400
+BAM_FPAIRED = 0x1
+PAIRED_FLAGS = BAM_FPAIRED | 0x2
+
+
+@dataclass(slots=True)
 class QuantificationConfig:
     """Configuration for expression quantification."""
 
@@ -34,6 +72,11 @@ class QuantificationConfig:
     min_mapq: int = 255  # Minimum mapping quality (use 60 for HISAT2)
     stranded: bool = False  # Whether library is stranded
     count_mode: str = "union"  # How to count overlapping reads
+    bam_threads: int = 1  # htslib threads for BGZF decompression
+    per_chrom_threads: int = 1  # Threads counting contigs in parallel
+    per_chrom_processes: int = 1  # Processes counting contigs in parallel (-1 = all CPUs)
+    transcripts: Optional[pd.DataFrame] = None  # Pre-loaded GTF transcripts (skips GTF parse)
+    cache_transcripts: bool = False  # Reuse/write <gtf_file>.transcripts.parquet
     validate_inputs: bool = True
 
     def __post_init__(self) -> None:
@@ -53,6 +96,137 @@ class QuantificationConfig:
                 )
 
 
+def load_gtf_transcripts(gtf_file: Path, cache: bool = False) -> pd.DataFrame:
+    """
+    Load GTF file and extract transcript information.
+
+    The result can be passed as ``QuantificationConfig.transcripts`` to
+    quantify several BAM files against one GTF without re-parsing it.
+
+    With ``cache=True`` the parsed table is persisted as
+    ``<gtf_file>.transcripts.parquet`` and loaded from there while it is
+    newer than the GTF. The cache is written with
+    :func:`~teprof2.core.table_io.atomic_write`.
+
+    Args:
+        gtf_file: GTF file (e.g. StringTie assembly)
+        cache: Load from / save to the Parquet cache next to the GTF
+
+    Returns:
+        DataFrame with transcript annotations
+    """
+    if not cache:
+        return _parse_gtf_transcripts(gtf_file)
+
+    cache_path = Path(str(gtf_file) + ".transcripts.parquet")
+    transcripts = _load_transcript_cache(cache_path, gtf_file)
+    if transcripts is not None:
+        logger.info(f"Loaded GTF transcripts from {cache_path}")
+        return transcripts
+
+    transcripts = _parse_gtf_transcripts(gtf_file)
+
+    table = pa.Table.from_pandas(transcripts)
+    table = table.replace_schema_metadata(
+        {**table.schema.metadata, b"teprof2_cache_version": TRANSCRIPT_CACHE_VERSION}
+    )
+    if atomic_write(
+        cache_path, lambda tmp_path: pq.write_table(table, tmp_path, compression="zstd")
+    ):
+        logger.info(f"Saved GTF transcripts to {cache_path}")
+    return transcripts
+
+
+def _load_transcript_cache(cache_path: Path, gtf_file: Path) -> Optional[pd.DataFrame]:
+    """Load the transcript cache if it is fresh and current, else None."""
+    try:
+        if cache_path.stat().st_mtime < Path(gtf_file).stat().st_mtime:
+            return None
+        metadata = pq.read_schema(cache_path).metadata or {}
+        if metadata.get(b"teprof2_cache_version") != TRANSCRIPT_CACHE_VERSION:
+            return None
+        return pd.read_parquet(cache_path)
+    except Exception:  # missing, stale or unreadable cache: re-parse
+        return None
+
+
+def _parse_gtf_transcripts(gtf_file: Path) -> pd.DataFrame:
+    """
+    Parse the transcript rows of a GTF file (see load_gtf_transcripts).
+
+    The file is streamed through Arrow's CSV reader a block at a time and
+    only transcript rows are kept, so exon rows are never converted to
+    pandas. GTF has no quoting; comment lines are dropped (short ones by
+    the column count check).
+    """
+    columns = [
+        "seqname",
+        "source",
+        "feature",
+        "start",
+        "end",
+        "score",
+        "strand",
+        "frame",
+        "attribute",
+    ]
+
+    # source, score and frame are not used; skip converting them
+    schema = pa.schema(
+        [
+            ("seqname", pa.string()),
+            ("feature", pa.string()),
+            ("start", pa.int64()),
+            ("end", pa.int64()),
+            ("strand", pa.string()),
+            ("attribute", pa.string()),
+        ]
+    )
+    if Path(gtf_file).stat().st_size == 0:  # Arrow rejects empty files
+        batches = []
+    else:
+        batches = pacsv.open_csv(
+            gtf_file,
+            read_options=pacsv.ReadOptions(
+                column_names=columns, block_size=GTF_STREAM_BLOCK_SIZE
+            ),
+            parse_options=pacsv.ParseOptions(
+                delimiter="\t", quote_char=False, invalid_row_handler=lambda row: "skip"
+            ),
+            convert_options=pacsv.ConvertOptions(
+                column_types=dict(zip(schema.names, schema.types)),
+                include_columns=schema.names,
+            ),
+        )
+
+    # Filter for transcripts only and parse attributes (in Arrow, no
+    # Python per row)
+    output_schema = pa.schema(
+        [*schema, *(pa.field(key, pa.string()) for key in GTF_ID_PATTERNS)]
+    )
+    kept = []
+    for batch in batches:
+        batch = batch.filter(
+            pc.and_(
+                pc.equal(batch.column("feature"), "transcript"),
+                pc.invert(pc.starts_with(batch.column("seqname"), "#")),
+            )
+        )
+        ids = [
+            pc.struct_field(pc.extract_regex(batch.column("attribute"), pattern), [0])
+            for pattern in GTF_ID_PATTERNS.values()
+        ]
+        kept.append(pa.RecordBatch.from_arrays(batch.columns + ids, schema=output_schema))
+    transcripts = pa.Table.from_batches(kept, schema=output_schema).to_pandas(
+        self_destruct=True
+    )
+
+    # Calculate transcript length
+    transcripts["length"] = transcripts["end"] - transcripts["start"] + 1
+
+    return transcripts
+
+
 class ExpressionQuantifier:
     """
     Expression quantifier for RNA-seq data.
@@ -74,202 +248,324 @@ class ExpressionQuantifier:
             config: Quantification configuration
         """
         self.config = config
-        self.bam = pysam.AlignmentFile(str(config.bam_file), "rb")
-
-        # Load GTF annotations
-        self.transcripts = self._load_gtf()
+        self.bam = pysam.AlignmentFile(
+            str(config.bam_file), "rb", threads=max(1, config.bam_threads)
+        )
 
-        logger.info(f"Loaded {len(self.transcripts)} transcripts from GTF")
+        # Load GTF annotations (unless the caller parsed them already)
+        if config.transcripts is not None:
+            self.transcripts = config.transcripts
+            logger.info(f"Using {len(self.transcripts)} pre-loaded transcripts")
+        else:
+            self.transcripts = load_gtf_transcripts(
+                config.gtf_file, cache=config.cache_transcripts
+            )
+            logger.info(f"Loaded {len(self.transcripts)} transcripts from GTF")
 
-    def _load_gtf(self) -> pd.DataFrame:
+    def quantify_all(self) -> pd.DataFrame:
         """
-        Load GTF file and extract transcript information.
+        Quantify expression for all transcripts.
 
         Returns:
-            DataFrame with transcript annotations
+            DataFrame with quantification results
         """
-        columns = [
-            "seqname",
-            "source",
-            "feature",
-            "start",
-            "end",
-            "score",
-            "strand",
-            "frame",
-            "attribute",
-        ]
-
-        df = pd.read_csv(
-            self.config.gtf_file,
-            sep="\t",
-            comment="#",
-            names=columns,
-            dtype={"seqname": str, "start": int, "end": int, "strand": str},
-        )
+        logger.info("Starting expression quantification")
 
-        # Filter for transcripts only
-        transcripts = df[df["feature"] == "transcript"].copy()
+        result_df = pd.DataFrame(self._quantify_columns())
 
-        # Parse attributes
-        transcripts["transcript_id"] = transcripts["attribute"].str.extract(
-            r'transcript_id "([^"]+)"'
-        )
-        transcripts["gene_id"] = transcripts["attribute"].str.extract(
-            r'gene_id "([^"]+)"'
-        )
-        transcripts["gene_name"] = transcripts["attribute"].str.extract(
-            r'gene_name "([^"]+)"'
-        )
+        # Calculate TPM and FPKM
+        result_df = self._calculate_normalized_expression(result_df)
 
-        # Calculate transcript length
-        transcripts["length"] = transcripts["end"] - transcripts["start"] + 1
+        logger.info(f"Quantified {len(result_df)} transcripts")
 
-        return transcripts
+        return result_df
 
-    def quantify_all(self) -> pd.DataFrame:
+    def quantify_table(self) -> pa.Table:
         """
-        Quantify expression for all transcripts.
+        Quantify expression for all transcripts into an Arrow table.
+
+        Same columns as :meth:`quantify_all`. The table can be passed to
+        :meth:`calculate_transcript_fraction`, :meth:`calculate_gene_expression`
+        and :meth:`save_results` without converting to pandas.
 
         Returns:
-            DataFrame with quantification results
+            Arrow table with quantification results
         """
         logger.info("Starting expression quantification")
 
-        results = []
-
-        for idx, transcript in self.transcripts.iterrows():
-            try:
-                quant = self._quantify_transcript(transcript)
-                results.append(quant)
-            except Exception as e:
-                logger.warning(
-                    f"Error quantifying transcript {transcript.get('transcript_id', 'unknown')}: {e}"
-                )
-                # Add placeholder with zeros
-                results.append(
-                    {
-                        "transcript_id": transcript.get("transcript_id", "unknown"),
-                        "gene_id": transcript.get("gene_id", "unknown"),
-                        "gene_name": transcript.get("gene_name", "unknown"),
-                        "count": 0,
-                        "tpm": 0.0,
-                        "fpkm": 0.0,
-                        "coverage": 0.0,
-                    }
-                )
-
-        result_df = pd.DataFrame(results)
+        # Missing GTF attributes are NaN in the string columns; from_pandas
+        # turns them into nulls
+        table = pa.table(
+            {
+                key: pa.array(values, from_pandas=True)
+                for key, values in self._quantify_columns().items()
+            }
+        )
 
         # Calculate TPM and FPKM
-        result_df = self._calculate_normalized_expression(result_df)
+        table = self._calculate_normalized_expression_table(table)
 
-        logger.info(f"Quantified {len(result_df)} transcripts")
+        logger.info(f"Quantified {table.num_rows} transcripts")
 
-        return result_df
+        return table
 
-    def _quantify_transcript(self, transcript: pd.Series) -> dict:
+    def _quantify_columns(self) -> dict[str, np.ndarray]:
         """
-        Quantify expression for a single transcript.
+        Quantify every transcript into preallocated result columns.
 
-        Args:
-            transcript: Transcript annotation row
+        Transcript fields are taken column-wise from the GTF table. Only
+        read counts and coverage are computed per transcript, written by
+        position into typed arrays (per contig in processes or threads if
+        configured; processes take precedence).
 
         Returns:
-            Dictionary with quantification metrics
+            Result columns by name, rows in GTF order
         """
-        chrom = transcript["seqname"]
-        start = transcript["start"] - 1  # Convert to 0-based
-        end = transcript["end"]
-        strand = transcript["strand"]
-        length = transcript["length"]
-
-        # Count reads overlapping transcript
-        # SAFE: pysam handles missing contigs gracefully
-        try:
-            count = self.bam.count(
-                contig=chrom,
-                start=start,
-                stop=end,
-                read_callback=lambda read: self._filter_read(read, strand),
-            )
-        except Exception as e:
-            logger.debug(f"Error counting reads for {chrom}:{start}-{end}: {e}")
-            count = 0
-
-        # Calculate coverage
-        coverage = self._calculate_coverage(chrom, start, end, strand)
+        transcripts = self.transcripts
+        n = len(transcripts)
+        counts = np.zeros(n, dtype=np.int64)
+        coverage = np.zeros(n, dtype=np.float64)
+
+        n_processes = self.config.per_chrom_processes
+        if n_processes < 0:
+            n_processes = os.cpu_count() or 1
+        if n_processes > 1:
+            self._quantify_in_processes(counts, coverage, n_processes)
+        elif self.config.per_chrom_threads > 1:
+            self._quantify_by_chrom(counts, coverage, self.config.per_chrom_threads)
+        else:
+            self._quantify_transcripts(transcripts, np.arange(n), self.bam, counts, coverage)
 
         return {
-            "transcript_id": transcript["transcript_id"],
-            "gene_id": transcript["gene_id"],
-            "gene_name": transcript["gene_name"],
-            "chrom": chrom,
-            "start": start,
-            "end": end,
-            "strand": strand,
-            "length": length,
-            "count": count,
+            "transcript_id": transcripts["transcript_id"].to_numpy(),
+            "gene_id": transcripts["gene_id"].to_numpy(),
+            "gene_name": transcripts["gene_name"].to_numpy(),
+            "chrom": transcripts["seqname"].to_numpy(),
+            "start": transcripts["start"].to_numpy() - 1,  # Convert to 0-based
+            "end": transcripts["end"].to_numpy(),
+            "strand": transcripts["strand"].to_numpy(),
+            "length": transcripts["length"].to_numpy(),
+            "count": counts,
             "coverage": coverage,
         }
 
-    def _filter_read(self, read: pysam.AlignedSegment, transcript_strand: str) -> bool:
+    def _quantify_in_processes(
+        self, counts: np.ndarray, coverage: np.ndarray, n_processes: int
+    ) -> None:
         """
-        Filter read based on quality and strandedness.
+        Quantify transcripts on a process pool, a few contigs per job.
+
+        The read sweep runs Python code per read, so threads contend for
+        the GIL while processes scale with cores.
+        Transcripts are split into contiguous runs of contigs; each job
+        receives only its transcripts and opens (and closes) its own BAM
+        handle, see :func:`_quantify_part`.
 
         Args:
-            read: Aligned read
-            transcript_strand: Transcript strand
+            counts: Read count column to fill
+            coverage: Coverage column to fill
+            n_processes: Number of worker processes
+        """
+        groups = list(self.transcripts.groupby("seqname", sort=False).indices.values())
+        if not groups:
+            return
+
+        parts = [
+            part
+            for part in np.array_split(np.concatenate(groups), n_processes * JOBS_PER_PROCESS)
+            if len(part)
+        ]
+        configs = [
+            replace(
+                self.config,
+                transcripts=self.transcripts.iloc[part],
+                per_chrom_threads=1,
+                per_chrom_processes=1,
+                validate_inputs=False,
+            )
+            for part in parts
+        ]
 
-        Returns:
-            True if read should be counted
+        with ProcessPoolExecutor(max_workers=min(n_processes, len(parts))) as pool:
+            for part, (part_counts, part_coverage) in zip(
+                parts, pool.map(_quantify_part, configs)
+            ):
+                counts[part] = part_counts
+                coverage[part] = part_coverage
+
+    def _quantify_by_chrom(
+        self, counts: np.ndarray, coverage: np.ndarray, n_threads: int
+    ) -> None:
         """
-        # Filter by mapping quality
-        if read.mapping_quality < self.config.min_mapq:
-            return False
+        Quantify transcripts with one thread pool job per contig.
 
-        # Filter by strandedness if library is stranded
-        if self.config.stranded:
-            # Implement strand-specific filtering
-            # This depends on library prep protocol
-            pass
+        Reads never cross contig boundaries, so contigs are independent.
+        pysam handles are not thread-safe: every thread opens its own.
+        Each job writes only its own transcripts' positions.
 
-        return True
+        Args:
+            counts: Read count column to fill
+            coverage: Coverage column to fill
+            n_threads: Number of worker threads
+        """
+        local = threading.local()
+        handles: list[pysam.AlignmentFile] = []
+
+        def run(positions: np.ndarray) -> None:
+            bam = getattr(local, "bam", None)
+            if bam is None:
+                bam = pysam.AlignmentFile(
+                    str(self.config.bam_file), "rb", threads=max(1, self.config.bam_threads)
+                )
+                local.bam = bam
+                handles.append(bam)
+            self._quantify_transcripts(
+                self.transcripts.iloc[positions], positions, bam, counts, coverage
+            )
+
+        groups = self.transcripts.groupby("seqname", sort=False).indices.values()
 
-    def _calculate_coverage(
-        self, chrom: str, start: int, end: int, strand: str
-    ) -> float:
+        try:
+            with ThreadPoolExecutor(max_workers=n_threads) as pool:
+                list(pool.map(run, groups))
+        finally:
+            for bam in handles:
+                bam.close()
+
+    def _quantify_transcripts(
+        self,
+        transcripts: pd.DataFrame,
+        positions: np.ndarray,
+        bam: pysam.AlignmentFile,
+        counts: np.ndarray,
+        coverage: np.ndarray,
+    ) -> None:
         """
-        Calculate average coverage over transcript.
+        Quantify a set of transcripts against one BAM handle.
 
-        Args:
-            chrom: Chromosome/contig
-            start: Start position (0-based)
-            end: End position
-            strand: Strand
+        Reads are counted and coverage computed with one sweep per contig
+        (see :meth:`_sweep_reads`). Transcripts on contigs that fail keep a
+        count and coverage of zero.
 
-        Returns:
-            Average coverage (reads per base)
+        Args:
+            transcripts: Transcript annotation rows
+            positions: Row position of each transcript in the result columns
+            bam: Open BAM file handle
+            counts: Read count column to fill
+            coverage: Coverage column to fill
         """
-        try:
-            # Get pileup for region
-            coverage_sum = 0
-            positions = 0
+        starts = transcripts["start"].to_numpy(dtype=np.int64) - 1  # Convert to 0-based
+        ends = transcripts["end"].to_numpy(dtype=np.int64)
 
-            for pileupcolumn in self.bam.pileup(
-                contig=chrom, start=start, stop=end, truncate=True
-            ):
-                coverage_sum += pileupcolumn.n
-                positions += 1
+        for chrom, rows in transcripts.groupby("seqname", sort=False).indices.items():
+            try:
+                counts[positions[rows]], coverage[positions[rows]] = self._sweep_reads(
+                    bam, chrom, starts[rows], ends[rows]
+                )
+            except Exception as e:
+                logger.warning(f"Error quantifying reads on {chrom}: {e}")
 
-            if positions == 0:
-                return 0.0
+    def _sweep_reads(
+        self, bam: pysam.AlignmentFile, chrom: str, starts: np.ndarray, ends: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Count reads and average coverage of each region of one contig in a single sweep.
+
+        The contig's reads are fetched once, from the first region start to
+        the last region end, instead of one indexed fetch (and pileup) per
+        region. Reads are converted to arrays a block at a time.
+
+        Counts: reads below ``min_mapq`` are dropped. Strand-specific
+        counting (``stranded``) is not implemented yet, so both strands
+        count. A read spanning ``[pos, end)`` overlaps the region ``[s, e)``
+        when ``pos < e`` and ``end > s``. A read with ``end <= s`` always has
+        ``pos < e``, so the count is ``#(pos < e) - #(end <= s)``: two
+        ``searchsorted`` calls per block of reads. Read ends follow htslib
+        (at least one base, also for unmapped reads), so the counts equal
+        ``bam.count(chrom, s, e)`` with the same filter.
+
+        Coverage: the depth ``bam.pileup`` reports (``PileupColumn.n``),
+        averaged over the covered positions of the region. The pileup keeps
+        reads that are mapped, primary, not QC-failed, not duplicates and
+        not orphans (paired but not in a proper pair), regardless of
+        mapping quality, and counts a read on every reference position of
+        its alignment (deletions and skipped introns included; reads
+        without aligned bases count nowhere). The depth summed over a region
+        is the total overlap of the read spans with it, and the covered
+        positions are the overlap of the union of the spans, both from
+        prefix sums (see :func:`_span_bases_before` and :func:`_merge_spans`).
+        Unlike ``bam.pileup`` the depth is not capped at 8000 reads.
 
-            return coverage_sum / positions
+        Args:
+            bam: Open BAM file handle
+            chrom: Contig name
+            starts: Region starts (0-based)
+            ends: Region ends (exclusive)
 
-        except Exception as e:
-            logger.debug(f"Error calculating coverage for {chrom}:{start}-{end}: {e}")
-            return 0.0
+        Returns:
+            (read count, average coverage) per region (0 for empty regions
+            or contigs missing from the BAM)
+        """
+        counts = np.zeros(len(starts), dtype=np.int64)
+        coverage = np.zeros(len(starts), dtype=np.float64)
+        valid = starts < ends
+        if not valid.any() or bam.get_tid(chrom) < 0:
+            return counts, coverage
+        starts, ends = starts[valid], ends[valid]
+
+        depth_sum = np.zeros(len(starts), dtype=np.int64)
+        island_starts: list[np.ndarray] = []
+        island_ends: list[np.ndarray] = []
+        open_start = open_end = np.empty(0, dtype=np.int64)  # last island, may still grow
+
+        reads = bam.fetch(chrom, int(starts.min()), int(ends.max()))
+        while block := [
+            (
+                read.reference_start,
+                read.reference_end or 0,
+                read.query_alignment_length,
+                read.mapping_quality,
+                read.flag,
+            )
+            for read in itertools.islice(reads, READ_SWEEP_BLOCK)
+        ]:
+            read_starts, read_ends, aligned, mapq, flags = np.array(block, dtype=np.int64).T
+
+            keep = mapq >= self.config.min_mapq
+            count_ends = np.sort(np.maximum(read_ends[keep], read_starts[keep] + 1))
+            count_starts = np.sort(read_starts[keep])
+            counts[valid] += np.searchsorted(count_starts, ends, side="left")
+            counts[valid] -= np.searchsorted(count_ends, starts, side="right")
+
+            keep = (flags & PILEUP_SKIP_FLAGS == 0) & (flags & PAIRED_FLAGS != BAM_FPAIRED)
+            # htslib reports reads without aligned bases as one base long
+            keep &= (read_ends > read_starts + 1) | (aligned > 0)
+            span_starts, span_ends = read_starts[keep], read_ends[keep]
+            depth_sum += _span_bases_before(span_starts, span_ends, ends)
+            depth_sum -= _span_bases_before(span_starts, span_ends, starts)
+
+            # Reads arrive sorted by start, so only the last island can
+            # still merge with later reads
+            merged_starts, merged_ends = _merge_spans(
+                np.concatenate([open_start, span_starts]),
+                np.concatenate([open_end, span_ends]),
+            )
+            island_starts.append(merged_starts[:-1])
+            island_ends.append(merged_ends[:-1])
+            open_start, open_end = merged_starts[-1:], merged_ends[-1:]
+
+        island_starts.append(open_start)
+        island_ends.append(open_end)
+        merged_starts = np.concatenate(island_starts)
+        merged_ends = np.concatenate(island_ends)
+        if len(merged_starts):
+            covered = _span_bases_before(merged_starts, merged_ends, ends)
+            covered -= _span_bases_before(merged_starts, merged_ends, starts)
+            coverage[valid] = np.divide(
+                depth_sum, covered, out=np.zeros(len(starts)), where=covered > 0
+            )
+
+        return counts, coverage
 
     def _calculate_normalized_expression(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -290,38 +586,88 @@ class ExpressionQuantifier:
         Returns:
             DataFrame with tpm and fpkm columns added
         """
-        # Calculate RPK (Reads Per Kilobase)
-        df["rpk"] = df["count"] / (df["length"] / 1000.0)
-
-        # Calculate TPM
-        rpk_sum = df["rpk"].sum()
+        # Work on the column arrays: no Series (and index) per intermediate
+        # step, and no rpk column to add and drop again
+        count = df["count"].to_numpy(dtype=np.float64)
+        length = df["length"].to_numpy(dtype=np.float64)
+
+        # Calculate RPK (Reads Per Kilobase); zero-length transcripts give
+        # NaN/inf, as the Series division did (without warning)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rpk = count / (length / 1000.0)
+
+        # Calculate TPM (NaN is skipped, like Series.sum)
+        rpk_sum = np.nansum(rpk)
         if rpk_sum > 0:
-            df["tpm"] = (df["rpk"] / rpk_sum) * 1e6
+            df["tpm"] = rpk / rpk_sum * 1e6
         else:
             df["tpm"] = 0.0
 
         # Calculate FPKM
-        total_reads = df["count"].sum()
+        total_reads = count.sum()
         if total_reads > 0:
-            df["fpkm"] = df["rpk"] / (total_reads / 1e6)
+            df["fpkm"] = rpk / (total_reads / 1e6)
         else:
             df["fpkm"] = 0.0
 
-        # Drop intermediate column
-        df = df.drop(columns=["rpk"])
-
         return df
 
-    def calculate_gene_expression(self, transcript_df: pd.DataFrame) -> pd.DataFrame:
+    @staticmethod
+    def _calculate_normalized_expression_table(table: pa.Table) -> pa.Table:
+        """Arrow version of :meth:`_calculate_normalized_expression`."""
+        count = pc.cast(table["count"], pa.float64())
+        rpk = pc.divide(count, pc.divide(pc.cast(table["length"], pa.float64()), 1000.0))
+
+        rpk_sum = pc.sum(rpk).as_py() or 0.0
+        if rpk_sum > 0:
+            tpm = pc.multiply(pc.divide(rpk, rpk_sum), 1e6)
+        else:
+            tpm = pa.array(np.zeros(table.num_rows))
+
+        total_reads = pc.sum(count).as_py() or 0.0
+        if total_reads > 0:
+            fpkm = pc.divide(rpk, total_reads / 1e6)
+        else:
+            fpkm = pa.array(np.zeros(table.num_rows))
+
+        return table.append_column("tpm", tpm).append_column("fpkm", fpkm)
+
+    def calculate_gene_expression(
+        self, transcript_df: pd.DataFrame | pa.Table
+    ) -> pd.DataFrame | pa.Table:
         """
         Aggregate transcript-level expression to gene level.
 
         Args:
-            transcript_df: DataFrame with transcript quantification
+            transcript_df: DataFrame (or Arrow table) with transcript quantification
 
         Returns:
-            DataFrame with gene-level expression
+            Gene-level expression, same type as the input, sorted by gene
         """
+        if isinstance(transcript_df, pa.Table):
+            # Drop null keys like pandas groupby does
+            keyed = transcript_df.filter(
+                pc.and_(
+                    pc.is_valid(transcript_df["gene_id"]),
+                    pc.is_valid(transcript_df["gene_name"]),
+                )
+            )
+            gene_table = keyed.group_by(["gene_id", "gene_name"]).aggregate(
+                [
+                    ("count", "sum"),
+                    ("tpm", "sum"),
+                    ("fpkm", "sum"),
+                    ("length", "max"),  # Use longest transcript
+                ]
+            )
+            # Key/aggregate column order varies across pyarrow versions
+            gene_table = gene_table.select(
+                ["gene_id", "gene_name", "count_sum", "tpm_sum", "fpkm_sum", "length_max"]
+            ).rename_columns(["gene_id", "gene_name", "count", "tpm", "fpkm", "length"])
+            return gene_table.sort_by(
+                [("gene_id", "ascending"), ("gene_name", "ascending")]
+            )
+
         # Group by gene and sum counts
         gene_df = (
             transcript_df.groupby(["gene_id", "gene_name"])
@@ -339,51 +685,79 @@ class ExpressionQuantifier:
         return gene_df
 
     def calculate_transcript_fraction(
-        self, transcript_df: pd.DataFrame
-    ) -> pd.DataFrame:
+        self, transcript_df: pd.DataFrame | pa.Table
+    ) -> pd.DataFrame | pa.Table:
         """
         Calculate fraction of gene expression for each transcript.
 
         This is useful for identifying dominant isoforms.
 
         Args:
-            transcript_df: DataFrame with transcript quantification
+            transcript_df: DataFrame (or Arrow table) with transcript quantification
 
         Returns:
-            DataFrame with fraction columns added
+            Same type as the input, with fraction columns added
         """
-        # Calculate gene totals
-        gene_totals = (
-            transcript_df.groupby("gene_id")
-            .agg({"count": "sum", "tpm": "sum"})
-            .rename(columns={"count": "gene_count", "tpm": "gene_tpm"})
-        )
+        if isinstance(transcript_df, pa.Table):
+            return self._calculate_transcript_fraction_table(transcript_df)
 
-        # Merge with transcript data
-        result = transcript_df.merge(gene_totals, on="gene_id", how="left")
+        # Broadcast gene totals back to the transcripts (no merge, row order
+        # and index kept)
+        gene_totals = transcript_df.groupby("gene_id", sort=False, observed=True)[
+            ["count", "tpm"]
+        ].transform("sum")
+        gene_count = gene_totals["count"]
+        gene_tpm = gene_totals["tpm"]
 
         # Calculate fractions (safe division)
-        result["count_fraction"] = np.where(
-            result["gene_count"] > 0,
-            result["count"] / result["gene_count"],
-            0.0,
+        return transcript_df.assign(
+            gene_count=gene_count,
+            gene_tpm=gene_tpm,
+            count_fraction=_safe_fraction(transcript_df["count"], gene_count),
+            tpm_fraction=_safe_fraction(transcript_df["tpm"], gene_tpm),
+        )
+
+    @staticmethod
+    def _calculate_transcript_fraction_table(table: pa.Table) -> pa.Table:
+        """Arrow version of :meth:`calculate_transcript_fraction` (row order kept)."""
+        gene_totals = table.group_by("gene_id").aggregate(
+            [("count", "sum"), ("tpm", "sum")]
         )
 
-        result["tpm_fraction"] = np.where(
-            result["gene_tpm"] > 0, result["tpm"] / result["gene_tpm"], 0.0
+        # Broadcast gene totals back to transcripts by position, not a join,
+        # so the transcript order is preserved. Like pandas groupby, rows
+        # without a gene_id get no total (null) rather than the null group's
+        gene_index = pc.index_in(
+            table["gene_id"], value_set=gene_totals["gene_id"], skip_nulls=True
         )
+        gene_count = pc.take(gene_totals["count_sum"], gene_index)
+        gene_tpm = pc.take(gene_totals["tpm_sum"], gene_index)
+
+        def safe_fraction(values: pa.ChunkedArray, totals: pa.ChunkedArray) -> pa.ChunkedArray:
+            totals = pc.cast(totals, pa.float64())
+            return pc.if_else(
+                pc.fill_null(pc.greater(totals, 0), False),
+                pc.divide(pc.cast(values, pa.float64()), totals),
+                0.0,
+            )
 
-        return result
+        return (
+            table.append_column("gene_count", gene_count)
+            .append_column("gene_tpm", gene_tpm)
+            .append_column("count_fraction", safe_fraction(table["count"], gene_count))
+            .append_column("tpm_fraction", safe_fraction(table["tpm"], gene_tpm))
+        )
 
-    def save_results(self, df: pd.DataFrame, output_path: Path) -> None:
+    def save_results(self, df: pd.DataFrame | pa.Table, output_path: Path) -> None:
         """
         Save quantification results to file.
 
         Args:
-            df: Results DataFrame
-            output_path: Output file path
+            df: Results DataFrame or Arrow table
+            output_path: Output file path (``.parquet`` writes Parquet,
+                anything else writes TSV)
         """
-        df.to_csv(output_path, sep="\t", index=False)
+        write_table(df, output_path)
         logger.info(f"Saved quantification results to {output_path}")
 
     def close(self) -> None:
@@ -396,4 +770,82 @@ class ExpressionQuantifier:
 
     def __exit__(self, exc_type, exc_val, exc_tb) -> None:
         """Context manager exit."""
-        self.close()
\ No newline at end of file
+        self.close()
+
+
+def _quantify_part(config: QuantificationConfig) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Process pool job: count reads and coverage for ``config.transcripts``.
+
+    Args:
+        config: Configuration carrying this job's transcripts
+
+    Returns:
+        (read counts, coverage), in the order of ``config.transcripts``
+    """
+    with ExpressionQuantifier(config) as quantifier:
+        n = len(quantifier.transcripts)
+        counts = np.zeros(n, dtype=np.int64)
+        coverage = np.zeros(n, dtype=np.float64)
+        quantifier._quantify_transcripts(
+            quantifier.transcripts, np.arange(n), quantifier.bam, counts, coverage
+        )
+    return counts, coverage
+
+
+def _safe_fraction(values: pd.Series, totals: pd.Series) -> np.ndarray:
+    """``values / totals`` where totals are positive, 0.0 elsewhere (incl. NaN)."""
+    totals = totals.to_numpy(dtype=np.float64)
+    return np.divide(
+        values.to_numpy(dtype=np.float64),
+        totals,
+        out=np.zeros(len(totals)),
+        where=totals > 0,
+    )
+
+
+def _span_bases_before(
+    span_starts: np.ndarray, span_ends: np.ndarray, positions: np.ndarray
+) -> np.ndarray:
+    """
+    Total length of the spans ``[start, end)`` left of each position.
+
+    ``sum(max(0, min(end, x) - start))`` for every ``x``, from prefix sums:
+    spans with ``end <= x`` count whole, spans with ``start < x < end``
+    count ``x - start``.
+
+    Args:
+        span_starts: Span starts
+        span_ends: Span ends (exclusive, > start)
+        positions: Query positions
+
+    Returns:
+        Covered length before each position (int64)
+    """
+    span_starts = np.sort(span_starts)
+    span_ends = np.sort(span_ends)
+    start_sums = np.concatenate(([0], np.cumsum(span_starts)))
+    end_sums = np.concatenate(([0], np.cumsum(span_ends)))
+    n_started = np.searchsorted(span_starts, positions, side="left")
+    n_ended = np.searchsorted(span_ends, positions, side="right")
+    return end_sums[n_ended] - start_sums[n_started] + positions * (n_started - n_ended)
+
+
+def _merge_spans(
+    span_starts: np.ndarray, span_ends: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Merge spans sorted by start into disjoint islands.
+
+    Args:
+        span_starts: Span starts (ascending)
+        span_ends: Span ends (exclusive)
+
+    Returns:
+        (starts, ends) of the islands, ascending
+    """
+    if not len(span_starts):
+        return span_starts, span_ends
+    reach = np.maximum.accumulate(span_ends)
+    first = np.flatnonzero(np.concatenate(([True], span_starts[1:] > reach[:-1])))
+    return span_starts[first], np.maximum.reduceat(span_ends, first)
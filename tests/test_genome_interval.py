@@ -0,0 +1,198 @@
+"""
+GenomeIntervalHandler checked against brute-force scans of the loaded records.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from teprof2.core.genome_interval import GenomeIntervalHandler
+
+QUERY_STRANDS = [None, "+", "-", ".", "?"]
+
+
+@pytest.fixture(scope="module")
+def records() -> list[tuple[str, int, int, str, str, float]]:
+    """Random (chrom, start, end, strand, name, score) records in load order."""
+    rng = np.random.default_rng(3)
+    records = []
+    for chrom, n, offset in (("ctg1", 300, 0), ("ctg2", 40, 0), ("single", 1, 0), ("big", 50, 2**31)):
+        starts = offset + rng.integers(0, 400, n) * 10
+        lengths = rng.choice([10, 20, 50, 300, 3000], n, p=[0.3, 0.3, 0.2, 0.15, 0.05])
+        strands = rng.choice(["+", "-", ".", "C"], n)
+        scores = rng.integers(0, 100, n)
+        records += [
+            (chrom, int(s), int(s + length), str(strand), f"{chrom}_{k}", float(score))
+            for k, (s, length, strand, score) in enumerate(zip(starts, lengths, strands, scores, strict=True))
+        ]
+    order = rng.permutation(len(records))
+    return [records[i] for i in order]
+
+
+def _normalized(record: tuple) -> tuple:
+    """Record as find_overlaps reports it ('C' is stored as '-')."""
+    chrom, start, end, strand, name, score = record
+    return chrom, start, end, "-" if strand == "C" else strand, name, score
+
+
+def _load(records: list[tuple], how: str) -> GenomeIntervalHandler:
+    """Load records one at a time, in bulk, or half and half."""
+    handler = GenomeIntervalHandler()
+    if how == "add_interval":
+        for record in records:
+            handler.add_interval(*record)
+    elif how == "bulk_load":
+        handler.bulk_load(
+            pd.DataFrame(records, columns=["chrom", "start", "end", "strand", "name", "score"])
+        )
+    elif how == "add_intervals_bulk":
+        handler.add_intervals_bulk(iter(records))
+    else:  # buffered rows merged into existing arrays, and the other way round
+        half = len(records) // 2
+        handler.add_intervals_bulk(records[: half // 2])
+        for record in records[half // 2 : half]:
+            handler.add_interval(*record)
+        handler.add_intervals_bulk(records[half:])
+    return handler
+
+
+def brute_force(records: list[tuple], chrom: str, start: int, end: int, strand) -> list[tuple]:
+    """Records overlapping ``[start, end)``, ordered by start (ties in load order)."""
+    if start >= end:
+        return []
+    hits = [
+        _normalized(r)
+        for r in records
+        if r[0] == chrom and r[1] < end and r[2] > start
+    ]
+    if strand is not None:
+        hits = [r for r in hits if r[3] == strand]
+    return sorted(hits, key=lambda r: r[1])
+
+
+def _as_tuples(intervals) -> list[tuple]:
+    return [(i.chrom, i.start, i.end, i.strand, i.name, i.score) for i in intervals]
+
+
+@pytest.fixture(scope="module")
+def queries() -> list[tuple[str, int, int, object]]:
+    """Random queries, also on missing contigs, beyond int32 and empty/reversed."""
+    rng = np.random.default_rng(5)
+    n = 1500
+    chroms = rng.choice(["ctg1", "ctg1", "ctg2", "single", "big", "missing"], n)
+    starts = rng.integers(-10, 450, n) * 10 + np.where(chroms == "big", 2**31, 0)
+    ends = starts + rng.choice([-10, 0, 1, 10, 30, 200, 4000], n)
+    strands = rng.choice(np.array(QUERY_STRANDS, dtype=object), n)
+    queries = list(zip(chroms.tolist(), starts.tolist(), ends.tolist(), strands, strict=True))
+    # Beyond the int32 coordinates of an int32 contig
+    queries += [("ctg1", 2**31 + 5, 2**32, None), ("ctg1", -(2**33), 2**33, "+")]
+    return queries
+
+
+@pytest.mark.parametrize("how", ["add_interval", "bulk_load", "add_intervals_bulk", "mixed"])
+def test_find_overlaps_matches_brute_force(records, queries, how):
+    """Overlap queries equal a scan over the loaded records."""
+    handler = _load(records, how)
+    for chrom, start, end, strand in queries:
+        expected = brute_force(records, chrom, start, end, strand)
+        assert _as_tuples(handler.find_overlaps(chrom, start, end, strand)) == expected
+        idx = handler.overlap_indices(chrom, start, end, strand)
+        assert [_as_tuples([handler.get_interval(chrom, i)])[0] for i in idx] == expected
+
+
+@pytest.mark.parametrize("how", ["add_interval", "bulk_load", "add_intervals_bulk", "mixed"])
+def test_contig_contents_and_stats(records, how):
+    """Every record is stored once, sorted by start, with matching stats."""
+    handler = _load(records, how)
+    assert handler.count_intervals() == len(records)
+    for chrom in {r[0] for r in records} | {"missing"}:
+        own = [r for r in records if r[0] == chrom]
+        expected = sorted((_normalized(r) for r in own), key=lambda r: r[1])
+        assert handler.count_intervals(chrom) == len(own)
+        assert _as_tuples(handler.get_contig_intervals(chrom)) == expected
+        assert _as_tuples(handler.get_contig_intervals(chrom, strand="-")) == [
+            r for r in expected if r[3] == "-"
+        ]
+        assert handler.get_contig_stats(chrom) == {
+            "count": len(own),
+            "total_bp": sum(r[2] - r[1] for r in own),
+        }
+    assert not handler.has_contig("missing")
+    assert handler.find_overlaps("missing", 0, 100) == []
+
+
+def test_touching_intervals():
+    """Half-open coordinates: touching intervals do not overlap, but do merge."""
+    handler = GenomeIntervalHandler()
+    handler.add_intervals_bulk(
+        [("c", 0, 10, "+", "a", 1.0), ("c", 10, 20, "+", "b", 2.0), ("c", 25, 30, "-", "c", 0.0)]
+    )
+    assert [i.name for i in handler.find_overlaps("c", 10, 20)] == ["b"]
+    assert [i.name for i in handler.find_overlaps("c", 9, 11)] == ["a", "b"]
+    assert handler.find_overlaps("c", 10, 10) == []
+    assert handler.find_overlaps("c", 20, 25) == []
+    assert [(i.start, i.end, i.name) for i in handler.merge_intervals("c")] == [
+        (0, 20, "a,b"),
+        (25, 30, "c"),
+    ]
+
+
+def test_zero_length_intervals_are_rejected():
+    """Intervals need end > start on every load path."""
+    handler = GenomeIntervalHandler()
+    with pytest.raises(ValueError):
+        handler.add_interval("c", 10, 10)
+    with pytest.raises(ValueError):
+        handler.add_intervals_bulk([("c", 10, 10, "+", "a", 0.0)])
+    with pytest.raises(ValueError):
+        handler.bulk_load(pd.DataFrame({"chrom": ["c"], "start": [20], "end": [5]}))
+    assert handler.count_intervals() == 0
+
+
+def brute_force_merge(records: list[tuple], chrom: str, strand, gap: int) -> list[tuple]:
+    """
+    Merge by connected components: two intervals join when the gap between
+    them is at most ``gap`` (union-find over all pairs).
+    """
+    rows = sorted(
+        (r for r in map(_normalized, records) if r[0] == chrom and strand in (None, r[3])),
+        key=lambda r: r[1],
+    )
+    parent = list(range(len(rows)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            i = parent[i]
+        return i
+
+    for i in range(len(rows)):
+        for j in range(i + 1, len(rows)):
+            if max(rows[i][1], rows[j][1]) - min(rows[i][2], rows[j][2]) <= gap:
+                parent[find(j)] = find(i)
+
+    groups: dict[int, list[tuple]] = {}
+    for i, row in enumerate(rows):
+        groups.setdefault(find(i), []).append(row)
+    return sorted(
+        (
+            chrom,
+            min(r[1] for r in group),
+            max(r[2] for r in group),
+            group[0][3],
+            ",".join(r[4] for r in group),
+            max(r[5] for r in group),
+        )
+        for group in groups.values()
+    )
+
+
+@pytest.mark.parametrize("gap", [0, 1, 25])
+@pytest.mark.parametrize("strand", [None, "+", "-"])
+def test_merge_intervals_matches_brute_force(records, gap, strand):
+    """Sweep merging equals connected components of the 'within gap' relation."""
+    handler = _load(records, "mixed")
+    for chrom in ("ctg1", "ctg2", "single", "big", "missing"):
+        merged = _as_tuples(handler.merge_intervals(chrom, strand=strand, gap=gap))
+        assert merged == brute_force_merge(records, chrom, strand, gap)
@@ -0,0 +1,249 @@
+"""
+RepeatMasker overlap searches checked against a brute-force scan.
+
+Coordinates are drawn on a coarse grid so that touching intervals
+(``end == start``) and touching queries are common.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from pathlib import Path
+
+import numpy as np
+import pysam
+import pytest
+
+from teprof2.annotation import rmsk_cache, rmsk_tile_index
+from teprof2.annotation.rmsk_cache import STRAND_CODES, RmskArrays
+from teprof2.annotation.rmsk_tile_index import RmskTileIndex
+from teprof2.annotation.te_annotator import AnnotationConfig, TEAnnotator
+
+QUERY_STRANDS = [None, "+", "-", ".", "C", "?"]
+
+
+def _write_bed(path: Path, rows: list[tuple[str, int, int, str, str]]) -> Path:
+    """Write rows as a bgzipped, tabix-indexed BED file."""
+    with open(path, "w") as f:
+        f.write("#chrom\tstart\tend\tname\tscore\tstrand\n")
+        for chrom, start, end, name, strand in sorted(rows, key=lambda r: (r[0], r[1])):
+            f.write(f"{chrom}\t{start}\t{end}\t{name}\t0\t{strand}\n")
+    return Path(pysam.tabix_index(str(path), preset="bed", force=True))
+
+
+@pytest.fixture(scope="module")
+def rmsk_rows() -> list[tuple[str, int, int, str, str]]:
+    """Random RMSK rows, including zero-length ones and a contig of only those."""
+    rng = np.random.default_rng(7)
+    rows = []
+    for chrom, n in (("ctg1", 400), ("ctg2", 60), ("ctg3", 1)):
+        starts = rng.integers(0, 600, n) * 10
+        lengths = rng.choice([0, 10, 20, 50, 300, 4000], n, p=[0.05, 0.3, 0.3, 0.2, 0.1, 0.05])
+        strands = rng.choice(["+", "-", "C", "."], n)
+        rows += [
+            (chrom, int(s), int(s + length), f"TE{k % 37}", str(strand))
+            for k, (s, length, strand) in enumerate(zip(starts, lengths, strands, strict=True))
+        ]
+    rows.append(("only_empty", 100, 100, "TE0", "+"))
+    return rows
+
+
+@pytest.fixture(scope="module")
+def rmsk(tmp_path_factory, rmsk_rows) -> RmskArrays:
+    """RmskArrays loaded from the random rows."""
+    return RmskArrays.from_bed(_write_bed(tmp_path_factory.mktemp("rmsk") / "rmsk.bed", rmsk_rows))
+
+
+@pytest.fixture(scope="module")
+def queries() -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Random queries: known, empty and missing contigs, empty and reversed regions."""
+    rng = np.random.default_rng(11)
+    n = 1500
+    chroms = rng.choice(["ctg1", "ctg1", "ctg2", "ctg3", "only_empty", "missing"], n)
+    starts = rng.integers(-20, 650, n) * 10
+    ends = starts + rng.choice([-10, 0, 1, 10, 30, 200, 5000], n) * rng.choice([1, 10], n)
+    strands = rng.choice(np.array(QUERY_STRANDS, dtype=object), n)
+    return chroms, starts, ends, strands
+
+
+def brute_force(rmsk: RmskArrays, chrom: str, start: int, end: int, strand) -> list[int]:
+    """Rows overlapping ``[start, end)``, by scanning every row."""
+    if start >= end or (strand is not None and strand not in STRAND_CODES):
+        return []
+    row_contig = np.repeat(rmsk.contigs, np.diff(rmsk.contig_offsets))
+    return [
+        i
+        for i in range(len(rmsk))
+        if row_contig[i] == chrom
+        and rmsk.starts[i] < end
+        and rmsk.ends[i] > start
+        and (strand is None or rmsk.strands[i] == STRAND_CODES[strand])
+    ]
+
+
+def test_from_bed_keeps_non_empty_rows(rmsk, rmsk_rows):
+    """Every non-empty BED row is stored once, sorted by contig and start."""
+    expected = sorted(
+        (chrom, start, end, STRAND_CODES[strand], name)
+        for chrom, start, end, name, strand in rmsk_rows
+        if end > start
+    )
+    row_contig = np.repeat(rmsk.contigs, np.diff(rmsk.contig_offsets))
+    stored = list(
+        zip(
+            row_contig.tolist(),
+            rmsk.starts.tolist(),
+            rmsk.ends.tolist(),
+            rmsk.strands.tolist(),
+            rmsk.name_array[rmsk.name_ids].tolist(),
+            strict=True,
+        )
+    )
+    assert sorted(stored) == expected
+    assert not rmsk.has_contig("only_empty")
+    for i in range(len(rmsk.contigs)):
+        starts = rmsk.starts[rmsk.contig_offsets[i] : rmsk.contig_offsets[i + 1]]
+        assert np.all(np.diff(starts) >= 0)
+
+
+def test_overlap_indices_matches_brute_force(rmsk, queries):
+    """Single-region search equals a scan over all rows."""
+    for chrom, start, end, strand in zip(*queries, strict=True):
+        expected = brute_force(rmsk, chrom, int(start), int(end), strand)
+        assert rmsk.overlap_indices(chrom, int(start), int(end), strand).tolist() == expected
+
+
+def expected_pairs(rmsk: RmskArrays, chroms, starts, ends, strands) -> list[tuple[int, int]]:
+    """(query, row) pairs of a batch of queries, by scanning every row."""
+    # Only strands=None disables the filter; a missing per-query strand is
+    # an unknown strand and matches nothing
+    return [
+        (k, row)
+        for k in range(len(chroms))
+        for row in brute_force(
+            rmsk,
+            chroms[k],
+            int(starts[k]),
+            int(ends[k]),
+            None if strands is None else strands[k] or "?",
+        )
+    ]
+
+
+@pytest.mark.parametrize("batch", [7, rmsk_cache.OVERLAP_BATCH])
+@pytest.mark.parametrize("filter_strand", [True, False])
+def test_overlap_pairs_matches_brute_force(rmsk, queries, monkeypatch, batch, filter_strand):
+    """Batched search returns every (query, row) pair, by query then row."""
+    monkeypatch.setattr(rmsk_cache, "OVERLAP_BATCH", batch)
+    chroms, starts, ends, strands = queries
+    strands = strands if filter_strand else None
+
+    query, rows = rmsk.overlap_pairs(chroms, starts, ends, strands)
+    assert list(zip(query.tolist(), rows.tolist(), strict=True)) == expected_pairs(
+        rmsk, chroms, starts, ends, strands
+    )
+
+
+def test_from_bed_rejects_coordinates_beyond_int32(tmp_path):
+    """Coordinates are stored as int32 and are not silently wrapped."""
+
+    def bgzipped(name: str, start: int, end: int) -> Path:
+        # Beyond the range tabix indexes, so only compressed
+        plain = tmp_path / name
+        plain.write_text(f"c\t{start}\t{end}\ta\t0\t+\n")
+        pysam.tabix_compress(str(plain), f"{plain}.gz", force=True)
+        return Path(f"{plain}.gz")
+
+    with pytest.raises(ValueError, match="int32"):
+        RmskArrays.from_bed(bgzipped("big.bed", 2**31 - 10, 2**31 + 10))
+    rmsk = RmskArrays.from_bed(bgzipped("edge.bed", 2**31 - 10, 2**31 - 1))
+    assert rmsk.overlap_names("c", 2**31 - 2, 2**31) == ["a"]
+
+
+@pytest.mark.parametrize("tile_size", [0, 4096])
+@pytest.mark.parametrize("n_threads", [2, 3, 16])
+def test_annotator_threads_match_single_search(rmsk, queries, tile_size, n_threads):
+    """Queries split by contig across threads give the single search's pairs."""
+    annotator = TEAnnotator(
+        AnnotationConfig(
+            rmsk_bed=Path("unused.bed"),
+            rmsk_arrays=rmsk,
+            rmsk_tile_size=tile_size,
+            validate_inputs=False,
+        )
+    )
+    # Unsorted queries: contigs are interleaved
+    expected = annotator._overlap_pairs(*queries, n_threads=1)
+    query, rows = annotator._overlap_pairs(*queries, n_threads=n_threads)
+    assert query.tolist() == expected[0].tolist()
+    assert rows.tolist() == expected[1].tolist()
+
+
+def test_touching_intervals_do_not_overlap(tmp_path):
+    """Half-open coordinates: intervals that only touch the query are excluded."""
+    bed = _write_bed(
+        tmp_path / "touch.bed",
+        [("c", 0, 10, "left", "+"), ("c", 10, 20, "mid", "+"), ("c", 20, 30, "right", "-")],
+    )
+    rmsk = RmskArrays.from_bed(bed)
+    assert rmsk.overlap_names("c", 10, 20) == ["mid"]
+    assert rmsk.overlap_names("c", 9, 21) == ["left", "mid", "right"]
+    assert rmsk.overlap_names("c", 10, 10) == []
+    assert rmsk.overlap_names("c", 20, 30, strand="C") == ["right"]
+    assert rmsk.overlap_names("missing", 0, 100) == []
+
+
+@pytest.mark.parametrize("tile_size", [16, 256, 4096, 1 << 20])
+def test_tile_index_overlap_indices_matches_brute_force(rmsk, queries, tile_size):
+    """Tile lookups equal a scan, also for rows spanning many tiles."""
+    index = RmskTileIndex.build(rmsk, tile_size)
+    for chrom, start, end, strand in zip(*queries, strict=True):
+        expected = brute_force(rmsk, chrom, int(start), int(end), strand)
+        assert index.overlap_indices(chrom, int(start), int(end), strand).tolist() == expected
+
+
+@pytest.mark.parametrize("tile_size", [16, 4096])
+@pytest.mark.parametrize("batch", [7, rmsk_cache.OVERLAP_BATCH])
+@pytest.mark.parametrize("filter_strand", [True, False])
+def test_tile_index_overlap_pairs_matches_brute_force(
+    rmsk, queries, monkeypatch, tile_size, batch, filter_strand
+):
+    """Batched tile search reports each pair once, by query then row."""
+    monkeypatch.setattr(rmsk_tile_index, "OVERLAP_BATCH", batch)
+    chroms, starts, ends, strands = queries
+    strands = strands if filter_strand else None
+
+    query, rows = RmskTileIndex.build(rmsk, tile_size).overlap_pairs(chroms, starts, ends, strands)
+    assert list(zip(query.tolist(), rows.tolist(), strict=True)) == expected_pairs(
+        rmsk, chroms, starts, ends, strands
+    )
+
+
+def test_tile_size_must_be_power_of_two(rmsk):
+    """Tiles are addressed by bit shift."""
+    with pytest.raises(ValueError):
+        RmskTileIndex.build(rmsk, 1000)
+
+
+def test_persisted_index_is_rebuilt_for_another_bed(tmp_path, caplog):
+    """A cached index is not reused for a different BED with the same shape and older mtime."""
+    bed = _write_bed(
+        tmp_path / "rmsk.bed", [("c", 0, 100, "a", "+"), ("c", 5000, 5100, "b", "+")]
+    )
+    rmsk = RmskArrays.from_bed(bed)
+    with caplog.at_level(logging.INFO, logger=rmsk_tile_index.__name__):
+        RmskTileIndex.load_or_build(rmsk, bed, tile_size=256)
+        RmskTileIndex.load_or_build(rmsk, bed, tile_size=256)
+    assert "Loaded RMSK tile index" in caplog.text
+
+    # Same row and contig counts, copied in with an older timestamp (cp -p)
+    other = _write_bed(
+        tmp_path / "other.bed", [("c", 9000, 9100, "a", "+"), ("c", 20000, 20100, "b", "+")]
+    )
+    os.replace(other, bed)
+    os.utime(bed, ns=(1, 1))
+    rmsk = RmskArrays.from_bed(bed)
+    index = RmskTileIndex.load_or_build(rmsk, bed, tile_size=256)
+    assert index.overlap_names("c", 9050, 9060) == ["a"]
+    assert index.overlap_names("c", 20000, 20001) == ["b"]
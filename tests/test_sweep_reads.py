@@ -0,0 +1,160 @@
+"""
+Per-contig read sweep checked against per-region htslib counting and pileup.
+
+The references are what quantification did per transcript before the sweep:
+``bam.count`` with a mapping-quality callback and the mean ``bam.pileup``
+depth.
+"""
+
+from __future__ import annotations
+
+import random
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pysam
+import pytest
+
+from teprof2.quantification import tpm_calculator
+from teprof2.quantification.tpm_calculator import (
+    ExpressionQuantifier,
+    QuantificationConfig,
+)
+
+CONTIGS = {"ctg1": 20000, "ctg2": 6000, "no_reads": 5000}
+
+# Flags: plain, reverse, secondary, QC-fail, duplicate, supplementary, and
+# paired reads in and out of proper pairs (orphans are skipped by pileup)
+FLAGS = [0, 16, 256, 512, 1024, 2048, 1, 3, 3 | 16, 1 | 64, 3 | 128, 3 | 1024, 1 | 8]
+
+
+def _random_read(rng: random.Random, name: str, tid: int, length: int) -> pysam.AlignedSegment:
+    """A read with a random CIGAR (clips, deletions, introns, insertions) and flags."""
+    read = pysam.AlignedSegment()
+    read.query_name = name
+    read.reference_id = tid
+    read.reference_start = rng.randint(0, length - 2000)
+    kind = rng.random()
+    if kind < 0.03:  # unmapped, placed at its mate's position
+        read.flag = 4
+        read.mapping_quality = 0
+        read.cigartuples = None
+    elif kind < 0.05:  # no aligned bases
+        read.flag = 0
+        read.mapping_quality = 60
+        read.cigartuples = [(4, 50)]
+    else:
+        read.flag = rng.choice(FLAGS)
+        read.mapping_quality = rng.choice([0, 1, 60, 60, 255])
+        ops = [(4, rng.choice([0, 0, 5]))]
+        for _ in range(rng.randint(1, 3)):
+            ops.append((0, rng.randint(1, 40)))
+            r = rng.random()
+            if r < 0.2:
+                ops.append((2, rng.randint(1, 5)))
+            elif r < 0.35:
+                ops.append((3, rng.randint(50, 900)))
+            elif r < 0.45:
+                ops.append((1, rng.randint(1, 4)))
+        ops.append((0, rng.randint(1, 40)))
+        read.cigartuples = [op for op in ops if op[1] > 0]
+    n_bases = sum(n for op, n in (read.cigartuples or [(0, 50)]) if op in (0, 1, 4))
+    read.query_sequence = "A" * n_bases
+    read.query_qualities = pysam.qualitystring_to_array("I" * n_bases)
+    return read
+
+
+@pytest.fixture(scope="module")
+def bam_file(tmp_path_factory) -> Path:
+    """Sorted, indexed BAM with random reads on ctg1/ctg2 and none on no_reads."""
+    rng = random.Random(17)
+    header = {
+        "HD": {"VN": "1.6", "SO": "coordinate"},
+        "SQ": [{"SN": name, "LN": length} for name, length in CONTIGS.items()],
+    }
+    reads = [
+        _random_read(rng, f"r{i}", tid, CONTIGS[("ctg1", "ctg2")[tid]])
+        for i, tid in enumerate(rng.choice([0, 0, 1]) for _ in range(4000))
+    ]
+    reads.sort(key=lambda read: (read.reference_id, read.reference_start))
+
+    path = tmp_path_factory.mktemp("bam") / "reads.bam"
+    with pysam.AlignmentFile(str(path), "wb", header=header) as out:
+        for read in reads:
+            out.write(read)
+    pysam.index(str(path))
+    return path
+
+
+@pytest.fixture(scope="module")
+def regions() -> list[tuple[str, int, int]]:
+    """Random regions, also on contigs without reads or missing from the BAM."""
+    rng = random.Random(23)
+    regions = []
+    for _ in range(300):
+        chrom = rng.choice(["ctg1", "ctg1", "ctg2", "no_reads", "missing"])
+        start = rng.randint(0, 19000)
+        regions.append((chrom, start, start + rng.choice([-5, 0, 1, 7, 150, 900, 4000])))
+    # Touching regions
+    regions += [("ctg1", 5000, 5100), ("ctg1", 5100, 5200), ("ctg1", 5200, 5201)]
+    return regions
+
+
+def reference_count(bam: pysam.AlignmentFile, chrom: str, start: int, end: int, min_mapq: int) -> int:
+    """Read count of one region, computed by htslib."""
+    if start >= end or chrom not in bam.references:
+        return 0
+    return bam.count(
+        contig=chrom,
+        start=start,
+        stop=end,
+        read_callback=lambda read: read.mapping_quality >= min_mapq,
+    )
+
+
+def reference_coverage(bam: pysam.AlignmentFile, chrom: str, start: int, end: int) -> float:
+    """Mean depth over the covered columns of one region, computed by htslib."""
+    if start >= end or chrom not in bam.references:
+        return 0.0
+    depths = [
+        column.n for column in bam.pileup(contig=chrom, start=start, stop=end, truncate=True)
+    ]
+    return sum(depths) / len(depths) if depths else 0.0
+
+
+def sweep(bam_file: Path, regions, min_mapq: int):
+    """Yield (bam, chrom, own regions, counts, coverage) of _sweep_reads per contig."""
+    config = QuantificationConfig(
+        bam_file=bam_file,
+        gtf_file=Path("unused.gtf"),
+        output_prefix="unused",
+        min_mapq=min_mapq,
+        transcripts=pd.DataFrame(),
+        validate_inputs=False,
+    )
+    with ExpressionQuantifier(config) as quantifier:
+        for chrom in ("ctg1", "ctg2", "no_reads", "missing"):
+            own = [(s, e) for c, s, e in regions if c == chrom]
+            starts = np.array([s for s, _ in own], dtype=np.int64)
+            ends = np.array([e for _, e in own], dtype=np.int64)
+            counts, coverage = quantifier._sweep_reads(quantifier.bam, chrom, starts, ends)
+            yield quantifier.bam, chrom, own, counts, coverage
+
+
+@pytest.mark.parametrize("block", [7, tpm_calculator.READ_SWEEP_BLOCK])
+@pytest.mark.parametrize("min_mapq", [0, 60, 255])
+def test_counts_match_bam_count(bam_file, regions, monkeypatch, block, min_mapq):
+    """Counts equal per-region bam.count with the mapping-quality filter."""
+    monkeypatch.setattr(tpm_calculator, "READ_SWEEP_BLOCK", block)
+    for bam, chrom, own, counts, _ in sweep(bam_file, regions, min_mapq):
+        assert counts.tolist() == [reference_count(bam, chrom, s, e, min_mapq) for s, e in own]
+
+
+@pytest.mark.parametrize("block", [7, tpm_calculator.READ_SWEEP_BLOCK])
+@pytest.mark.parametrize("min_mapq", [0, 60, 255])
+def test_coverage_matches_pileup(bam_file, regions, monkeypatch, block, min_mapq):
+    """Coverage equals the mean pileup depth, whatever the count filter."""
+    monkeypatch.setattr(tpm_calculator, "READ_SWEEP_BLOCK", block)
+    for bam, chrom, own, _, coverage in sweep(bam_file, regions, min_mapq):
+        assert coverage.tolist() == [reference_coverage(bam, chrom, s, e) for s, e in own]
@@ -0,0 +1,50 @@
+"""
+Transcript fractions from the Arrow path checked against the pandas path.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from teprof2.quantification.tpm_calculator import ExpressionQuantifier
+
+
+@pytest.fixture(scope="module")
+def transcripts() -> pd.DataFrame:
+    """Random transcripts: genes with zero totals, and rows without a gene_id."""
+    rng = np.random.default_rng(13)
+    n = 400
+    gene_id = rng.choice([f"g{i}" for i in range(40)] + [None] * 6, n).astype(object)
+    count = rng.integers(0, 20, n) * rng.choice([0, 1], n)
+    return pd.DataFrame(
+        {
+            "transcript_id": [f"t{i}" for i in range(n)],
+            "gene_id": gene_id,
+            "count": count.astype(np.int64),
+            "tpm": count * rng.random(n) * 10,
+        }
+    )
+
+
+# The fraction methods use no quantifier state (no BAM needed)
+quantifier = ExpressionQuantifier.__new__(ExpressionQuantifier)
+
+
+@pytest.mark.parametrize("gene_id_type", [pa.string(), pa.large_string()])
+def test_arrow_fractions_match_pandas(transcripts, gene_id_type):
+    """Same totals and fractions, including NaN totals and 0 fractions without a gene_id."""
+    table = pa.Table.from_pandas(transcripts, preserve_index=False)
+    table = table.set_column(1, "gene_id", table["gene_id"].cast(gene_id_type))
+
+    expected = quantifier.calculate_transcript_fraction(transcripts)
+    result = quantifier.calculate_transcript_fraction(table).to_pandas()
+    result["gene_id"] = result["gene_id"].astype(object)
+
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+    no_gene = transcripts["gene_id"].isna()
+    assert no_gene.any()
+    assert result.loc[no_gene, "gene_count"].isna().all()
+    assert (result.loc[no_gene, ["count_fraction", "tpm_fraction"]] == 0).all().all()